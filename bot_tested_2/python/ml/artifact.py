@@ -0,0 +1,122 @@
+"""
+Fast-start deployment artifact for the live signal path.
+
+An artifact is a directory with manifest.json and one .npy file per array:
+the flat ensemble's node arrays (see flat_ensemble.py), the scaler's
+mean / scale, the median fill values and, for prebinned models, the bin
+edges. Loading memory-maps the arrays and needs only NumPy, so a restart
+skips unpickling three framework models and importing pandas, LightGBM,
+XGBoost and scikit-learn. warm_up() reads every mapped page and runs a few
+predictions so the first live signal does not pay for page faults or
+first-call overhead.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from flat_ensemble import FlatEnsemble
+
+
+ARTIFACT_VERSION = 3
+MANIFEST_FILE = 'manifest.json'
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def export_artifact(output_dir, flat, feature_names, scaler_mean, scaler_scale, fill_values,
+                    metadata=None):
+    """Write arrays, then the manifest (its presence marks a complete artifact)."""
+    os.makedirs(output_dir, exist_ok=True)
+    arrays = {name: getattr(flat, name) for name in FlatEnsemble.ARRAYS
+              if getattr(flat, name) is not None}
+    arrays.update({
+        'scaler_mean': np.asarray(scaler_mean, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler_scale, dtype=np.float64),
+        'fill_values': np.asarray(fill_values, dtype=np.float64),
+    })
+
+    entries = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(output_dir, f'{name}.npy'), array)
+        entries[name] = {'file': f'{name}.npy', 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    manifest = {
+        'format_version': ARTIFACT_VERSION,
+        'n_features': int(flat.n_features),
+        'feature_names': list(feature_names),
+        'n_trees': int(len(flat.roots)),
+        'n_members': int(len(flat.member_link)),
+        'arrays': entries,
+        'metadata': metadata or {},
+    }
+    tmp_path = os.path.join(output_dir, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+    return manifest
+
+
+class DeploymentArtifact:
+    """Memory-mapped artifact: raw feature vector in, ensemble up-probability out."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as fh:
+            self.manifest = json.load(fh)
+        if self.manifest.get('format_version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version {self.manifest.get('format_version')!r} "
+                             f"in {path} (expected {ARTIFACT_VERSION})")
+
+        self.arrays = {}
+        for name, entry in self.manifest['arrays'].items():
+            array = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+            if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+                raise ValueError(f"Artifact array {name!r} is {array.dtype.str} {list(array.shape)}, "
+                                 f"manifest says {entry['dtype']} {entry['shape']}")
+            # Plain ndarray view of the mapping (np.memmap adds per-call overhead)
+            self.arrays[name] = np.asarray(array)
+
+        self.feature_names = self.manifest['feature_names']
+        self.n_features = self.manifest['n_features']
+        if len(self.feature_names) != self.n_features:
+            raise ValueError(f"Artifact lists {len(self.feature_names)} features for "
+                             f"{self.n_features} model inputs")
+        self.mean = self.arrays['scaler_mean']
+        self.scale = self.arrays['scaler_scale']
+        self.fill_values = self.arrays['fill_values']
+        self.flat = FlatEnsemble(n_features=self.n_features,
+                                 **{name: self.arrays[name] for name in FlatEnsemble.ARRAYS
+                                    if name in self.arrays})
+        self._predictor = None
+
+    @property
+    def predictor(self):
+        """EnsemblePredictor over this artifact's mapped arrays (built on first use)."""
+        if self._predictor is None:
+            from predictor import EnsemblePredictor
+            self._predictor = EnsemblePredictor(self.flat, self.feature_names, self.mean, self.scale,
+                                                self.fill_values, source=self.path, artifact=self)
+        return self._predictor
+
+    def predict_one(self, x):
+        """Up-probability for one raw (unscaled) feature vector in feature_names order."""
+        return self.predictor.predict(x)
+
+    def warm_up(self, n_predictions=20):
+        """Fault in every mapped page and prime the prediction path; returns seconds."""
+        start = time.perf_counter()
+        for array in self.arrays.values():
+            array.view(np.uint8).sum()
+        for _ in range(n_predictions):
+            self.predict_one(self.fill_values)
+        return time.perf_counter() - start
+
+
+def load_artifact(path):
+    return DeploymentArtifact(path)
@@ -0,0 +1,95 @@
+"""
+Shared quantile-binned uint8 training matrix.
+
+The scaled float64 feature matrix is quantized once into at most 255
+quantile bins per feature. Every ensemble member and every walk-forward
+fold then trains from the same 1-byte-per-value codes:
+LightGBM takes row subsets of one constructed Dataset (bin mappers are
+reused, nothing is re-binned), XGBoost builds QuantileDMatrix objects that
+reuse the cuts of a reference matrix, and RandomForest fits the codes
+directly.
+"""
+
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+
+
+class QuantileBinner:
+    """Per-feature quantile bin edges; transform() maps values to uint8 codes."""
+
+    def __init__(self, max_bins=255, sample_size=200_000, random_state=42):
+        if not 2 <= max_bins <= 256:
+            raise ValueError(f"max_bins must be in [2, 256] for uint8 codes, got {max_bins}")
+        self.max_bins = max_bins
+        self.sample_size = sample_size
+        self.random_state = random_state
+        # (n_features, max_bins - 1) edges, padded with +inf where a feature
+        # has fewer distinct quantiles
+        self.edges = None
+
+    def fit(self, X):
+        X = np.asarray(X)
+        rows = X
+        if len(X) > self.sample_size:
+            rng = np.random.default_rng(self.random_state)
+            rows = X[np.sort(rng.choice(len(X), self.sample_size, replace=False))]
+
+        quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+        self.edges = np.full((X.shape[1], self.max_bins - 1), np.inf)
+        for j in range(X.shape[1]):
+            edges = np.unique(np.quantile(rows[:, j], quantiles))
+            self.edges[j, :len(edges)] = edges
+        return self
+
+    def transform(self, X):
+        if self.edges is None:
+            raise RuntimeError("QuantileBinner.transform() called before fit()")
+        X = np.asarray(X)
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j in range(X.shape[1]):
+            codes[:, j] = np.searchsorted(self.edges[j], X[:, j], side='right')
+        return codes
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+class BinnedMatrix:
+    """
+    uint8 codes plus target, with lazily built framework datasets shared by
+    every fold. Training rows are always a prefix [0, stop) of the matrix,
+    which is how expanding-window walk-forward folds and the final
+    train/test split are laid out.
+    """
+
+    def __init__(self, codes, y, max_bin=255):
+        self.codes = codes
+        self.y = y
+        self.max_bin = max_bin
+        self._lgb_full = None
+        self._xgb_ref = None
+
+    def __len__(self):
+        return len(self.y)
+
+    def lgb_train_set(self, stop):
+        if self._lgb_full is None:
+            self._lgb_full = lgb.Dataset(
+                self.codes, label=self.y, free_raw_data=False,
+                params={'max_bin': self.max_bin, 'verbose': -1}
+            ).construct()
+        if stop == len(self):
+            return self._lgb_full
+        return self._lgb_full.subset(np.arange(stop))
+
+    def xgb_train_matrix(self, stop):
+        if self._xgb_ref is None:
+            self._xgb_ref = xgb.QuantileDMatrix(self.codes, label=self.y, max_bin=self.max_bin + 1)
+        if stop == len(self):
+            return self._xgb_ref
+        return xgb.QuantileDMatrix(self.codes[:stop], label=self.y[:stop],
+                                   ref=self._xgb_ref, max_bin=self.max_bin + 1)
+
+    def rf_train_set(self, stop):
+        return self.codes[:stop], self.y[:stop]
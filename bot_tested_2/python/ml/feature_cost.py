@@ -0,0 +1,212 @@
+"""
+Per-feature compute cost and cost-aware feature selection.
+
+The columns of ComprehensiveFeatureEngineer are grouped by the computation
+that produces them (one rolling window, one indicator, one streaming
+kernel): every column of a group comes from the same state, so paying for
+one makes the rest free. For each group the profiler times
+
+  - the group's kernel in feature_engineering.py, the code
+    calculate_comprehensive_features runs, over a sample of rows (µs per
+    row), and
+  - the incremental update the live path runs per tick (µs per tick): the
+    stream groups of online_features.OnlineFeatureEngine.
+
+Groups that read derived quote / trade values (mid, spread, signed flow)
+require the 'book' / 'trade' groups. A feature set's cost is the sum over
+the groups it needs, each counted once. Selection trades importance
+against that cost: features are added greedily by importance per µs of
+marginal per-tick cost while the total fits the per-tick CPU budget.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import feature_group_kernels, base_inputs
+from online_features import stream_groups, closure
+
+
+# ==================== FEATURE GROUPS ====================
+# batch is the group's kernel from feature_engineering.feature_group_kernels,
+# the code calculate_comprehensive_features runs; stream is its per-tick
+# updater from online_features.stream_groups.
+
+class FeatureGroup:
+    def __init__(self, name, columns, batch, stream, requires=()):
+        self.name = name
+        self.columns = list(columns)
+        self.batch = batch
+        self.stream = stream
+        self.requires = tuple(requires)
+
+
+def _no_columns(ctx):
+    return {}
+
+
+def feature_groups(quantile_window=1000):
+    """Batch kernel and per-tick updater behind every ComprehensiveFeatureEngineer column."""
+    kernels = feature_group_kernels(quantile_window)
+    # Stream-only state with no columns (the shared price ring) has no batch kernel
+    return [FeatureGroup(g.name, g.columns, kernels[g.name] if g.columns else _no_columns,
+                         g.stream, g.requires)
+            for g in stream_groups(quantile_window)]
+
+
+# ==================== PROFILER ====================
+
+class FeatureCostProfiler:
+    """
+    Batch (µs per row) and incremental (µs per tick) cost of every feature
+    group, measured on the raw trade / quote columns of a merged frame.
+    Incremental cost is timed on the last stream_ticks of n_rows ticks, so
+    every window is full; both timings are best of `repeats`.
+    """
+
+    def __init__(self, quantile_window=1000, n_rows=10_000, stream_ticks=2_000, repeats=3):
+        self.quantile_window = quantile_window
+        self.n_rows = n_rows
+        self.stream_ticks = stream_ticks
+        self.repeats = repeats
+        self.groups = {g.name: g for g in feature_groups(quantile_window)}
+        self.group_of = {col: g.name for g in self.groups.values() for col in g.columns}
+        self.costs = None
+
+    def _ticks(self, df):
+        """Raw rows as tick dicts with the book / trade derived values filled in."""
+        raw = df[list(base_inputs(df))]
+        ticks = [dict(zip(raw.columns, row)) for row in raw.itertuples(index=False, name=None)]
+        updates = [self.groups['book'].stream(), self.groups['trade'].stream()]
+        for t in ticks:
+            for update in updates:
+                update(t)
+        return ticks
+
+    def _time_batch(self, group, df):
+        # Dependencies write their derived inputs into ctx outside the timing
+        ctx = base_inputs(df)
+        for name in group.requires:
+            self.groups[name].batch(ctx)
+        best = np.inf
+        for _ in range(self.repeats):
+            local = dict(ctx)
+            start = time.perf_counter()
+            group.batch(local)
+            best = min(best, time.perf_counter() - start)
+        return best * 1e6 / len(df)
+
+    def _time_updates(self, groups, ticks):
+        warmup, timed = ticks[:-self.stream_ticks], ticks[-self.stream_ticks:]
+        best = np.inf
+        for _ in range(self.repeats):
+            updates = [g.stream() for g in groups]
+            for t in warmup:
+                for update in updates:
+                    update(t)
+            start = time.perf_counter()
+            for t in timed:
+                for update in updates:
+                    update(t)
+            best = min(best, time.perf_counter() - start)
+        return best * 1e6 / len(timed)
+
+    def _time_stream(self, group, ticks):
+        # Stateful dependencies (the shared price ring) run alongside; their cost is their own row
+        deps = [self.groups[name] for name in group.requires if name not in ('book', 'trade')]
+        tick_us = self._time_updates(deps + [group], ticks)
+        if deps:
+            tick_us = max(tick_us - self._time_updates(deps, ticks), 0.0)
+        return tick_us
+
+    def profile(self, df):
+        """Time every group on the last n_rows rows of df; returns the per-group table."""
+        df = df.iloc[-self.n_rows:].reset_index(drop=True)
+        if len(df) <= self.stream_ticks:
+            raise ValueError(f"Need more than {self.stream_ticks} rows to profile, got {len(df)}")
+        print(f"Profiling {len(self.groups)} feature groups on {len(df)} rows...")
+        ticks = self._ticks(df)
+        rows = []
+        for group in self.groups.values():
+            rows.append({'group': group.name, 'n_columns': len(group.columns),
+                         'requires': ','.join(group.requires),
+                         'batch_us_per_row': self._time_batch(group, df),
+                         'tick_us': self._time_stream(group, ticks)})
+        self.costs = pd.DataFrame(rows).set_index('group')
+        return self.costs
+
+    def closure(self, features):
+        """Groups needed to compute `features`, dependencies included."""
+        return closure(self.groups, {self.group_of[f] for f in features if f in self.group_of})
+
+    def tick_cost(self, features):
+        """Per-tick µs to maintain a feature set (shared groups counted once)."""
+        return float(self.costs.loc[sorted(self.closure(features)), 'tick_us'].sum())
+
+    def feature_costs(self):
+        """Per-feature table: own group cost split over its columns, and standalone cost."""
+        rows = []
+        for col, name in self.group_of.items():
+            group = self.costs.loc[name]
+            rows.append({'feature': col, 'group': name,
+                         'batch_us_per_row': group['batch_us_per_row'] / group['n_columns'],
+                         'tick_us': group['tick_us'] / group['n_columns'],
+                         'standalone_tick_us': self.tick_cost([col])})
+        return pd.DataFrame(rows).set_index('feature')
+
+    def select(self, importance, tick_budget_us, n_features=None):
+        """
+        Greedy importance per µs of marginal per-tick cost under the budget.
+        Features whose groups are already paid for are free and are taken by
+        importance; features the profiler does not know are treated as free.
+        """
+        importance = pd.Series(importance, dtype=np.float64)
+        candidates = [f for f in importance.sort_values(ascending=False, kind='stable').index
+                      if importance[f] > 0]
+        unknown = [f for f in candidates if f not in self.group_of]
+        if unknown:
+            print(f"  ⚠ No cost profile for {len(unknown)} features (treated as free): {unknown[:5]}")
+        tick_us = self.costs['tick_us']
+
+        selected, paid, spent = [], set(), 0.0
+        limit = len(candidates) if n_features is None else n_features
+        while candidates and len(selected) < limit:
+            best, best_score, best_cost = None, -np.inf, 0.0
+            for f in candidates:
+                extra = self.closure([f]) - paid
+                cost = float(tick_us[sorted(extra)].sum()) if extra else 0.0
+                if spent + cost > tick_budget_us:
+                    continue
+                score = np.inf if cost == 0 else importance[f] / cost
+                if score > best_score:
+                    best, best_score, best_cost = f, score, cost
+            if best is None:
+                break
+            selected.append(best)
+            candidates.remove(best)
+            paid |= self.closure([best])
+            spent += best_cost
+        return selected
+
+    def breakdown(self, features):
+        """Per-group cost of a selected feature set, most expensive first."""
+        chosen = {}
+        for f in features:
+            if f in self.group_of:
+                chosen.setdefault(self.group_of[f], []).append(f)
+        table = self.costs.loc[sorted(self.closure(features))].copy()
+        table['selected'] = [len(chosen.get(name, [])) for name in table.index]
+        table['share'] = table['tick_us'] / max(table['tick_us'].sum(), 1e-12)
+        return table.sort_values('tick_us', ascending=False)
+
+    def print_breakdown(self, features, tick_budget_us=None):
+        table = self.breakdown(features)
+        print(f"\n{'group':<22}{'selected':>9}{'tick µs':>10}{'batch µs/row':>14}{'share':>8}")
+        for name, row in table.iterrows():
+            print(f"{name:<22}{row['selected']:>5}/{row['n_columns']:<3}{row['tick_us']:>10.2f}"
+                  f"{row['batch_us_per_row']:>14.3f}{row['share']:>8.1%}")
+        budget = '' if tick_budget_us is None else f" (budget {tick_budget_us:.1f} µs)"
+        print(f"{'total':<22}{len(features):>9}{table['tick_us'].sum():>10.2f}"
+              f"{table['batch_us_per_row'].sum():>14.3f}{budget}")
+        return table
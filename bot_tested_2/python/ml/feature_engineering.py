@@ -4,28 +4,274 @@ Fixed feature engineering - creates target BEFORE cleaning NaN values.
 
 import pandas as pd
 import numpy as np
-import ta
 from scipy.stats import skew, kurtosis
 import os
 
+from indicators import rsi, macd
+from rolling_quantile import rolling_quantile
+from trend_features import rolling_ols, variance_ratio, sign_entropy
+from spectral_features import frac_diff, cross_correlation, rolling_lagged_corr
+from labels import build_labels, triple_barrier_labels, DEFAULT_HORIZONS, LABEL_MISSING
+
+try:
+    import pyarrow  # noqa: F401  (optional, multi-threaded CSV parsing)
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Explicit dtypes for compact ingest; timestamps stay int64 nanoseconds
+TRADE_DTYPES = {'timestamp': 'int64', 'price': 'float64', 'quantity': 'float64', 'side': 'category'}
+QUOTE_DTYPES = {'timestamp': 'int64', 'bid_price': 'float64', 'ask_price': 'float64',
+                'bid_volume': 'float64', 'ask_volume': 'float64'}
+
+# Kept at float64 in compact mode: targets are built from these
+FLOAT64_COLUMNS = {'price', 'bid_price', 'ask_price', 'mid_price'}
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+
+
+def bytes_per_row(df):
+    """In-memory size of a frame per row (deep, includes strings)."""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
+
+
+# ==================== FEATURE GROUPS ====================
+# One kernel per group of columns that share a computation (one rolling
+# window, one indicator), named as the stream groups in online_features.py.
+# A kernel maps ctx (the raw merged columns from base_inputs, plus the
+# derived inputs the 'book' / 'trade' kernels store in it) to a dict of
+# columns. calculate_comprehensive_features runs them all in order;
+# feature_cost.py times them one group at a time.
+
+RAW_INPUTS = ('timestamp', 'bid_price', 'ask_price', 'bid_volume', 'ask_volume', 'price', 'quantity', 'side')
+
+
+# Bar frames (bars.BarSampler) also carry each bar's buy and sell volume
+BAR_FLOW_INPUTS = ('buy_volume', 'sell_volume')
+
+
+def base_inputs(df):
+    ctx = {key: df[key] for key in RAW_INPUTS}
+    ctx.update({key: df[key] for key in BAR_FLOW_INPUTS if key in df.columns})
+    return ctx
+
+
+def _book_features(ctx):
+    mid = (ctx['bid_price'] + ctx['ask_price']) / 2
+    spread = ctx['ask_price'] - ctx['bid_price']
+    obi = (ctx['bid_volume'] - ctx['ask_volume']) / (ctx['bid_volume'] + ctx['ask_volume'])
+    log_mid = np.log(mid.to_numpy(dtype=np.float64))
+    # Trades before the first quote have no mid; count them as no move
+    ctx.update(mid_price=mid, spread=spread, obi=obi, log_mid=log_mid,
+               mid_return=np.nan_to_num(np.diff(log_mid, prepend=log_mid[0]), nan=0.0))
+    return {
+        'mid_price': mid, 'spread': spread,
+        'spread_pct': (spread / mid) * 10000,
+        'obi': obi, 'book_depth': ctx['bid_volume'] + ctx['ask_volume'],
+        'bid_ask_ratio': ctx['bid_volume'] / (ctx['ask_volume'] + 1e-10),
+        'obi_extreme': (np.abs(obi) > 0.5).astype(int),
+        'price_to_bid': (ctx['price'] - ctx['bid_price']) / (spread + 1e-10),
+        'price_to_mid': (ctx['price'] - mid) / mid,
+    }
+
+
+def _trade_features(ctx):
+    buy = (ctx['side'] == 'buy').astype(int)
+    sell = (ctx['side'] == 'sell').astype(int)
+    if 'buy_volume' in ctx:
+        # A bar's side is only its majority side; its flow is the buy / sell split
+        buy_qty, sell_qty = ctx['buy_volume'], ctx['sell_volume']
+        signed_flow = (buy_qty - sell_qty).to_numpy(dtype=np.float64)
+    else:
+        buy_qty, sell_qty = buy * ctx['quantity'], sell * ctx['quantity']
+        signed_flow = np.where(ctx['side'] == 'buy', 1.0, -1.0) * ctx['quantity'].to_numpy(dtype=np.float64)
+    ctx.update(buy_signal=buy, sell_signal=sell, buy_qty=buy_qty, sell_qty=sell_qty, signed_flow=signed_flow)
+    return {'buy_signal': buy, 'sell_signal': sell, 'volume': ctx['quantity']}
+
+
+def _time_features(ctx):
+    # Straight from the int64 ns trade timestamp (UTC), no datetime column needed
+    ts = ctx['timestamp'].to_numpy(dtype=np.int64)
+    return {'hour': (ts // NS_PER_HOUR) % 24, 'minute': (ts // NS_PER_MINUTE) % 60}
+
+
+def _book_change_features(ctx):
+    return {'spread_change': ctx['spread'].diff(), 'obi_change': ctx['obi'].diff()}
+
+
+def _flow_features(window):
+    def kernel(ctx):
+        buy_vol = ctx['buy_qty'].rolling(window).sum()
+        sell_vol = ctx['sell_qty'].rolling(window).sum()
+        return {f'buy_volume_{window}': buy_vol, f'sell_volume_{window}': sell_vol,
+                f'flow_imbalance_{window}': (buy_vol - sell_vol) / (buy_vol + sell_vol + 1e-10),
+                f'net_flow_{window}': buy_vol - sell_vol}
+    return kernel
+
+
+def _volume_features(ctx):
+    ma_10 = ctx['quantity'].rolling(10).mean()
+    ma_50 = ctx['quantity'].rolling(50).mean()
+    return {'volume_ma_10': ma_10, 'volume_ma_50': ma_50, 'volume_acceleration': ma_10 - ma_50}
+
+
+def _volatility_features(window):
+    return lambda ctx: {f'volatility_{window}': ctx['price'].rolling(window).std()}
+
+
+def _range_features(window):
+    def kernel(ctx):
+        high = ctx['price'].rolling(window).max()
+        low = ctx['price'].rolling(window).min()
+        return {f'high_{window}': high, f'low_{window}': low, f'price_range_{window}': high - low,
+                f'price_position_{window}': (ctx['price'] - low) / (high - low + 1e-10)}
+    return kernel
+
+
+def _lag_features(window, log_return, momentum):
+    def kernel(ctx):
+        out = {}
+        if log_return:
+            out[f'log_return_{window}'] = np.log(ctx['price'] / ctx['price'].shift(window))
+        if momentum:
+            out[f'momentum_{window}'] = ctx['price'].diff(window)
+            out[f'price_change_pct_{window}'] = ctx['price'].pct_change(window, fill_method=None)
+        return out
+    return kernel
+
+
+def _zscore_features(window):
+    def kernel(ctx):
+        mean = ctx['price'].rolling(window).mean()
+        std = ctx['price'].rolling(window).std()
+        zscore = (ctx['price'] - mean) / (std + 1e-10)
+        return {f'price_zscore_{window}': zscore, f'extreme_move_{window}': (np.abs(zscore) > 1.5).astype(int)}
+    return kernel
+
+
+def _spread_ma_features(window):
+    def kernel(ctx):
+        ma = ctx['spread'].rolling(window).mean()
+        out = {f'spread_ma_{window}': ma}
+        if window == 50:
+            out['spread_expansion'] = (ctx['spread'] > ma).astype(int)
+        return out
+    return kernel
+
+
+def _book_ma_features(ctx):
+    ratio = ctx['bid_volume'] / (ctx['ask_volume'] + 1e-10)
+    return {'obi_ma_10': ctx['obi'].rolling(10).mean(), 'bid_ask_ratio_ma': ratio.rolling(10).mean()}
+
+
+def _thin_book_features(quantile_window):
+    def kernel(ctx):
+        depth = (ctx['bid_volume'] + ctx['ask_volume']).to_numpy(dtype=np.float64)
+        q25 = rolling_quantile(depth, 0.25, window=quantile_window)
+        return {'thin_book': (depth < q25).astype(int)}
+    return kernel
+
+
+def _trend_features(window):
+    def ols(ctx):
+        slope, r2 = rolling_ols(ctx['price'].to_numpy(dtype=np.float64), window)
+        return {f'ols_slope_{window}': slope, f'ols_r2_{window}': r2}
+
+    def vr(ctx):
+        ratio, hurst = variance_ratio(ctx['price'].to_numpy(dtype=np.float64), window)
+        return {f'variance_ratio_{window}': ratio, f'hurst_{window}': hurst}
+
+    def entropy(ctx):
+        return {f'sign_entropy_{window}': sign_entropy(ctx['price'].to_numpy(dtype=np.float64), window)}
+
+    return {f'ols_{window}': ols, f'variance_ratio_{window}': vr, f'sign_entropy_{window}': entropy}
+
+
+# Default weight threshold: frac_diff_30 warms up over 387 rows, the longest
+# of any feature (see spectral_features.frac_diff)
+def _frac_diff_features(d):
+    name = f'frac_diff_{int(round(d * 100))}'
+    return lambda ctx: {name: frac_diff(ctx['log_mid'], d)}
+
+
+def _lead_lag_features(lag):
+    name = f'flow_mid_corr_lag{lag}'
+    return lambda ctx: {name: rolling_lagged_corr(ctx['signed_flow'], ctx['mid_return'], lag, window=100)}
+
+
+def _macd_features(ctx):
+    line, signal, diff = macd(ctx['price'].to_numpy(dtype=np.float64))
+    return {'macd': line, 'macd_signal': signal, 'macd_diff': diff}
+
+
+def feature_group_kernels(quantile_window=1000):
+    """Kernel of every feature group, dependencies ('book', 'trade') first."""
+    kernels = {
+        'book': _book_features,
+        'trade': _trade_features,
+        'time': _time_features,
+        'book_changes': _book_change_features,
+    }
+    for w in [5, 10, 20, 50]:
+        kernels[f'flow_{w}'] = _flow_features(w)
+    kernels['volume_ma'] = _volume_features
+    for w in [10, 20, 50, 100]:
+        kernels[f'volatility_{w}'] = _volatility_features(w)
+    for w in [10, 20, 50, 100]:
+        kernels[f'price_range_{w}'] = _range_features(w)
+    for w in [5, 10, 20, 50, 100]:
+        kernels[f'lag_{w}'] = _lag_features(w, log_return=w >= 10, momentum=w <= 50)
+    for w in [5, 10, 20]:
+        kernels[f'zscore_{w}'] = _zscore_features(w)
+    for w in [10, 50]:
+        kernels[f'spread_ma_{w}'] = _spread_ma_features(w)
+    kernels['book_ma_10'] = _book_ma_features
+    kernels['thin_book'] = _thin_book_features(quantile_window)
+    for w in [20, 50, 100]:
+        kernels.update(_trend_features(w))
+    for d in [0.3, 0.45, 0.6]:
+        kernels[f'frac_diff_{int(round(d * 100))}'] = _frac_diff_features(d)
+    for lag in [1, 2, 5, 10, 20]:
+        kernels[f'flow_mid_corr_lag{lag}'] = _lead_lag_features(lag)
+    kernels['rsi_14'] = lambda ctx: {'rsi_14': rsi(ctx['price'].to_numpy(dtype=np.float64), 14)}
+    kernels['macd'] = _macd_features
+    return kernels
+
 
 class ComprehensiveFeatureEngineer:
-    def __init__(self, trades_path, quotes_path):
+    def __init__(self, trades_path, quotes_path, quantile_window=1000, bar_sampler=None,
+                 compact=False):
         self.trades_path = trades_path
         self.quotes_path = quotes_path
+        # Compact mode: typed CSV ingest, int64-ns timestamps only (no datetime
+        # columns), categorical side and float32 feature storage
+        self.compact = compact
+        # Optional bars.BarSampler: aggregate raw trades into event-driven bars
+        self.bar_sampler = bar_sampler
+        # Trailing window for percentile-threshold features (causal, no lookahead)
+        self.quantile_window = quantile_window
 
     def load_data(self):
         """Load and prepare raw data."""
         print("Loading raw data...")
-        trades = pd.read_csv(self.trades_path)
-        quotes = pd.read_csv(self.quotes_path)
-        
-        trades['datetime'] = pd.to_datetime(trades['timestamp'], unit='ns')
-        quotes['datetime'] = pd.to_datetime(quotes['timestamp'], unit='ns')
+        if self.compact:
+            trades = pd.read_csv(self.trades_path, dtype=TRADE_DTYPES, engine=CSV_ENGINE)
+            quotes = pd.read_csv(self.quotes_path, dtype=QUOTE_DTYPES, engine=CSV_ENGINE)
+        else:
+            trades = pd.read_csv(self.trades_path)
+            quotes = pd.read_csv(self.quotes_path)
+            
+            trades['datetime'] = pd.to_datetime(trades['timestamp'], unit='ns')
+            quotes['datetime'] = pd.to_datetime(quotes['timestamp'], unit='ns')
         trades = trades.sort_values('timestamp').reset_index(drop=True)
         quotes = quotes.sort_values('timestamp').reset_index(drop=True)
         
         print(f"Loaded {len(trades)} trades and {len(quotes)} quotes")
+        print(f"  Trades: {bytes_per_row(trades):.1f} bytes/row, quotes: {bytes_per_row(quotes):.1f} bytes/row")
+        
+        if self.bar_sampler is not None:
+            trades = self.bar_sampler.sample_trades(trades)
         return trades, quotes
 
     def merge_data(self, trades, quotes):
@@ -45,119 +291,74 @@ class ComprehensiveFeatureEngineer:
         """Calculate extensive feature set."""
         print("Calculating comprehensive features...")
         
-        f = df.copy()
+        # Every column comes from one group kernel (see feature_group_kernels)
+        kernels = feature_group_kernels(self.quantile_window)
+        print(f"  > {len(kernels)} feature groups...")
+        ctx = base_inputs(df)
         feature_dict = {}
-        
-        # ==================== BASE FEATURES ====================
-        print("  > Base features...")
-        feature_dict['mid_price'] = (f['bid_price'] + f['ask_price']) / 2
-        feature_dict['spread'] = f['ask_price'] - f['bid_price']
-        feature_dict['spread_pct'] = (feature_dict['spread'] / feature_dict['mid_price']) * 10000
-        feature_dict['obi'] = (f['bid_volume'] - f['ask_volume']) / (f['bid_volume'] + f['ask_volume'])
-        feature_dict['book_depth'] = f['bid_volume'] + f['ask_volume']
-        
-        # ==================== FLOW & ORDER BOOK ====================
-        print("  > Flow and order book features...")
-        
-        feature_dict['buy_signal'] = (f['side'] == 'buy').astype(int)
-        feature_dict['sell_signal'] = (f['side'] == 'sell').astype(int)
-        
-        for window in [5, 10, 20, 50]:
-            buy_vol = (feature_dict['buy_signal'] * f['quantity']).rolling(window).sum()
-            sell_vol = (feature_dict['sell_signal'] * f['quantity']).rolling(window).sum()
-            feature_dict[f'buy_volume_{window}'] = buy_vol
-            feature_dict[f'sell_volume_{window}'] = sell_vol
-            feature_dict[f'flow_imbalance_{window}'] = (buy_vol - sell_vol) / (buy_vol + sell_vol + 1e-10)
-            feature_dict[f'net_flow_{window}'] = buy_vol - sell_vol
-        
-        feature_dict['volume'] = f['quantity']
-        feature_dict['volume_ma_10'] = f['quantity'].rolling(10).mean()
-        feature_dict['volume_ma_50'] = f['quantity'].rolling(50).mean()
-        feature_dict['volume_acceleration'] = feature_dict['volume_ma_10'] - feature_dict['volume_ma_50']
-        
-        # ==================== VOLATILITY & PRICE ACTION ====================
-        print("  > Volatility and price action features...")
-        
-        for window in [10, 20, 50, 100]:
-            feature_dict[f'volatility_{window}'] = f['price'].rolling(window).std()
-            feature_dict[f'log_return_{window}'] = np.log(f['price'] / f['price'].shift(window))
-            high = f['price'].rolling(window).max()
-            low = f['price'].rolling(window).min()
-            feature_dict[f'high_{window}'] = high
-            feature_dict[f'low_{window}'] = low
-            feature_dict[f'price_range_{window}'] = high - low
-            feature_dict[f'price_position_{window}'] = (f['price'] - low) / (high - low + 1e-10)
-        
-        for window in [5, 10, 20]:
-            mean = f['price'].rolling(window).mean()
-            std = f['price'].rolling(window).std()
-            feature_dict[f'price_zscore_{window}'] = (f['price'] - mean) / (std + 1e-10)
-            feature_dict[f'extreme_move_{window}'] = (np.abs(feature_dict[f'price_zscore_{window}']) > 1.5).astype(int)
-        
-        # ==================== MARKET MICROSTRUCTURE ====================
-        print("  > Market microstructure features...")
-        
-        feature_dict['spread_change'] = feature_dict['spread'].diff()
-        feature_dict['spread_ma_10'] = feature_dict['spread'].rolling(10).mean()
-        feature_dict['spread_ma_50'] = feature_dict['spread'].rolling(50).mean()
-        feature_dict['spread_expansion'] = (feature_dict['spread'] > feature_dict['spread_ma_50']).astype(int)
-        
-        feature_dict['obi_change'] = feature_dict['obi'].diff()
-        feature_dict['obi_ma_10'] = feature_dict['obi'].rolling(10).mean()
-        feature_dict['obi_extreme'] = (np.abs(feature_dict['obi']) > 0.5).astype(int)
-        
-        feature_dict['bid_ask_ratio'] = f['bid_volume'] / (f['ask_volume'] + 1e-10)
-        feature_dict['bid_ask_ratio_ma'] = feature_dict['bid_ask_ratio'].rolling(10).mean()
-        feature_dict['thin_book'] = (feature_dict['book_depth'] < feature_dict['book_depth'].quantile(0.25)).astype(int)
-        
-        feature_dict['price_to_bid'] = (f['price'] - f['bid_price']) / (feature_dict['spread'] + 1e-10)
-        feature_dict['price_to_mid'] = (f['price'] - feature_dict['mid_price']) / feature_dict['mid_price']
-        
-        # ==================== MOMENTUM & TREND ====================
-        print("  > Momentum and trend features...")
-        
-        for window in [5, 10, 20, 50]:
-            feature_dict[f'momentum_{window}'] = f['price'].diff(window)
-            feature_dict[f'price_change_pct_{window}'] = f['price'].pct_change(window, fill_method=None)
-        
-        # ==================== TECHNICAL INDICATORS ====================
-        print("  > Technical indicators...")
-        
-        try:
-            feature_dict['rsi_14'] = ta.momentum.RSIIndicator(close=f['price'], window=14).rsi()
-        except:
-            feature_dict['rsi_14'] = np.nan
-        
-        try:
-            macd = ta.trend.MACD(close=f['price'])
-            feature_dict['macd'] = macd.macd()
-            feature_dict['macd_signal'] = macd.macd_signal()
-            feature_dict['macd_diff'] = macd.macd_diff()
-        except:
-            feature_dict['macd'] = np.nan
-            feature_dict['macd_signal'] = np.nan
-            feature_dict['macd_diff'] = np.nan
-        
-        # ==================== TIME-BASED FEATURES ====================
-        print("  > Time-based features...")
-        
-        feature_dict['hour'] = f['datetime_trade'].dt.hour
-        feature_dict['minute'] = f['datetime_trade'].dt.minute
+        for kernel in kernels.values():
+            feature_dict.update(kernel(ctx))
         
         # ==================== CONVERT ALL AT ONCE ====================
         print("  > Converting to DataFrame...")
         features_df = pd.DataFrame(feature_dict)
-        result = pd.concat([f, features_df], axis=1)
         
-        print(f"Total features created: {len(result.columns)}")
+        if self.compact:
+            before = bytes_per_row(features_df)
+            features_df = self.downcast_features(features_df)
+            print(f"  > Compact features: {before:.1f} -> {bytes_per_row(features_df):.1f} bytes/row")
+        
+        result = pd.concat([df, features_df], axis=1)
+        
+        print(f"Total features created: {len(result.columns)} ({bytes_per_row(result):.1f} bytes/row)")
         return result
 
-    def create_target(self, df, forward_window=20, percentile_threshold=0.5):
+    def _flow_and_mid_return(self, df):
+        """Signed trade size and 1-tick log return of the quote mid."""
+        ctx = base_inputs(df)
+        _book_features(ctx)
+        _trade_features(ctx)
+        return ctx['signed_flow'], ctx['mid_return']
+
+    def lead_lag_profile(self, df, max_lag=100, top=5):
+        """Full-sample flow -> mid-return cross-correlation for every lag (one FFT)."""
+        signed_flow, mid_return = self._flow_and_mid_return(df)
+        lags, corr = cross_correlation(signed_flow, mid_return, max_lag)
+        profile = pd.Series(corr, index=pd.Index(lags, name='lag'), name='flow_mid_corr')
+        
+        strongest = profile.abs().sort_values(ascending=False).index[:top]
+        print(f"Lead-lag profile (positive lag = flow leads mid), top {top}:")
+        for lag in strongest:
+            print(f"  lag {lag:+4d}: {profile[lag]:+.4f}")
+        return profile
+
+    def downcast_features(self, features_df):
+        """float64 -> float32 and int64 -> smallest int, except FLOAT64_COLUMNS."""
+        out = {}
+        for col in features_df.columns:
+            values = features_df[col]
+            if col in FLOAT64_COLUMNS:
+                out[col] = values
+            elif values.dtype == np.float64:
+                out[col] = values.astype(np.float32)
+            elif values.dtype == np.int64:
+                out[col] = pd.to_numeric(values, downcast='integer')
+            else:
+                out[col] = values
+        return pd.DataFrame(out, index=features_df.index)
+
+    def create_target(self, df, forward_window=20, percentile_threshold=0.5,
+                      method='forward_return', profit_take=1.0, stop_loss=1.0):
         """
         Create target BEFORE cleaning NaN.
         Use rows that have valid future data.
+        
+        method='forward_return' labels on the return after forward_window ticks.
+        method='triple_barrier' labels on whichever barrier the mid touches first
+        (profit_take / stop_loss are multiples of the forward_window return std,
+        time-outs take the sign of the final return).
         """
-        print(f"Creating target (forward_window={forward_window})...")
+        print(f"Creating target (forward_window={forward_window}, method={method})...")
         
         # Only work with rows that have valid future data
         n = len(df)
@@ -172,18 +373,50 @@ class ComprehensiveFeatureEngineer:
         df_target['future_mid'] = future_mid
         df_target['future_return'] = (future_mid - current_mid) / current_mid
         
-        # Create binary target using percentile
-        threshold = df_target['future_return'].quantile(percentile_threshold)
-        df_target['target'] = (df_target['future_return'] > threshold).astype(int)
+        if method == 'forward_return':
+            # Create binary target using percentile
+            threshold = df_target['future_return'].quantile(percentile_threshold)
+            df_target['target'] = (df_target['future_return'] > threshold).astype(int)
+            print(f"Return threshold (p{percentile_threshold*100}): {threshold:.6f}")
+        elif method == 'triple_barrier':
+            sigma = df_target['future_return'].std()
+            labels, offset, touch_return = triple_barrier_labels(
+                df['mid_price'].values, forward_window,
+                profit_take * sigma, stop_loss * sigma, timeout_label='sign'
+            )
+            touched = offset[valid_idx]
+            df_target['future_mid'] = df['mid_price'].values[valid_idx + touched]
+            df_target['future_return'] = touch_return[valid_idx]
+            df_target['target'] = (labels[valid_idx] > 0).astype(int)
+            print(f"Barriers: +{profit_take * sigma:.6f} / -{stop_loss * sigma:.6f}")
+            print(f"Time-outs: {(touched == forward_window).mean():.2%}, "
+                  f"mean touch offset: {touched.mean():.1f} ticks")
+        else:
+            raise ValueError(f"Unknown target method: {method!r}")
         
         print(f"Valid rows with future data: {len(df_target)}")
-        print(f"Return threshold (p{percentile_threshold*100}): {threshold:.6f}")
         print(f"Return range: {df_target['future_return'].min():.6f} to {df_target['future_return'].max():.6f}")
         print(f"Target distribution: {df_target['target'].value_counts().to_dict()}")
         print(f"Up ratio: {df_target['target'].mean():.2%}")
         
         return df_target
 
+    def create_labels(self, df, horizons=DEFAULT_HORIZONS, schemes=None):
+        """
+        Multi-horizon int8 labels aligned to df's index (df is not copied).
+        Rows without enough future data are marked LABEL_MISSING.
+        """
+        print(f"Creating labels for horizons {list(horizons)}...")
+        labels = build_labels(df['mid_price'].values, horizons=horizons,
+                              schemes=schemes, index=df.index)
+        
+        for col in labels.columns:
+            counts = labels[col][labels[col] != LABEL_MISSING].value_counts().sort_index()
+            print(f"  {col}: {counts.to_dict()}")
+        print(f"Label matrix: {labels.shape}, {labels.memory_usage(index=False).sum() / 1e6:.2f} MB")
+        
+        return labels
+
     def clean_data(self, df):
         """Remove NaN and infinite values."""
         print("\nCleaning data...")
@@ -196,6 +429,10 @@ class ComprehensiveFeatureEngineer:
         removed = initial - final
         print(f"Removed {removed} rows with NaN/inf. Final: {final} rows")
         
+        if final == 0:
+            raise ValueError(f"No rows left after cleaning {initial} rows: the data (or the number "
+                             f"of bars) is shorter than the feature warm-up; use more data or a "
+                             f"smaller bar threshold")
         if final < 100:
             print("  WARNING: Very few rows remaining after cleaning!")
         
@@ -226,6 +463,7 @@ def main():
     
     trades, quotes = engineer.load_data()
     merged = engineer.merge_data(trades, quotes)
+    engineer.lead_lag_profile(merged)
     features = engineer.calculate_comprehensive_features(merged)
     
     # FIXED: Create target with valid rows BEFORE cleaning
@@ -0,0 +1,363 @@
+"""
+Flat-array export of the trained ensemble for low-latency inference.
+
+LightGBM, XGBoost and RandomForest trees are flattened into one set of
+contiguous node arrays (feature, threshold, left child, leaf value). The
+evaluator walks every tree of every member at once, one tree level per
+NumPy step, so a single row costs a few dozen small array operations
+instead of three framework predict calls with their dispatch, validation
+and thread-pool overhead. Many rows are evaluated the same way in one
+pass.
+
+Each tree is stored breadth-first with the two children of a split next to
+each other, so a level step is just left[node] + went_right: three gathers,
+one comparison and one add per level, the same arrays that are saved and
+memory-mapped, with no per-process copies.
+
+Each framework's comparison is reproduced exactly: LightGBM compares the
+float64 value with <=, RandomForest compares the float32-rounded value with
+<=, and XGBoost compares float32 with <, which is rewritten as <= against the
+next float32 below the split. Missing values follow each split's learned
+direction: the row is laid out four times (float64 / float32, NaN as -inf /
++inf) and every node reads the copy whose NaN replacement lands on its
+missing-value side, so NaNs cost nothing per level. Probabilities match the
+members' own predictions up to float summation order.
+"""
+
+import json
+
+import numpy as np
+
+
+LINK_SIGMOID = 0
+LINK_IDENTITY = 1
+
+# NaN replacement in the four input blocks: float64 left / right, float32 left / right
+_NAN_FILL = np.array([-np.inf, np.inf, -np.inf, np.inf])
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _tree_depth(left, right):
+    """Number of split levels on the longest root-to-leaf path (0 for a stump leaf)."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    # Nodes are numbered parent-before-child in every supported format
+    for i in range(len(left)):
+        if left[i] >= 0:
+            depth[left[i]] = depth[i] + 1
+            depth[right[i]] = depth[i] + 1
+    leaves = left < 0
+    return int(depth[leaves].max()) if leaves.any() else 0
+
+
+def _sibling_order(left, right):
+    """Breadth-first node order (new -> old id) that puts every split's children side by side."""
+    order = [0]
+    i = 0
+    while i < len(order):
+        if left[order[i]] >= 0:
+            order.extend((left[order[i]], right[order[i]]))
+        i += 1
+    return np.array(order, dtype=np.int64)
+
+
+# ==================== FRAMEWORK READERS ====================
+# Each returns a list of trees as (feature, threshold, left, right, value,
+# missing_right) with local node ids; leaves have left == right == -1.
+
+def _lgb_trees(booster):
+    trees = []
+    for info in booster.dump_model()['tree_info']:
+        feature, threshold, left, right, value, missing_right = [], [], [], [], [], []
+        stack = [(info['tree_structure'], -1, False)]
+        while stack:
+            node, parent, is_right = stack.pop()
+            i = len(feature)
+            if parent >= 0:
+                (right if is_right else left)[parent] = i
+            if 'leaf_value' in node:
+                feature.append(0)
+                threshold.append(0.0)
+                value.append(node['leaf_value'])
+                left.append(-1)
+                right.append(-1)
+                missing_right.append(False)
+                continue
+            if node['decision_type'] != '<=':
+                raise ValueError(f"Unsupported LightGBM split type {node['decision_type']!r}")
+            if node['missing_type'] == 'Zero':
+                raise ValueError("Unsupported LightGBM missing type 'Zero' (zero_as_missing)")
+            feature.append(node['split_feature'])
+            threshold.append(node['threshold'])
+            value.append(0.0)
+            # Without a learned direction LightGBM reads NaN as 0.0
+            if node['missing_type'] == 'NaN':
+                missing_right.append(not node['default_left'])
+            else:
+                missing_right.append(0.0 > node['threshold'])
+            left.append(-1)
+            right.append(-1)
+            stack.append((node['right_child'], i, True))
+            stack.append((node['left_child'], i, False))
+        trees.append((np.array(feature), np.array(threshold, dtype=np.float64),
+                      np.array(left), np.array(right), np.array(value, dtype=np.float64),
+                      np.array(missing_right, dtype=bool)))
+    return trees
+
+
+def _xgb_base_margin(model):
+    base_score = model['learner']['learner_model_param']['base_score']
+    p = float(np.asarray(json.loads(base_score.replace('E', 'e'))
+                         if base_score.startswith('[') else float(base_score)).ravel()[0])
+    return float(np.log(p / (1.0 - p)))
+
+
+def _xgb_trees(booster, n_trees=None):
+    model = json.loads(booster.save_raw('json'))
+    trees = []
+    for tree in model['learner']['gradient_booster']['model']['trees'][:n_trees]:
+        left = np.array(tree['left_children'])
+        right = np.array(tree['right_children'])
+        cond = np.array(tree['split_conditions'], dtype=np.float32)
+        leaf = left < 0
+        # x < c in float32  <=>  x <= largest float32 below c
+        threshold = np.nextafter(cond, np.float32(-np.inf)).astype(np.float64)
+        value = np.where(leaf, cond.astype(np.float64), 0.0)
+        missing_right = ~np.array(tree['default_left'], dtype=bool) & ~leaf
+        trees.append((np.array(tree['split_indices']), threshold, left, right, value, missing_right))
+    return trees, _xgb_base_margin(model)
+
+
+def _rf_trees(forest):
+    trees = []
+    for estimator in forest.estimators_:
+        t = estimator.tree_
+        counts = t.value[:, 0, :]
+        proba = counts[:, 1] / counts.sum(axis=1)
+        leaf = t.children_left < 0
+        # Splits that only separate NaNs have threshold +inf, which NaN-as-+inf must still exceed
+        threshold = np.minimum(t.threshold.astype(np.float64), np.finfo(np.float64).max)
+        trees.append((np.where(leaf, 0, t.feature), threshold,
+                      t.children_left, t.children_right, np.where(leaf, proba, 0.0),
+                      ~t.missing_go_to_left.astype(bool) & ~leaf))
+    return trees
+
+
+def _member_trees(model):
+    """(trees, link, base margin, tree weight, reads float32 input) for one member."""
+    import lightgbm as lgb
+    import xgboost as xgb
+    from sklearn.ensemble import RandomForestClassifier
+
+    if isinstance(model, lgb.Booster):
+        return _lgb_trees(model), LINK_SIGMOID, 0.0, 1.0, False
+    if isinstance(model, (xgb.Booster, xgb.XGBModel)):
+        n_trees = None
+        if isinstance(model, xgb.XGBModel):
+            best = getattr(model, 'best_iteration', None)
+            n_trees = None if best is None else best + 1
+            model = model.get_booster()
+        trees, base_margin = _xgb_trees(model, n_trees)
+        return trees, LINK_SIGMOID, base_margin, 1.0, True
+    if isinstance(model, RandomForestClassifier):
+        trees = _rf_trees(model)
+        return trees, LINK_IDENTITY, 0.0, 1.0 / len(trees), True
+    raise ValueError(f"Cannot flatten ensemble member of type {type(model).__name__}")
+
+
+# ==================== FLAT ENSEMBLE ====================
+
+class FlatEnsemble:
+    """
+    All trees of an ensemble in contiguous node arrays.
+
+    predict_proba takes the same inputs as the members (scaled features, or
+    uint8 codes when binner_edges is set, in which case scaled features are
+    binned first) and returns the mean of the members' up-probabilities.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'value', 'roots', 'active',
+              'tree_member', 'tree_weight', 'member_link', 'member_base', 'binner_edges')
+
+    def __init__(self, feature, threshold, left, value, roots, active, tree_member,
+                 tree_weight, member_link, member_base, n_features, binner_edges=None,
+                 tree_order=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.active = active
+        self.tree_member = tree_member
+        self.tree_weight = tree_weight
+        self.member_link = member_link
+        self.member_base = member_base
+        self.n_features = int(n_features)
+        self.binner_edges = binner_edges
+        # Original (member order, then tree order) index of each stored tree
+        self.tree_order = tree_order
+        self._prepare()
+
+    def _prepare(self):
+        n_members = len(self.member_link)
+        self._member_matrix = np.zeros((len(self.roots), n_members))
+        self._member_matrix[np.arange(len(self.roots)), self.tree_member] = self.tree_weight
+        self._sigmoid = self.member_link == LINK_SIGMOID
+        self._levels = [int(n) for n in self.active]
+        # Single-row buffers: predict_one allocates no arrays of its own
+        self._x_ext = np.empty(4 * self.n_features)
+        self._x_blocks = self._x_ext.reshape(4, self.n_features)
+        self._nan = np.empty(self.n_features, dtype=bool)
+        self._x32 = np.empty(self.n_features, dtype=np.float32)
+        self._node = np.empty(len(self.roots), dtype=np.int64)
+        self._level_nodes = [self._node[:n] for n in self._levels]
+        self._leaf = np.empty(len(self.roots))
+        self._raw = np.empty(n_members)
+        self._tmp = np.empty(n_members)
+
+    @classmethod
+    def from_models(cls, models, n_features, binner=None):
+        return cls.from_member_trees([_member_trees(model) for model in models], n_features, binner)
+
+    @classmethod
+    def from_member_trees(cls, members, n_features, binner=None):
+        """Build from per-member (trees, link, base margin, tree weight, reads float32) tuples."""
+        trees, tree_member, tree_weight, links, bases, cast32 = [], [], [], [], [], []
+        for m, (member_trees, link, base, weight, reads32) in enumerate(members):
+            trees.extend(member_trees)
+            tree_member.extend([m] * len(member_trees))
+            tree_weight.extend([weight] * len(member_trees))
+            cast32.extend([reads32] * len(member_trees))
+            links.append(link)
+            bases.append(base)
+
+        # Deepest trees first, so level d only touches the first active[d] trees
+        depths = np.array([_tree_depth(t[2], t[3]) for t in trees])
+        order = np.argsort(-depths, kind='stable')
+        max_depth = int(depths.max()) if len(depths) else 0
+        active = np.array([(depths > d).sum() for d in range(max_depth)], dtype=np.int64)
+
+        feature, threshold, left_child, value, roots = [], [], [], [], []
+        offset = 0
+        for t in order:
+            f, thr, left, right, val, missing_right = trees[t]
+            keep = _sibling_order(left, right)
+            n = len(keep)
+            new_id = np.zeros(len(f), dtype=np.int64)
+            new_id[keep] = np.arange(offset, offset + n)
+            f, thr, left, val, missing_right = f[keep], thr[keep], left[keep], val[keep], missing_right[keep]
+            leaf = left < 0
+            # Input block: float32 copies after float64, NaN-as-+inf after NaN-as--inf
+            block = 2 * cast32[t] + missing_right
+            feature.append(np.where(leaf, 0, f + block * n_features))
+            # Right child is left + 1; leaves loop back onto themselves
+            threshold.append(np.where(leaf, np.inf, thr))
+            left_child.append(np.where(leaf, np.arange(offset, offset + n), new_id[left]))
+            value.append(val)
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.int64),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left_child).astype(np.int64),
+            value=np.concatenate(value),
+            roots=np.array(roots, dtype=np.int64),
+            active=active,
+            tree_member=np.array(tree_member, dtype=np.int64)[order],
+            tree_weight=np.array(tree_weight, dtype=np.float64)[order],
+            member_link=np.array(links, dtype=np.int64),
+            member_base=np.array(bases, dtype=np.float64),
+            n_features=n_features,
+            binner_edges=None if binner is None else binner.edges,
+            tree_order=order,
+        )
+
+    def _bin(self, X):
+        return (self.binner_edges[None, :, :] <= X[:, :, None]).sum(axis=2).astype(np.float64)
+
+    def member_proba(self, X, chunk_rows=256):
+        """(n_rows, n_members) up-probabilities, evaluated chunk_rows rows at a time."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        out = np.empty((len(X), len(self.member_link)))
+        for start in range(0, len(X), chunk_rows):
+            out[start:start + chunk_rows] = self._member_raw(X[start:start + chunk_rows])
+        return np.where(self._sigmoid, _sigmoid(out), out)
+
+    def _leaves(self, X):
+        """(n_rows, n_trees) leaf ids reached by each row, in stored tree order."""
+        if self.binner_edges is not None:
+            X = self._bin(X)
+        n_rows, width = len(X), 4 * self.n_features
+        x_ext = np.empty((n_rows, 4, self.n_features))
+        x_ext[:, :2] = X[:, None, :]
+        x_ext[:, 2:] = X.astype(np.float32)[:, None, :]
+        np.copyto(x_ext, _NAN_FILL[:, None], where=np.isnan(x_ext))
+        flat = x_ext.ravel()
+        row_base = (np.arange(n_rows) * width)[:, None]
+
+        node = np.tile(self.roots, (n_rows, 1))
+        for n in self._levels:
+            nd = node[:, :n]
+            node[:, :n] = self.left[nd] + (flat[self.feature[nd] + row_base] > self.threshold[nd])
+        return node
+
+    def _member_raw(self, X):
+        return self.value[self._leaves(X)] @ self._member_matrix + self.member_base
+
+    def leaf_values(self, X, chunk_rows=256):
+        """(n_rows, n_trees) raw leaf value of every tree, in original tree order."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        out = np.empty((len(X), len(self.roots)))
+        for start in range(0, len(X), chunk_rows):
+            values = self.value[self._leaves(X[start:start + chunk_rows])]
+            out[start:start + chunk_rows, self.tree_order] = values
+        return out
+
+    def predict_proba(self, X):
+        """Ensemble up-probability per row (mean over members)."""
+        return self.member_proba(X).mean(axis=1)
+
+    def predict_one(self, x):
+        """Ensemble up-probability for a single feature vector."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.binner_edges is not None:
+            x = self._bin(x[None, :])[0]
+        blocks = self._x_blocks
+        blocks[:2] = x
+        np.copyto(self._x32, x, casting='same_kind')
+        blocks[2:] = self._x32
+        nan = np.isnan(x, out=self._nan)
+        if nan.any():
+            blocks[:, nan] = _NAN_FILL[:, None]
+        x_ext = self._x_ext
+
+        node = self._node
+        np.copyto(node, self.roots)
+        feature, threshold, left, add = self.feature, self.threshold, self.left, np.add
+        # One preallocated view per level; the gathers copy, so writing into nd is safe
+        for nd in self._level_nodes:
+            add(left[nd], x_ext[feature[nd]] > threshold[nd], out=nd)
+
+        raw, tmp = self._raw, self._tmp
+        self.value.take(node, out=self._leaf, mode='clip')
+        np.dot(self._leaf, self._member_matrix, out=raw)
+        raw += self.member_base
+        np.negative(raw, out=tmp)
+        np.exp(tmp, out=tmp)
+        tmp += 1.0
+        np.reciprocal(tmp, out=tmp)
+        np.copyto(raw, tmp, where=self._sigmoid)
+        return float(raw.mean())
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in self.ARRAYS if getattr(self, name) is not None}
+        np.savez(path, n_features=self.n_features, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS if name in data.files}
+            return cls(n_features=int(data['n_features']), **arrays)
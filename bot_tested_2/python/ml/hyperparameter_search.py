@@ -0,0 +1,292 @@
+"""
+Budgeted hyperparameter search for the ensemble (successive halving / Hyperband).
+
+Each candidate is one set of MEMBER_PARAMS overrides for all three members.
+A bracket starts many random candidates on a short, recent time slice with
+two walk-forward folds and promotes the best 1/eta by mean ensemble AUC to a
+longer slice with more folds, until the survivors run on the full data.
+Boosters early-stop on AUC against the tail of each fold's training rows,
+and the rounds they stop at become the tuned number of rounds. (config,
+fold) tasks run in a process pool over shared-memory X / y. A wall-clock
+budget is the main knob: rungs that would overrun it are not started, and
+the best fully evaluated candidate so far is returned.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+from shared_arrays import SHARED, share_array, attach_shared, release
+from train_model import OptimizedModelTrainer, ENSEMBLE_MEMBERS, MEMBER_PARAMS
+
+
+# Boosting rounds are capped here and chosen by early stopping
+MAX_ROUNDS = 1000
+
+SEARCH_SPACE = {
+    'lightgbm': {
+        'num_leaves': [15, 31, 63, 127],
+        'learning_rate': ('log', 0.01, 0.2),
+        'feature_fraction': ('uniform', 0.5, 1.0),
+        'bagging_fraction': ('uniform', 0.5, 1.0),
+        'bagging_freq': [0, 1],
+        'min_data_in_leaf': [20, 50, 100, 200],
+        'lambda_l2': [0.0, 1.0, 10.0],
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 5, 6, 8],
+        'learning_rate': ('log', 0.01, 0.2),
+        'subsample': ('uniform', 0.5, 1.0),
+        'colsample_bytree': ('uniform', 0.5, 1.0),
+        'min_child_weight': [1, 5, 10],
+        'reg_lambda': [0.0, 1.0, 10.0],
+    },
+    'random_forest': {
+        'max_depth': [6, 10, 14, None],
+        'min_samples_leaf': [20, 50, 100],
+        'max_features': ['sqrt', 0.3, 0.5],
+    },
+}
+
+
+def sample_config(rng, space=SEARCH_SPACE):
+    """Random MEMBER_PARAMS overrides for every member."""
+    config = {}
+    for member, params in space.items():
+        config[member] = {}
+        for key, choice in params.items():
+            if isinstance(choice, tuple):
+                kind, lo, hi = choice
+                value = np.exp(rng.uniform(np.log(lo), np.log(hi))) if kind == 'log' else rng.uniform(lo, hi)
+                config[member][key] = float(value)
+            else:
+                config[member][key] = choice[rng.integers(len(choice))]
+    return config
+
+
+def _fit_member(name, params, X_fit, y_fit, X_val, y_val, n_threads, early_stopping_rounds):
+    """Train one member with AUC early stopping; returns (model, rounds used or None)."""
+    params = dict(MEMBER_PARAMS[name], **params)
+    if name == 'lightgbm':
+        params.pop('num_boost_round')
+        params['num_threads'] = n_threads
+        model = lgb.train(params, lgb.Dataset(X_fit, label=y_fit), num_boost_round=MAX_ROUNDS,
+                          valid_sets=[lgb.Dataset(X_val, label=y_val)],
+                          callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)])
+        return model, model.best_iteration
+    if name == 'xgboost':
+        params['n_estimators'] = MAX_ROUNDS
+        model = xgb.XGBClassifier(**params, n_jobs=n_threads, early_stopping_rounds=early_stopping_rounds)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        return model, model.best_iteration + 1
+    model = RandomForestClassifier(**params, n_jobs=n_threads)
+    model.fit(X_fit, y_fit)
+    return model, None
+
+
+def _config_fold_task(config_id, config, train_start, train_stop, test_stop, n_threads,
+                      early_stopping_rounds, valid_fraction):
+    """Train the ensemble for one config on one fold; returns (config_id, auc, rounds)."""
+    X = SHARED['X'][1]
+    y = SHARED['y'][1]
+    valid_start = train_stop - max(1, int((train_stop - train_start) * valid_fraction))
+    X_fit, y_fit = X[train_start:valid_start], y[train_start:valid_start]
+    X_val, y_val = X[valid_start:train_stop], y[valid_start:train_stop]
+    X_test, y_test = X[train_stop:test_stop], y[train_stop:test_stop]
+
+    probas, rounds = [], {}
+    for name in ENSEMBLE_MEMBERS:
+        model, used = _fit_member(name, config[name], X_fit, y_fit, X_val, y_val,
+                                  n_threads, early_stopping_rounds)
+        probas.append(OptimizedModelTrainer._predict_member(model, X_test))
+        if used is not None:
+            rounds[name] = used
+    try:
+        auc = roc_auc_score(y_test, np.mean(probas, axis=0))
+    except ValueError:
+        auc = 0.5
+    return config_id, auc, rounds
+
+
+class HyperbandSearch:
+    """
+    Successive halving brackets (Hyperband when hyperband=True) within a
+    wall-clock budget. Rung r of a bracket trains on the most recent
+    eta**(r - last) share of rows with min_folds + r walk-forward folds
+    (capped at max_folds).
+    """
+
+    def __init__(self, time_budget=3600, eta=3, n_rungs=4, min_folds=2, max_folds=5,
+                 hyperband=True, n_workers=1, early_stopping_rounds=30, valid_fraction=0.15,
+                 random_state=42):
+        self.time_budget = time_budget
+        self.eta = eta
+        self.n_rungs = n_rungs
+        self.min_folds = min_folds
+        self.max_folds = max_folds
+        self.hyperband = hyperband
+        self.n_workers = n_workers
+        self.early_stopping_rounds = early_stopping_rounds
+        self.valid_fraction = valid_fraction
+        self.rng = np.random.default_rng(random_state)
+        self.history = []
+        self.best = None
+        self._next_id = 0
+
+    def _fold_tasks(self, n_rows, rung):
+        """(train_start, train_stop, test_stop) of each fold at this rung."""
+        fraction = float(self.eta) ** (rung - (self.n_rungs - 1))
+        start = n_rows - max(int(n_rows * fraction), 1)
+        n_folds = min(self.min_folds + rung, self.max_folds)
+        edges = np.linspace(start, n_rows, n_folds + 2).astype(int)
+        return [(start, edges[k + 1], edges[k + 2]) for k in range(n_folds)]
+
+    def _run_rung(self, configs, folds, pool, n_threads, deadline):
+        """Mean AUC and median rounds per config, or None if the deadline hit first."""
+        args = [(cid, config, *fold, n_threads, self.early_stopping_rounds, self.valid_fraction)
+                for cid, config in configs.items() for fold in folds]
+        if pool is None:
+            results = []
+            for task in args:
+                if time.monotonic() > deadline:
+                    return None
+                results.append(_config_fold_task(*task))
+        else:
+            futures = [pool.submit(_config_fold_task, *task) for task in args]
+            results = []
+            for future in as_completed(futures):
+                results.append(future.result())
+                if time.monotonic() > deadline:
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+
+        scores = {cid: [] for cid in configs}
+        rounds = {cid: {} for cid in configs}
+        for cid, auc, used in results:
+            scores[cid].append(auc)
+            for name, value in used.items():
+                rounds[cid].setdefault(name, []).append(value)
+        return {cid: (float(np.mean(scores[cid])),
+                      {name: int(np.median(v)) for name, v in rounds[cid].items()})
+                for cid in configs}
+
+    def _bracket(self, X_len, first_rung, pool, n_threads, deadline, start_time):
+        n_configs = self.eta ** (self.n_rungs - 1 - first_rung)
+        configs = {}
+        for _ in range(n_configs):
+            cid = self._next_id
+            self._next_id += 1
+            # The hard-coded defaults always take part in the first bracket
+            configs[cid] = {m: {} for m in ENSEMBLE_MEMBERS} if cid == 0 else sample_config(self.rng)
+
+        last_elapsed, last_cost = None, None
+        for rung in range(first_rung, self.n_rungs):
+            folds = self._fold_tasks(X_len, rung)
+            cost = len(configs) * sum(stop - start for start, _, stop in folds)
+            remaining = deadline - time.monotonic()
+            if last_elapsed is not None and last_elapsed * cost / last_cost > remaining:
+                print(f"  Rung {rung}: skipped, needs ~{last_elapsed * cost / last_cost:.0f}s "
+                      f"with {remaining:.0f}s left")
+                return False
+
+            rung_start = time.monotonic()
+            results = self._run_rung(configs, folds, pool, n_threads, deadline)
+            if results is None:
+                print(f"  Rung {rung}: stopped at the time budget")
+                return False
+            last_elapsed, last_cost = time.monotonic() - rung_start, cost
+
+            ranked = sorted(results, key=lambda cid: -results[cid][0])
+            for cid in ranked:
+                self.history.append({'config_id': cid, 'rung': rung, 'auc': results[cid][0],
+                                     'rounds': results[cid][1], 'config': configs[cid]})
+            print(f"  Rung {rung}: {len(configs)} configs x {len(folds)} folds on "
+                  f"{X_len - folds[0][0]} rows, best AUC {results[ranked[0]][0]:.4f} "
+                  f"({last_elapsed:.0f}s, {time.monotonic() - start_time:.0f}s total)")
+
+            if rung == self.n_rungs - 1:
+                top = ranked[0]
+                if self.best is None or results[top][0] > self.best['auc']:
+                    self.best = {'config_id': top, 'auc': results[top][0],
+                                 'rounds': results[top][1], 'config': configs[top]}
+            keep = max(1, len(configs) // self.eta)
+            configs = {cid: configs[cid] for cid in ranked[:keep]}
+        return True
+
+    def run(self, X, y):
+        """Search until the brackets or the time budget run out; returns best member params."""
+        start_time = time.monotonic()
+        deadline = start_time + self.time_budget
+        n_threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+        first_rungs = range(self.n_rungs) if self.hyperband else [0]
+
+        pool, shms = None, []
+        if self.n_workers > 1:
+            X_shm, X_spec = share_array(np.ascontiguousarray(X))
+            y_shm, y_spec = share_array(np.ascontiguousarray(y))
+            shms = [X_shm, y_shm]
+            pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=attach_shared,
+                                       initargs=({'X': X_spec, 'y': y_spec},))
+        else:
+            SHARED['X'], SHARED['y'] = (None, X), (None, y)
+        try:
+            for first_rung in first_rungs:
+                print(f"\nBracket starting at rung {first_rung} "
+                      f"({self.eta ** (self.n_rungs - 1 - first_rung)} configs)")
+                if not self._bracket(len(y), first_rung, pool, n_threads, deadline, start_time):
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            release(shms)
+            if pool is None:
+                SHARED.pop('X', None)
+                SHARED.pop('y', None)
+
+        if self.best is None:
+            print("\nNo candidate reached the full data within the budget; keeping defaults")
+            return {}
+        return self.best_params()
+
+    def best_params(self):
+        """Best config as MEMBER_PARAMS overrides, with early-stopped round counts."""
+        params = {member: dict(values) for member, values in self.best['config'].items()}
+        rounds = self.best['rounds']
+        if 'lightgbm' in rounds:
+            params['lightgbm']['num_boost_round'] = max(rounds['lightgbm'], 1)
+        if 'xgboost' in rounds:
+            params['xgboost']['n_estimators'] = max(rounds['xgboost'], 1)
+        print(f"\n✓ Best config {self.best['config_id']}: AUC {self.best['auc']:.4f}")
+        return params
+
+
+def main():
+    print("=" * 80)
+    print("HYPERPARAMETER SEARCH")
+    print("=" * 80)
+
+    trainer = OptimizedModelTrainer()
+    df = trainer.load_features()
+    X, y = trainer.prepare_data(df)
+
+    search = HyperbandSearch(time_budget=3600, n_workers=os.cpu_count() or 1)
+    trainer.member_params = search.run(X, y)
+    for member, params in trainer.member_params.items():
+        print(f"  {member}: {params}")
+
+    trainer.walk_forward_validation(X, y)
+    trainer.train_final_model(X, y)
+    trainer.save_model()
+    # Live consumers load the artifact, so it must carry the tuned ensemble too
+    trainer.export_artifact()
+
+
+if __name__ == "__main__":
+    main()
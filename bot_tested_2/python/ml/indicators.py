@@ -0,0 +1,208 @@
+"""
+Native technical indicator kernels (EMA, RSI, MACD, Bollinger Bands).
+
+Batch functions take a 1-D array of prices and return NumPy arrays with the
+same NaN warm-up as the `ta` package. Streaming classes produce the same
+values one tick at a time in O(1) for the live signal path (they need only
+NumPy; scipy is imported by the batch kernels).
+"""
+
+import numpy as np
+
+
+def _as_float_array(values):
+    x = np.asarray(values, dtype=np.float64)
+    if x.ndim != 1:
+        raise ValueError(f"Expected a 1-D series, got shape {x.shape}")
+    return x
+
+
+# ==================== BATCH KERNELS ====================
+
+def ema(values, span=None, alpha=None, min_periods=None):
+    """
+    Exponential moving average equal to pandas `ewm(adjust=False).mean()`.
+
+    Leading NaNs are skipped (the recursion is seeded with the first valid
+    value); NaNs after that are rejected instead of being propagated silently.
+    """
+    x = _as_float_array(values)
+    if alpha is None:
+        if span is None:
+            raise ValueError("Either span or alpha must be given")
+        alpha = 2.0 / (span + 1.0)
+        if min_periods is None:
+            min_periods = span
+    if min_periods is None:
+        min_periods = 1
+
+    out = np.full(len(x), np.nan)
+    finite = np.isfinite(x)
+    if not finite.any():
+        return out
+
+    start = int(np.argmax(finite))
+    if not finite[start:].all():
+        raise ValueError("ema() does not support NaN/inf after the first valid value")
+
+    from scipy.signal import lfilter
+    tail = x[start:]
+    decay = 1.0 - alpha
+    out[start:], _ = lfilter([alpha], [1.0, -decay], tail, zi=[decay * tail[0]])
+    out[start:start + max(min_periods - 1, 0)] = np.nan
+    return out
+
+
+def rsi(values, window=14):
+    """Wilder RSI, identical to `ta.momentum.RSIIndicator(...).rsi()`."""
+    x = _as_float_array(values)
+    diff = np.empty_like(x)
+    diff[0] = 0.0
+    diff[1:] = np.diff(x)
+
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+
+    ema_up = ema(up, alpha=1.0 / window, min_periods=window)
+    ema_down = ema(down, alpha=1.0 / window, min_periods=window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = ema_up / ema_down
+        out = np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    return out
+
+
+def macd(values, window_slow=26, window_fast=12, window_sign=9):
+    """MACD line, signal and histogram, identical to `ta.trend.MACD`."""
+    x = _as_float_array(values)
+    line = ema(x, span=window_fast) - ema(x, span=window_slow)
+    signal = ema(line, span=window_sign)
+    return line, signal, line - signal
+
+
+def bollinger(values, window=20, window_dev=2):
+    """Bollinger middle/upper/lower bands (population std, as in `ta`)."""
+    x = _as_float_array(values)
+    mavg = np.full(len(x), np.nan)
+    mstd = np.full(len(x), np.nan)
+    if len(x) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(x, window)
+        mavg[window - 1:] = windows.mean(axis=1)
+        mstd[window - 1:] = windows.std(axis=1)
+    return mavg, mavg + window_dev * mstd, mavg - window_dev * mstd
+
+
+# ==================== STREAMING KERNELS ====================
+
+class StreamingEMA:
+    """O(1) EMA update matching `ema()` value for value."""
+
+    def __init__(self, span=None, alpha=None, min_periods=None):
+        if alpha is None:
+            if span is None:
+                raise ValueError("Either span or alpha must be given")
+            alpha = 2.0 / (span + 1.0)
+            if min_periods is None:
+                min_periods = span
+        self.alpha = alpha
+        self.min_periods = min_periods or 1
+        self.count = 0
+        self.mean = np.nan
+
+    def update(self, x):
+        if self.count == 0:
+            self.mean = x
+        else:
+            self.mean += self.alpha * (x - self.mean)
+        self.count += 1
+        return self.value
+
+    @property
+    def ready(self):
+        return self.count >= self.min_periods
+
+    @property
+    def value(self):
+        return self.mean if self.ready else np.nan
+
+
+class StreamingRSI:
+    """O(1) Wilder RSI update matching `rsi()`."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self._prev = None
+        self._up = StreamingEMA(alpha=1.0 / window, min_periods=window)
+        self._down = StreamingEMA(alpha=1.0 / window, min_periods=window)
+
+    def update(self, price):
+        diff = 0.0 if self._prev is None else price - self._prev
+        self._prev = price
+        self._up.update(diff if diff > 0 else 0.0)
+        self._down.update(-diff if diff < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self):
+        if not self._down.ready:
+            return np.nan
+        if self._down.mean == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self._up.mean / self._down.mean)
+
+
+class StreamingMACD:
+    """O(1) MACD update matching `macd()`; returns (line, signal, diff)."""
+
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self._fast = StreamingEMA(span=window_fast)
+        self._slow = StreamingEMA(span=window_slow)
+        self._signal = StreamingEMA(span=window_sign)
+        self.line = np.nan
+        self.signal = np.nan
+        self.diff = np.nan
+
+    def update(self, price):
+        fast = self._fast.update(price)
+        slow = self._slow.update(price)
+        self.line = fast - slow
+        if np.isfinite(self.line):
+            self.signal = self._signal.update(self.line)
+        self.diff = self.line - self.signal
+        return self.line, self.signal, self.diff
+
+
+class StreamingBollinger:
+    """O(1) Bollinger update over a fixed window; returns (mavg, upper, lower)."""
+
+    def __init__(self, window=20, window_dev=2):
+        self.window = window
+        self.window_dev = window_dev
+        self._buffer = np.zeros(window)
+        self._pos = 0
+        self.count = 0
+        # Sums are kept relative to the first price to limit cancellation
+        self._shift = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def update(self, price):
+        if self._shift is None:
+            self._shift = price
+        x = price - self._shift
+        if self.count >= self.window:
+            old = self._buffer[self._pos]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._sum += x
+        self._sumsq += x * x
+        self.count += 1
+
+        if self.count < self.window:
+            return np.nan, np.nan, np.nan
+        mean = self._sum / self.window
+        std = np.sqrt(max(self._sumsq / self.window - mean * mean, 0.0))
+        mavg = mean + self._shift
+        return mavg, mavg + self.window_dev * std, mavg - self.window_dev * std
@@ -0,0 +1,168 @@
+"""
+Multi-horizon target and label builder.
+
+Forward returns for every horizon are computed from the mid-price array with
+plain slices (no copies of the feature frame), and every label scheme is
+applied to the resulting matrix in one vectorized pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_HORIZONS = (5, 10, 20, 50, 100)
+
+# name -> (kind, parameter)
+#   percentile: binary, 1 if return > that percentile of returns (create_target)
+#   std:        three-class, +/-1 beyond param * std of returns (trading-bot)
+#   fixed:      three-class, +/-1 beyond a fixed return threshold (bot_tested_1)
+DEFAULT_SCHEMES = {
+    'up': ('percentile', 0.5),
+    'dir3': ('std', 0.3),
+    'dir3_fixed': ('fixed', 0.0001),
+}
+
+# Rows without enough future data to be labelled
+LABEL_MISSING = np.int8(-128)
+
+
+def forward_returns(mid, horizons=DEFAULT_HORIZONS, dtype=np.float64):
+    """(n, len(horizons)) matrix of (mid[t+h] - mid[t]) / mid[t], NaN at the tail."""
+    mid = np.asarray(mid, dtype=np.float64)
+    n = len(mid)
+    out = np.full((n, len(horizons)), np.nan, dtype=dtype)
+    for j, h in enumerate(horizons):
+        if h <= 0:
+            raise ValueError(f"Horizons must be positive, got {h}")
+        if h < n:
+            out[:n - h, j] = (mid[h:] - mid[:-h]) / mid[:-h]
+    return out
+
+
+def _thresholds(returns, kind, param):
+    """Per-horizon (lower, upper) thresholds for one scheme."""
+    if kind == 'percentile':
+        upper = np.nanquantile(returns, param, axis=0)
+        return np.full_like(upper, -np.inf), upper
+    if kind == 'std':
+        upper = np.nanstd(returns, axis=0, ddof=1) * param
+        return -upper, upper
+    if kind == 'fixed':
+        upper = np.full(returns.shape[1], float(param))
+        return -upper, upper
+    raise ValueError(f"Unknown label scheme kind: {kind!r}")
+
+
+def build_labels(mid, horizons=DEFAULT_HORIZONS, schemes=None, index=None):
+    """
+    Build an int8 label matrix for every (scheme, horizon) pair.
+
+    Returns a DataFrame with columns like 'up_20' or 'dir3_50' aligned to
+    `index` (the feature frame index). Binary schemes use {0, 1}, three-class
+    schemes use {-1, 0, 1}; rows without future data hold LABEL_MISSING.
+    """
+    schemes = DEFAULT_SCHEMES if schemes is None else schemes
+    returns = forward_returns(mid, horizons)
+    valid = ~np.isnan(returns)
+
+    blocks = []
+    columns = []
+    for name, (kind, param) in schemes.items():
+        lower, upper = _thresholds(returns, kind, param)
+        with np.errstate(invalid='ignore'):
+            block = (returns > upper).astype(np.int8) - (returns < lower).astype(np.int8)
+        block[~valid] = LABEL_MISSING
+        blocks.append(block)
+        columns.extend(f'{name}_{h}' for h in horizons)
+
+    matrix = np.concatenate(blocks, axis=1) if blocks else np.empty((len(returns), 0), np.int8)
+    return pd.DataFrame(matrix, columns=columns, index=index)
+
+
+# ==================== TRIPLE BARRIER ====================
+
+def _sliding_extrema(x, window):
+    """
+    Max and min of x[i:i + window] for every i (van Herk / Gil-Werman).
+
+    Block-wise prefix and suffix scans give every window in O(n) total,
+    independent of the window width. Windows running past the end are
+    truncated.
+    """
+    n = len(x)
+    m = -(-n // window)
+    results = []
+    for fill, accumulate in ((-np.inf, np.maximum), (np.inf, np.minimum)):
+        padded = np.full(m * window + window, fill)
+        padded[:n] = x
+        blocks = padded.reshape(-1, window)
+        prefix = accumulate.accumulate(blocks, axis=1).ravel()
+        suffix = accumulate.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        results.append(accumulate(suffix[:n], prefix[window - 1:window - 1 + n]))
+    return results[0], results[1]
+
+
+def triple_barrier_labels(mid, horizon, profit_take, stop_loss, timeout_label='zero'):
+    """
+    Label each row by which barrier the mid price touches first.
+
+    `profit_take` and `stop_loss` are positive return distances (scalars or
+    per-row arrays); the vertical barrier is `horizon` ticks ahead. Returns
+    (labels, touch_offset, touch_return): labels are +1 (profit-take), -1
+    (stop-loss) or, on time-out, 0 / the sign of the horizon return when
+    timeout_label='sign'. Rows without `horizon` ticks of future data get
+    LABEL_MISSING, offset -1 and NaN return; with 'sign', so does the label
+    of a time-out whose horizon return is NaN.
+
+    Rows whose forward extrema never reach either barrier are resolved up
+    front from sliding-window extrema; the rest are scanned one offset at a
+    time over the shrinking set of unresolved rows.
+    """
+    if timeout_label not in ('zero', 'sign'):
+        raise ValueError(f"timeout_label must be 'zero' or 'sign', got {timeout_label!r}")
+    mid = np.asarray(mid, dtype=np.float64)
+    n = len(mid)
+    n_valid = max(n - horizon, 0)
+    upper = np.broadcast_to(np.asarray(profit_take, dtype=np.float64), (n,))
+    lower = np.broadcast_to(np.asarray(stop_loss, dtype=np.float64), (n,))
+
+    labels = np.full(n, LABEL_MISSING, dtype=np.int8)
+    offset = np.full(n, -1, dtype=np.int32)
+    touch_return = np.full(n, np.nan)
+    if n_valid == 0:
+        return labels, offset, touch_return
+
+    rows = np.arange(n_valid)
+    base = mid[:n_valid]
+    labels[:n_valid] = 0
+    offset[:n_valid] = horizon
+    touch_return[:n_valid] = mid[horizon:] / base - 1.0
+
+    # Forward window of row t is mid[t + 1 : t + horizon + 1]
+    fwd_max, fwd_min = _sliding_extrema(mid[1:], horizon)
+    reaches = ((fwd_max[:n_valid] / base - 1.0 >= upper[:n_valid]) |
+               (fwd_min[:n_valid] / base - 1.0 <= -lower[:n_valid]))
+    active = rows[reaches]
+
+    for k in range(1, horizon + 1):
+        if active.size == 0:
+            break
+        r = mid[active + k] / mid[active] - 1.0
+        up = r >= upper[active]
+        hit = up | (r <= -lower[active])
+        if hit.any():
+            done = active[hit]
+            labels[done] = np.where(up[hit], 1, -1)
+            offset[done] = k
+            touch_return[done] = r[hit]
+            active = active[~hit]
+
+    if timeout_label == 'sign':
+        timed_out = rows[offset[:n_valid] == horizon]
+        timed_out = timed_out[labels[timed_out] == 0]
+        # A NaN mid at the vertical barrier has no sign: the row cannot be labelled
+        horizon_return = touch_return[timed_out]
+        labels[timed_out] = np.where(np.isnan(horizon_return), LABEL_MISSING,
+                                     np.sign(horizon_return)).astype(np.int8)
+
+    return labels, offset, touch_return
@@ -0,0 +1,471 @@
+"""
+Online feature engine: the training features one tick at a time.
+
+Every column of ComprehensiveFeatureEngineer is produced by a stream group
+(one rolling window, one indicator, one streaming kernel) whose per-tick
+update matches the batch pipeline value for value once its window is full.
+OnlineFeatureEngine runs only the groups a model needs and writes their
+outputs straight into a preallocated vector in the model's column order.
+
+A tick is a dict of raw inputs: the trade (price, quantity, side) with the
+prevailing quote (bid / ask price and volume) and the int64 ns timestamp,
+i.e. one row of the trades-quotes merge used for training (a bar tick also
+carries the bar's buy_volume / sell_volume). The 'book' and 'trade' groups
+store derived values (mid, spread, signed flow) in the tick for the groups
+that require them; 'price_windows' stores the one price ring buffer that
+the volatility, z-score and lag groups all read. Only NumPy is imported, so
+the live process starts fast.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from indicators import StreamingRSI, StreamingMACD
+from rolling_quantile import RollingQuantile
+from trend_features import _Window, StreamingOLS, StreamingVarianceRatio, StreamingSignEntropy
+from spectral_features import StreamingFracDiff, StreamingLaggedCorrelation
+
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+
+# Trade-price windows served by the shared price ring (volatility, z-score, lags)
+PRICE_WINDOWS = (5, 10, 20, 50, 100)
+
+QUOTE_INPUTS = ('timestamp', 'bid_price', 'ask_price', 'bid_volume', 'ask_volume')
+TRADE_INPUTS = ('price', 'quantity', 'side')
+
+
+# ==================== STREAMING HELPERS ====================
+
+class _Rolling:
+    """Running sum / mean / sample std over a fixed window (NaN until full)."""
+
+    def __init__(self, window):
+        self._w = _Window(window)
+
+    def push(self, x):
+        self._w.push(x)
+
+    def sum(self):
+        w = self._w
+        return w.sum + w.count * w.shift if w.full else np.nan
+
+    def mean(self):
+        w = self._w
+        return w.shift + w.sum / w.count if w.full else np.nan
+
+    def std(self):
+        w = self._w
+        # pandas rolling std uses ddof=1
+        return np.sqrt(w.var() * w.count / (w.count - 1)) if w.full and w.count > 1 else np.nan
+
+
+class _PriceWindows:
+    """
+    One preallocated ring of recent trade prices shared by every price
+    window. Each push updates a running sum / sum of squares per window
+    (the value leaving window w is read w slots back), so mean, std and
+    the price w ticks ago are O(1) for all windows from a single buffer.
+    """
+
+    RESYNC_EVERY = _Window.RESYNC_EVERY
+
+    def __init__(self, windows=PRICE_WINDOWS):
+        self.windows = tuple(windows)
+        self.capacity = max(self.windows) + 1
+        self.buffer = np.zeros(self.capacity)
+        self.pos = 0
+        self.count = 0
+        self.shift = None
+        self.sums = [0.0] * len(self.windows)
+        self.sumsqs = [0.0] * len(self.windows)
+        self.slot = {w: k for k, w in enumerate(self.windows)}
+        self._slots = list(enumerate(self.windows))
+
+    def push(self, x):
+        if self.shift is None:
+            # Sums run on prices minus the first one, which keeps the variance well conditioned
+            self.shift = x
+        shift, pos, sums, sumsqs = self.shift, self.pos, self.sums, self.sumsqs
+        # item() gives Python floats; negative positions wrap around the ring
+        item = self.buffer.item
+        d = x - shift
+        dd = d * d
+        for k, w in self._slots:
+            old = item(pos - w) - shift if self.count >= w else 0.0
+            sums[k] += d - old
+            sumsqs[k] += dd - old * old
+        self.buffer[pos] = x
+        self.pos = pos + 1 if pos + 1 < self.capacity else 0
+        self.count += 1
+        if self.count % self.RESYNC_EVERY == 0:
+            self.resync()
+
+    def resync(self):
+        """Re-sum every window from the buffer to stop rounding drift."""
+        for k, w in self._slots:
+            n = min(w, self.count)
+            values = np.take(self.buffer, np.arange(self.pos - n, self.pos), mode='wrap') - self.shift
+            self.sums[k] = float(values.sum())
+            self.sumsqs[k] = float(values @ values)
+
+    def mean(self, window):
+        if self.count < window:
+            return np.nan
+        return self.shift + self.sums[self.slot[window]] / window
+
+    def std(self, window):
+        """Sample std (ddof=1, as pandas rolling std)."""
+        if self.count < window:
+            return np.nan
+        k = self.slot[window]
+        mean = self.sums[k] / window
+        return np.sqrt(max(self.sumsqs[k] / window - mean * mean, 0.0) * window / (window - 1))
+
+    def ago(self, window):
+        """Trade price `window` ticks before the latest one."""
+        if self.count <= window:
+            return np.nan
+        return self.buffer.item(self.pos - 1 - window)
+
+
+class _RollingExtreme:
+    """O(1) amortised rolling max (or min) with a monotonic deque."""
+
+    def __init__(self, window, largest=True):
+        self.window = window
+        self.sign = 1.0 if largest else -1.0
+        self._queue = deque()
+        self._seen = 0
+
+    def update(self, x):
+        key = self.sign * x
+        queue = self._queue
+        while queue and queue[-1][1] <= key:
+            queue.pop()
+        queue.append((self._seen, key))
+        if queue[0][0] <= self._seen - self.window:
+            queue.popleft()
+        self._seen += 1
+        return self.sign * queue[0][1] if self._seen >= self.window else np.nan
+
+
+# ==================== STREAM GROUPS ====================
+# stream() returns update(tick) -> tuple of values in `columns` order.
+
+class StreamGroup:
+    def __init__(self, name, columns, stream, inputs=(), requires=()):
+        self.name = name
+        self.columns = list(columns)
+        self.stream = stream
+        self.inputs = tuple(inputs)
+        self.requires = tuple(requires)
+
+
+def _book_stream():
+    state = {'log_mid': None}
+
+    def update(t):
+        bid, ask, bid_v, ask_v = t['bid_price'], t['ask_price'], t['bid_volume'], t['ask_volume']
+        mid = (bid + ask) / 2
+        spread = ask - bid
+        depth = bid_v + ask_v
+        obi = (bid_v - ask_v) / depth if depth else np.nan
+        log_mid = np.log(mid)
+        prev = state['log_mid']
+        t.update(mid_price=mid, spread=spread, obi=obi, book_depth=depth, log_mid=log_mid,
+                 bid_ask_ratio=bid_v / (ask_v + 1e-10),
+                 mid_return=0.0 if prev is None or not np.isfinite(log_mid - prev) else log_mid - prev)
+        state['log_mid'] = log_mid
+        return (bid_v, ask_v, mid, spread, spread / mid * 10000, obi, depth, t['bid_ask_ratio'],
+                int(abs(obi) > 0.5), (t['price'] - bid) / (spread + 1e-10), (t['price'] - mid) / mid)
+    return update
+
+
+def _trade_stream():
+    def update(t):
+        buy = int(t['side'] == 'buy')
+        sell = int(t['side'] == 'sell')
+        if 'buy_volume' in t:
+            # Bar ticks: flow is the bar's buy / sell split, not its majority side
+            buy_qty, sell_qty = t['buy_volume'], t['sell_volume']
+            t.update(buy_signal=buy, sell_signal=sell, buy_qty=buy_qty, sell_qty=sell_qty,
+                     signed_flow=buy_qty - sell_qty)
+        else:
+            t.update(buy_signal=buy, sell_signal=sell, buy_qty=buy * t['quantity'],
+                     sell_qty=sell * t['quantity'], signed_flow=(1.0 if buy else -1.0) * t['quantity'])
+        return buy, sell, t['quantity']
+    return update
+
+
+def _time_stream():
+    def update(t):
+        ts = int(t['timestamp'])
+        return (ts // NS_PER_HOUR) % 24, (ts // NS_PER_MINUTE) % 60
+    return update
+
+
+def _changes_stream():
+    prev = {'spread': np.nan, 'obi': np.nan}
+
+    def update(t):
+        out = t['spread'] - prev['spread'], t['obi'] - prev['obi']
+        prev['spread'], prev['obi'] = t['spread'], t['obi']
+        return out
+    return update
+
+
+def _price_windows_stream():
+    prices = _PriceWindows()
+
+    def update(t):
+        prices.push(t['price'])
+        t['price_windows'] = prices
+        return ()
+    return update
+
+
+def _flow_group(window):
+    def stream():
+        buys, sells = _Rolling(window), _Rolling(window)
+
+        def update(t):
+            buys.push(t['buy_qty'])
+            sells.push(t['sell_qty'])
+            b, s = buys.sum(), sells.sum()
+            return b, s, (b - s) / (b + s + 1e-10), b - s
+        return update
+
+    columns = [f'buy_volume_{window}', f'sell_volume_{window}',
+               f'flow_imbalance_{window}', f'net_flow_{window}']
+    return StreamGroup(f'flow_{window}', columns, stream, requires=('trade',))
+
+
+def _volume_stream():
+    ma_10, ma_50 = _Rolling(10), _Rolling(50)
+
+    def update(t):
+        ma_10.push(t['quantity'])
+        ma_50.push(t['quantity'])
+        return ma_10.mean(), ma_50.mean(), ma_10.mean() - ma_50.mean()
+    return update
+
+
+def _volatility_group(window):
+    def stream():
+        return lambda t: (t['price_windows'].std(window),)
+
+    return StreamGroup(f'volatility_{window}', [f'volatility_{window}'], stream,
+                       requires=('price_windows',))
+
+
+def _range_group(window):
+    def stream():
+        highs, lows = _RollingExtreme(window), _RollingExtreme(window, largest=False)
+
+        def update(t):
+            high, low = highs.update(t['price']), lows.update(t['price'])
+            return high, low, high - low, (t['price'] - low) / (high - low + 1e-10)
+        return update
+
+    columns = [f'high_{window}', f'low_{window}', f'price_range_{window}', f'price_position_{window}']
+    return StreamGroup(f'price_range_{window}', columns, stream, inputs=('price',))
+
+
+def lag_columns(window, log_return, momentum):
+    return (([f'log_return_{window}'] if log_return else []) +
+            ([f'momentum_{window}', f'price_change_pct_{window}'] if momentum else []))
+
+
+def _lag_group(window, log_return, momentum):
+    """Features reading the trade price `window` ticks back."""
+    def stream():
+        def update(t):
+            price = t['price']
+            old = t['price_windows'].ago(window)
+            out = ()
+            if log_return:
+                out += (np.log(price / old),)
+            if momentum:
+                out += (price - old, price / old - 1.0)
+            return out
+        return update
+
+    return StreamGroup(f'lag_{window}', lag_columns(window, log_return, momentum), stream,
+                       requires=('price_windows',))
+
+
+def _zscore_group(window):
+    def stream():
+        def update(t):
+            prices = t['price_windows']
+            zscore = (t['price'] - prices.mean(window)) / (prices.std(window) + 1e-10)
+            return zscore, int(abs(zscore) > 1.5)
+        return update
+
+    return StreamGroup(f'zscore_{window}', [f'price_zscore_{window}', f'extreme_move_{window}'],
+                       stream, requires=('price_windows',))
+
+
+def _spread_ma_group(window):
+    def stream():
+        stats = _Rolling(window)
+
+        def update(t):
+            stats.push(t['spread'])
+            ma = stats.mean()
+            return (ma, int(t['spread'] > ma)) if window == 50 else (ma,)
+        return update
+
+    columns = [f'spread_ma_{window}'] + (['spread_expansion'] if window == 50 else [])
+    return StreamGroup(f'spread_ma_{window}', columns, stream, requires=('book',))
+
+
+def _book_ma_stream():
+    obi, ratio = _Rolling(10), _Rolling(10)
+
+    def update(t):
+        obi.push(t['obi'])
+        ratio.push(t['bid_ask_ratio'])
+        return obi.mean(), ratio.mean()
+    return update
+
+
+def _thin_book_group(quantile_window):
+    def stream():
+        engine = RollingQuantile(0.25, window=quantile_window)
+
+        def update(t):
+            return (int(t['book_depth'] < engine.update(t['book_depth'])),)
+        return update
+
+    return StreamGroup('thin_book', ['thin_book'], stream, requires=('book',))
+
+
+def _kernel_group(name, columns, factory, key='price', requires=()):
+    """Group around one Streaming* kernel fed a single tick value."""
+    def stream():
+        kernel = factory()
+        if len(columns) == 1:
+            return lambda t: (kernel.update(t[key]),)
+        return lambda t: kernel.update(t[key])
+
+    inputs = (key,) if key in TRADE_INPUTS else ()
+    return StreamGroup(name, columns, stream, inputs=inputs, requires=requires)
+
+
+def _trend_groups(window):
+    return [
+        _kernel_group(f'ols_{window}', [f'ols_slope_{window}', f'ols_r2_{window}'],
+                      lambda: StreamingOLS(window)),
+        _kernel_group(f'variance_ratio_{window}', [f'variance_ratio_{window}', f'hurst_{window}'],
+                      lambda: StreamingVarianceRatio(window)),
+        _kernel_group(f'sign_entropy_{window}', [f'sign_entropy_{window}'],
+                      lambda: StreamingSignEntropy(window)),
+    ]
+
+
+def _lead_lag_group(lag):
+    def stream():
+        kernel = StreamingLaggedCorrelation(lag, 100)
+        return lambda t: (kernel.update(t['signed_flow'], t['mid_return']),)
+
+    return StreamGroup(f'flow_mid_corr_lag{lag}', [f'flow_mid_corr_lag{lag}'], stream,
+                       requires=('book', 'trade'))
+
+
+BOOK_COLUMNS = ['bid_volume', 'ask_volume', 'mid_price', 'spread', 'spread_pct', 'obi', 'book_depth',
+                'bid_ask_ratio', 'obi_extreme', 'price_to_bid', 'price_to_mid']
+
+
+def stream_groups(quantile_window=1000):
+    """Stream groups behind every ComprehensiveFeatureEngineer column, dependencies first."""
+    groups = [
+        StreamGroup('book', BOOK_COLUMNS, _book_stream,
+                    inputs=('bid_price', 'ask_price', 'bid_volume', 'ask_volume', 'price')),
+        StreamGroup('trade', ['buy_signal', 'sell_signal', 'volume'], _trade_stream,
+                    inputs=('side', 'quantity')),
+        StreamGroup('time', ['hour', 'minute'], _time_stream, inputs=('timestamp',)),
+        StreamGroup('price_windows', [], _price_windows_stream, inputs=('price',)),
+        StreamGroup('book_changes', ['spread_change', 'obi_change'], _changes_stream,
+                    requires=('book',)),
+    ]
+    groups += [_flow_group(w) for w in [5, 10, 20, 50]]
+    groups.append(StreamGroup('volume_ma', ['volume_ma_10', 'volume_ma_50', 'volume_acceleration'],
+                              _volume_stream, inputs=('quantity',)))
+    groups += [_volatility_group(w) for w in [10, 20, 50, 100]]
+    groups += [_range_group(w) for w in [10, 20, 50, 100]]
+    groups += [_lag_group(w, log_return=w >= 10, momentum=w <= 50) for w in [5, 10, 20, 50, 100]]
+    groups += [_zscore_group(w) for w in [5, 10, 20]]
+    groups += [_spread_ma_group(w) for w in [10, 50]]
+    groups.append(StreamGroup('book_ma_10', ['obi_ma_10', 'bid_ask_ratio_ma'], _book_ma_stream,
+                              requires=('book',)))
+    groups.append(_thin_book_group(quantile_window))
+    for window in [20, 50, 100]:
+        groups += _trend_groups(window)
+    for d in [0.3, 0.45, 0.6]:
+        name = f'frac_diff_{int(round(d * 100))}'
+        groups.append(_kernel_group(name, [name], lambda d=d: StreamingFracDiff(d), key='log_mid',
+                                    requires=('book',)))
+    groups += [_lead_lag_group(lag) for lag in [1, 2, 5, 10, 20]]
+    groups.append(_kernel_group('rsi_14', ['rsi_14'], lambda: StreamingRSI(14)))
+    groups.append(_kernel_group('macd', ['macd', 'macd_signal', 'macd_diff'], StreamingMACD))
+    return groups
+
+
+def closure(groups, names):
+    """`names` plus every group they require, transitively."""
+    needed, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(groups[name].requires)
+    return needed
+
+
+# ==================== ENGINE ====================
+
+class OnlineFeatureEngine:
+    """
+    Per-tick model features in `columns` order. Raises ValueError at
+    construction if a column has no stream group or needs a raw input
+    that is not in `inputs`.
+    """
+
+    def __init__(self, columns, quantile_window=1000, inputs=QUOTE_INPUTS + TRADE_INPUTS):
+        self.columns = list(columns)
+        ordered = stream_groups(quantile_window)
+        groups = {g.name: g for g in ordered}
+        group_of = {col: g.name for g in ordered for col in g.columns}
+
+        unknown = [col for col in self.columns if col not in group_of]
+        if unknown:
+            raise ValueError(f"Online feature engine cannot compute {len(unknown)} model "
+                             f"feature(s): {unknown[:10]}")
+        needed = closure(groups, {group_of[col] for col in self.columns})
+        missing_inputs = sorted({i for name in needed for i in groups[name].inputs} - set(inputs))
+        if missing_inputs:
+            raise ValueError(f"Model features need tick inputs {missing_inputs}, "
+                             f"which the data feed does not provide")
+
+        slot = {col: i for i, col in enumerate(self.columns)}
+        self.groups = [g.name for g in ordered if g.name in needed]
+        # (update, [(position in group output, position in vector), ...])
+        self._plan = []
+        for g in ordered:
+            if g.name in needed:
+                targets = [(j, slot[col]) for j, col in enumerate(g.columns) if col in slot]
+                self._plan.append((g.stream(), targets))
+        self.vector = np.full(len(self.columns), np.nan)
+
+    def update(self, tick):
+        """Advance every group by one tick; returns the (reused) feature vector."""
+        vector = self.vector
+        for update, targets in self._plan:
+            out = update(tick)
+            for j, i in targets:
+                vector[i] = out[j]
+        return vector
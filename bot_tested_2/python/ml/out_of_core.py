@@ -0,0 +1,337 @@
+"""
+Out-of-core training data: stream a features CSV that does not fit in RAM.
+
+One pass over the CSV (in chunks) spills every feature column to float32
+.npy partitions on disk and, on the way, accumulates per-column moments
+and a uniform row reservoir. The reservoir drives feature selection, the
+(approximate) fill medians and the RandomForest member; the moments give
+the exact scaler statistics of the median-filled data. Training then reads
+the partitions back through memory maps: LightGBM via a lightgbm.Sequence,
+XGBoost via an external-memory DataIter. Rows are filled and scaled one
+batch at a time, so only a batch of float64 features is ever in memory.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+
+# ==================== STREAMING STATISTICS ====================
+
+class StreamingMoments:
+    """Per-column count / mean / M2 of the finite values, merged chunk by chunk."""
+
+    def __init__(self, n_features):
+        self.n_rows = 0
+        self.count = np.zeros(n_features)
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        finite = np.isfinite(X)
+        count = finite.sum(axis=0).astype(np.float64)
+        values = np.where(finite, X, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, values.sum(axis=0) / count, 0.0)
+        m2 = (np.where(finite, X - mean, 0.0) ** 2).sum(axis=0)
+
+        # Chan et al. pairwise merge
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta * delta * self.count * weight
+        self.count = total
+        self.n_rows += len(X)
+
+    def filled(self, fill):
+        """(mean, var) over all rows once missing values are replaced by fill."""
+        n_missing = self.n_rows - self.count
+        total = float(self.n_rows)
+        delta = fill - self.mean
+        mean = self.mean + delta * n_missing / total
+        m2 = self.m2 + delta * delta * self.count * n_missing / total
+        return mean, m2 / total
+
+
+class RowReservoir:
+    """Uniform reservoir (Algorithm R) over the rows of a stream, with their positions."""
+
+    def __init__(self, size, n_features, random_state=42):
+        self.size = size
+        self.rows = np.empty((size, n_features), dtype=np.float32)
+        self.labels = np.empty(size, dtype=np.int8)
+        self.positions = np.empty(size, dtype=np.int64)
+        self.seen = 0
+        self._rng = np.random.default_rng(random_state)
+
+    def update(self, X, y):
+        n = len(X)
+        positions = np.arange(self.seen, self.seen + n)
+        # Fill phase
+        n_fill = max(0, min(self.size - self.seen, n))
+        if n_fill:
+            slots = positions[:n_fill]
+            self.rows[slots] = X[:n_fill]
+            self.labels[slots] = y[:n_fill]
+            self.positions[slots] = slots
+        # Replacement phase: row i survives with probability size / (i + 1)
+        rest = positions[n_fill:]
+        if len(rest):
+            slots = (self._rng.random(len(rest)) * (rest + 1)).astype(np.int64)
+            keep = slots < self.size
+            rows, slots = np.flatnonzero(keep) + n_fill, slots[keep]
+            # A slot hit twice in one chunk keeps the later row
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            self.rows[slots[last]] = X[rows[last]]
+            self.labels[slots[last]] = y[rows[last]]
+            self.positions[slots[last]] = positions[rows[last]]
+        self.seen += n
+
+    def sample(self):
+        """Kept rows in stream order: (rows, labels, positions)."""
+        n = min(self.seen, self.size)
+        order = np.argsort(self.positions[:n], kind='stable')
+        return self.rows[order], self.labels[order], self.positions[order]
+
+
+# ==================== PARTITIONED FEATURE STORE ====================
+
+class PartitionedFeatures:
+    """
+    Features CSV spilled to float32 .npy partitions (plus int8 targets).
+
+    scan() is the single streaming pass; afterwards the partitions can be
+    read back in any row range with batches(), a lightgbm.Sequence or an
+    XGBoost DataIter.
+    """
+
+    def __init__(self, features_path, spill_dir, exclude_columns, chunksize=200_000,
+                 reservoir_size=200_000, random_state=42):
+        self.features_path = features_path
+        self.spill_dir = spill_dir
+        self.exclude_columns = exclude_columns
+        self.chunksize = chunksize
+        self.reservoir_size = reservoir_size
+        self.random_state = random_state
+        self.feature_names = None
+        self.partitions = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.moments = None
+        self.reservoir = None
+        self._labels = None
+        self._maps = {}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def scan(self):
+        """Spill partitions and collect moments / reservoir in one pass over the CSV."""
+        columns = pd.read_csv(self.features_path, nrows=0).columns
+        self.feature_names = [col for col in columns if col not in self.exclude_columns]
+        dtypes = {col: np.float32 for col in self.feature_names}
+        dtypes['target'] = np.int8
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(self.spill_dir, 'part-*.npy')):
+            os.remove(stale)
+
+        self.moments = StreamingMoments(len(self.feature_names))
+        self.reservoir = RowReservoir(self.reservoir_size, len(self.feature_names), self.random_state)
+        self.partitions = []
+        sizes = []
+        reader = pd.read_csv(self.features_path, usecols=self.feature_names + ['target'],
+                             dtype=dtypes, chunksize=self.chunksize)
+        for i, chunk in enumerate(reader):
+            X = chunk[self.feature_names].to_numpy(dtype=np.float32)
+            X[~np.isfinite(X)] = np.nan
+            y = chunk['target'].to_numpy(dtype=np.int8)
+
+            base = os.path.join(self.spill_dir, f'part-{i:05d}')
+            np.save(f'{base}.features.npy', X)
+            np.save(f'{base}.target.npy', y)
+            self.partitions.append(base)
+            sizes.append(len(X))
+
+            self.moments.update(X)
+            self.reservoir.update(X, y)
+
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self._labels = None
+        self._maps = {}
+        print(f"Spilled {len(self)} rows x {len(self.feature_names)} features into "
+              f"{len(self.partitions)} partitions under {self.spill_dir}")
+        return self
+
+    def sample_frame(self):
+        """Reservoir rows as a (DataFrame, y) pair, for feature selection."""
+        rows, labels, _ = self.reservoir.sample()
+        return pd.DataFrame(rows, columns=self.feature_names), labels.astype(np.int64)
+
+    def fit_scaler(self, columns):
+        """
+        Fill medians (from the reservoir) and a StandardScaler fitted to the
+        median-filled columns (exact, from the streaming moments).
+        """
+        idx = [self.feature_names.index(col) for col in columns]
+        rows, _, _ = self.reservoir.sample()
+        medians = np.nanmedian(rows[:, idx].astype(np.float64), axis=0)
+        medians = np.nan_to_num(medians, nan=0.0)
+
+        sub = StreamingMoments(len(idx))
+        sub.n_rows = self.moments.n_rows
+        sub.count, sub.mean, sub.m2 = self.moments.count[idx], self.moments.mean[idx], self.moments.m2[idx]
+        mean, var = sub.filled(medians)
+
+        scaler = StandardScaler()
+        scaler.mean_ = mean
+        scaler.var_ = var
+        scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+        scaler.n_samples_seen_ = sub.n_rows
+        scaler.n_features_in_ = len(idx)
+        return scaler, medians
+
+    def labels(self, start=0, stop=None):
+        if self._labels is None:
+            self._labels = np.concatenate([np.load(f'{p}.target.npy') for p in self.partitions])
+        return self._labels[start:stop]
+
+    def _partition(self, i):
+        if i not in self._maps:
+            self._maps[i] = np.load(f'{self.partitions[i]}.features.npy', mmap_mode='r')
+        return self._maps[i]
+
+    def rows(self, start, stop, columns):
+        """Raw float32 rows [start, stop) of the given column indices."""
+        first = int(np.searchsorted(self.offsets, start, side='right')) - 1
+        parts = []
+        i = first
+        while start < stop:
+            local = start - self.offsets[i]
+            take = min(stop, self.offsets[i + 1]) - start
+            parts.append(self._partition(i)[local:local + take, columns])
+            start += take
+            i += 1
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def batches(self, columns, transform, start=0, stop=None):
+        """Yield (X, y, row_start) per partition slice in [start, stop), X = transform(rows)."""
+        stop = len(self) if stop is None else stop
+        for i in range(len(self.partitions)):
+            lo, hi = max(start, self.offsets[i]), min(stop, self.offsets[i + 1])
+            if lo >= hi:
+                continue
+            yield transform(self.rows(lo, hi, columns)), self.labels(lo, hi), lo
+
+
+class ScaledTransform:
+    """Median fill + standard scaling of raw float32 rows into float64."""
+
+    def __init__(self, medians, scaler):
+        self.medians = medians
+        self.mean = scaler.mean_
+        self.scale = scaler.scale_
+
+    def __call__(self, rows):
+        X = np.array(rows, dtype=np.float64)
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.broadcast_to(self.medians, X.shape)[missing]
+        X -= self.mean
+        X /= self.scale
+        return X
+
+
+# ==================== FRAMEWORK ADAPTERS ====================
+
+class PartitionSequence(lgb.Sequence):
+    """Row range of a PartitionedFeatures store as a LightGBM Sequence."""
+
+    def __init__(self, store, columns, transform, start=0, stop=None, batch_size=65_536):
+        self.store = store
+        self.columns = columns
+        self.transform = transform
+        self.start = start
+        self.stop = len(store) if stop is None else stop
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            lo, hi, _ = idx.indices(len(self))
+            return self.transform(self.store.rows(self.start + lo, self.start + hi, self.columns))
+        if isinstance(idx, list):
+            return np.vstack([self[i] for i in idx])
+        if idx < 0:
+            idx += len(self)
+        row = self.start + int(idx)
+        return self.transform(self.store.rows(row, row + 1, self.columns))[0]
+
+
+class PartitionIter(xgb.DataIter):
+    """Row range of a PartitionedFeatures store as an external-memory XGBoost iterator."""
+
+    def __init__(self, store, columns, transform, start=0, stop=None):
+        self.store = store
+        self.columns = columns
+        self.transform = transform
+        self.start = start
+        self.stop = len(store) if stop is None else stop
+        self._it = None
+        super().__init__(cache_prefix=os.path.join(store.spill_dir, 'xgb-cache'))
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = self.store.batches(self.columns, self.transform, self.start, self.stop)
+        batch = next(self._it, None)
+        if batch is None:
+            return False
+        X, y, _ = batch
+        input_data(data=X, label=y)
+        return True
+
+    def reset(self):
+        self._it = None
+
+
+class PartitionSource:
+    """
+    Training source for OptimizedModelTrainer._train_member over a
+    PartitionedFeatures store (same interface as binning.BinnedMatrix).
+    RandomForest trains on the reservoir rows inside the training range;
+    rf_sample=False skips it.
+    """
+
+    def __init__(self, store, columns, transform, rf_sample=True):
+        self.store = store
+        self.columns = columns
+        self.transform = transform
+        self.rf_sample = rf_sample
+
+    def lgb_train_set(self, stop):
+        sequence = PartitionSequence(self.store, self.columns, self.transform, 0, stop)
+        return lgb.Dataset([sequence], label=self.store.labels(0, stop), params={'verbose': -1})
+
+    def xgb_train_matrix(self, stop):
+        batches = PartitionIter(self.store, self.columns, self.transform, 0, stop)
+        if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            return xgb.ExtMemQuantileDMatrix(batches, max_bin=256)
+        # XGBoost < 3.0: DMatrix over an iterator with a cache_prefix is external memory
+        return xgb.DMatrix(batches)
+
+    def rf_train_set(self, stop):
+        if not self.rf_sample:
+            return None
+        rows, labels, positions = self.store.reservoir.sample()
+        inside = positions < stop
+        return self.transform(rows[inside][:, self.columns]), labels[inside]
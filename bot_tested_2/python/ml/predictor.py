@@ -0,0 +1,117 @@
+"""
+Ensemble predictor for the live signal path.
+
+Loads the trained ensemble from the fast-start artifact (artifact.py) or
+from the pickled ensemble_model.pkl, which is flattened on load, and maps
+one raw feature vector to the ensemble up-probability with the training
+preprocessing: non-finite values become the training medians, then the
+StandardScaler is applied. Both steps run in place in a preallocated
+vector, and the flat evaluator averages member probabilities in its own
+preallocated buffers. Anything that does not fit (unknown model format,
+feature count mismatch, unsupported member) raises at load time.
+
+predict_batch() serves offline replay: when the framework models were
+loaded (pickle) their native batch predict is used, which is faster per
+row than the flat evaluator.
+"""
+
+import time
+
+import numpy as np
+
+from artifact import is_artifact, load_artifact
+from flat_ensemble import FlatEnsemble
+
+
+class EnsemblePredictor:
+    def __init__(self, flat, feature_names, mean, scale, fill_values, source=None, artifact=None,
+                 models=None, binner=None):
+        self.flat = flat
+        # Framework members (pickle only), used by predict_batch
+        self.models = models
+        self.binner = binner
+        self.feature_names = list(feature_names)
+        self.mean = mean
+        self.scale = scale
+        self.fill_values = fill_values
+        self.source = source
+        self.artifact = artifact
+        n = len(self.feature_names)
+        sizes = {'model inputs': flat.n_features, 'scaler mean': len(mean),
+                 'scaler scale': len(scale), 'fill values': len(fill_values)}
+        wrong = {name: size for name, size in sizes.items() if size != n}
+        if wrong:
+            raise ValueError(f"Model {source} has {n} feature names but {wrong}")
+        self._x = np.empty(n)
+        self._missing = np.empty(n, dtype=bool)
+
+    @classmethod
+    def load(cls, path):
+        """From an artifact directory or a pickled {'models': [...], 'scaler': ...} dict."""
+        if is_artifact(path):
+            return load_artifact(path).predictor
+
+        import joblib
+        model_data = joblib.load(path)
+        if 'models' in model_data:
+            models = model_data['models']
+        elif 'model' in model_data:
+            models = [model_data['model']]
+        else:
+            raise ValueError(f"{path} holds no model (keys: {sorted(model_data)})")
+        feature_names = model_data['feature_names']
+        scaler = model_data['scaler']
+        fill_values = model_data.get('fill_values')
+        if fill_values is None:
+            # Older files carry no training medians; fill with the scaler mean (0 once scaled)
+            fill_values = scaler.mean_
+        binner = model_data.get('binner')
+        flat = FlatEnsemble.from_models(models, len(feature_names), binner)
+        return cls(flat, feature_names, scaler.mean_, scaler.scale_,
+                   np.asarray(fill_values, dtype=np.float64), source=path, models=models, binner=binner)
+
+    def check_schema(self, columns):
+        """Raise unless `columns` is exactly the model's feature list, in order."""
+        columns = list(columns)
+        if columns == self.feature_names:
+            return
+        missing = [c for c in self.feature_names if c not in columns]
+        extra = [c for c in columns if c not in self.feature_names]
+        raise ValueError(f"Feature schema mismatch with model {self.source}: "
+                         f"missing {missing[:10]}, unexpected {extra[:10]}"
+                         + ("" if missing or extra else ", same names in a different order"))
+
+    def predict(self, x):
+        """Up-probability for one raw feature vector in feature_names order."""
+        scaled, missing = self._x, self._missing
+        np.copyto(scaled, x)
+        np.isfinite(scaled, out=missing)
+        np.logical_not(missing, out=missing)
+        np.copyto(scaled, self.fill_values, where=missing)
+        scaled -= self.mean
+        scaled /= self.scale
+        return self.flat.predict_one(scaled)
+
+    def predict_batch(self, X):
+        """Up-probabilities for a (n_rows, n_features) raw feature matrix."""
+        X = np.array(X, dtype=np.float64)
+        missing = ~np.isfinite(X)
+        X[missing] = np.broadcast_to(self.fill_values, X.shape)[missing]
+        X -= self.mean
+        X /= self.scale
+        if self.models is None:
+            return self.flat.predict_proba(X)
+
+        from train_model import OptimizedModelTrainer
+        if self.binner is not None:
+            X = self.binner.transform(X)
+        return np.mean([OptimizedModelTrainer._predict_member(m, X) for m in self.models], axis=0)
+
+    def warm_up(self, n_predictions=20):
+        """Fault in mapped arrays and prime the prediction path; returns seconds."""
+        start = time.perf_counter()
+        if self.artifact is not None:
+            self.artifact.warm_up(n_predictions=0)
+        for _ in range(n_predictions):
+            self.predict(self.fill_values)
+        return time.perf_counter() - start
@@ -0,0 +1,188 @@
+"""
+Latency-aware ensemble pruning.
+
+Measures what each ensemble member costs per prediction (framework
+single-row and batched latency, and single-row latency on the flat-array
+evaluator used for deployment) next to what it contributes (its own AUC
+and the AUC lost when it is dropped). It then searches member subsets and
+per-member tree counts for the variant with the best validation AUC whose
+measured flat single-row latency fits a budget, and reports the chosen
+variant's AUC on a separate holdout that played no part in the choice.
+
+Every candidate's AUC comes from one pass of per-tree leaf values over
+the validation rows: a truncated booster's margin is a prefix sum over its trees,
+a truncated forest's probability a prefix mean. Only latency needs a
+candidate to be built, and candidates are timed best-AUC first, so the
+search stops at the first one inside the budget. Inputs are the members'
+own inputs (scaled features, or uint8 codes for prebinned models).
+"""
+
+import copy
+import itertools
+import time
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+from flat_ensemble import FlatEnsemble, LINK_IDENTITY, _member_trees, _sigmoid
+
+
+TREE_FRACTIONS = (1.0, 0.5, 0.25, 0.1)
+
+
+def time_call(fn, repeats=200, rounds=5):
+    """Best-of-rounds mean seconds per call (robust to scheduler noise)."""
+    fn()
+    best = np.inf
+    per_round = max(1, repeats // rounds)
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        best = min(best, (time.perf_counter() - start) / per_round)
+    return best
+
+
+def truncate_model(model, n_trees):
+    """Copy of a trained member keeping only its first n_trees trees."""
+    import lightgbm as lgb
+    import xgboost as xgb
+
+    if isinstance(model, lgb.Booster):
+        return lgb.Booster(model_str=model.model_to_string(num_iteration=n_trees))
+    if isinstance(model, xgb.XGBModel):
+        model = model.get_booster()
+    if isinstance(model, xgb.Booster):
+        return model[:n_trees]
+    pruned = copy.copy(model)
+    pruned.estimators_ = model.estimators_[:n_trees]
+    pruned.n_estimators = n_trees
+    return pruned
+
+
+class LatencyPruner:
+    """Per-member cost / contribution report and budgeted subset + tree-count search."""
+
+    def __init__(self, models, member_names, n_features, fractions=TREE_FRACTIONS,
+                 timing_repeats=200):
+        self.models = list(models)
+        self.member_names = list(member_names)
+        self.n_features = n_features
+        self.fractions = fractions
+        self.timing_repeats = timing_repeats
+        self.members = [_member_trees(model) for model in self.models]
+
+    def _spec(self, m, n_trees):
+        trees, link, base, weight, reads32 = self.members[m]
+        if link == LINK_IDENTITY:
+            weight = 1.0 / n_trees
+        return trees[:n_trees], link, base, weight, reads32
+
+    def flat_variant(self, variant):
+        """FlatEnsemble for {member index: n_trees}."""
+        specs = [self._spec(m, k) for m, k in sorted(variant.items())]
+        return FlatEnsemble.from_member_trees(specs, self.n_features)
+
+    def _flat_latency(self, variant, x):
+        flat = self.flat_variant(variant)
+        return time_call(lambda: flat.predict_one(x), self.timing_repeats) * 1e6
+
+    def _member_prefix_proba(self, leaf_values):
+        """Per member: (n_rows, n_trees) probability after the first k + 1 trees."""
+        prefix, start = [], 0
+        for trees, link, base, _, _ in self.members:
+            cum = np.cumsum(leaf_values[:, start:start + len(trees)], axis=1)
+            start += len(trees)
+            if link == LINK_IDENTITY:
+                prefix.append(cum / np.arange(1, len(trees) + 1))
+            else:
+                prefix.append(_sigmoid(cum + base))
+        return prefix
+
+    def _prefix_proba(self, X):
+        leaf_values = FlatEnsemble.from_member_trees(self.members, self.n_features).leaf_values(X)
+        return self._member_prefix_proba(leaf_values)
+
+    @staticmethod
+    def _variant_proba(prefix, variant):
+        return np.mean([prefix[m][:, k - 1] for m, k in variant.items()], axis=0)
+
+    @staticmethod
+    def _auc(y, proba, sample_weight):
+        try:
+            return roc_auc_score(y, proba, sample_weight=sample_weight)
+        except ValueError:
+            return 0.5
+
+    def report(self, X_test, y_test, sample_weight=None, batch_size=1000):
+        """Print and return per-member latency and AUC contribution."""
+        from train_model import OptimizedModelTrainer
+
+        x_one, batch = X_test[:1], X_test[:batch_size]
+        probas = [OptimizedModelTrainer._predict_member(m, X_test) for m in self.models]
+        full_auc = self._auc(y_test, np.mean(probas, axis=0), sample_weight)
+
+        print(f"\n{'member':<15}{'trees':>7}{'single µs':>12}{'batch µs/row':>14}"
+              f"{'flat µs':>10}{'AUC':>8}{'marginal':>10}")
+        rows = []
+        for m, (name, model) in enumerate(zip(self.member_names, self.models)):
+            single = time_call(lambda: OptimizedModelTrainer._predict_member(model, x_one),
+                               max(10, self.timing_repeats // 10)) * 1e6
+            batched = time_call(lambda: OptimizedModelTrainer._predict_member(model, batch),
+                                5) * 1e6 / len(batch)
+            n_trees = len(self.members[m][0])
+            flat = self._flat_latency({m: n_trees}, x_one[0])
+            others = [p for k, p in enumerate(probas) if k != m]
+            without = self._auc(y_test, np.mean(others, axis=0), sample_weight) if others else 0.5
+            auc = self._auc(y_test, probas[m], sample_weight)
+            rows.append({'member': name, 'trees': n_trees, 'single_us': single,
+                         'batch_us_per_row': batched, 'flat_us': flat, 'auc': auc,
+                         'marginal_auc': full_auc - without})
+            print(f"{name:<15}{n_trees:>7}{single:>12.1f}{batched:>14.2f}{flat:>10.1f}"
+                  f"{auc:>8.4f}{full_auc - without:>+10.4f}")
+        full = {m: len(spec[0]) for m, spec in enumerate(self.members)}
+        print(f"{'ensemble':<15}{sum(full.values()):>7}{'':>12}{'':>14}"
+              f"{self._flat_latency(full, x_one[0]):>10.1f}{full_auc:>8.4f}")
+        return rows
+
+    def search(self, X_val, y_val, X_holdout, y_holdout, latency_budget_us, val_weight=None,
+               holdout_weight=None):
+        """
+        Variant with the best validation AUC whose flat single-row latency fits
+        the budget. Returns (variant {member index: n_trees}, validation auc,
+        holdout auc, latency µs), or None.
+        """
+        prefix = self._prefix_proba(X_val)
+
+        options = []
+        for trees, *_ in self.members:
+            counts = sorted({max(1, int(round(len(trees) * f))) for f in self.fractions})
+            options.append([0] + counts)
+
+        candidates = []
+        for choice in itertools.product(*options):
+            variant = {m: k for m, k in enumerate(choice) if k > 0}
+            if not variant:
+                continue
+            proba = self._variant_proba(prefix, variant)
+            candidates.append((self._auc(y_val, proba, val_weight), variant))
+        candidates.sort(key=lambda c: (-c[0], sum(c[1].values())))
+
+        full_auc = candidates[0][0] if candidates else 0.5
+        x = X_val[0]
+        for auc, variant in candidates:
+            latency = self._flat_latency(variant, x)
+            if latency <= latency_budget_us:
+                holdout_proba = self._variant_proba(self._prefix_proba(X_holdout), variant)
+                holdout_auc = self._auc(y_holdout, holdout_proba, holdout_weight)
+                described = ', '.join(f"{self.member_names[m]}={k}" for m, k in variant.items())
+                print(f"\n✓ Pruned variant: {described} | validation AUC {auc:.4f} "
+                      f"(best unconstrained {full_auc:.4f}) | holdout AUC {holdout_auc:.4f} | "
+                      f"{latency:.1f} µs/row")
+                return variant, auc, holdout_auc, latency
+        print(f"\n✗ No variant fits {latency_budget_us:.0f} µs/row")
+        return None
+
+    def pruned_models(self, variant):
+        """Framework models of a variant, in member order."""
+        return [truncate_model(self.models[m], k) for m, k in sorted(variant.items())]
@@ -0,0 +1,39 @@
+"""
+NumPy arrays shared with process-pool workers without pickling them.
+
+The parent copies an array once into a multiprocessing.shared_memory block
+(share_array) and passes the small spec to the pool initializer
+(attach_shared), which maps every block in each worker. Tasks then read
+SHARED[key][1]. Used by the fold-parallel walk-forward in train_model.py
+and the config-parallel search in hyperparameter_search.py.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+# key -> (shared memory block or None, array) as seen by this process
+SHARED = {}
+
+
+def share_array(array):
+    """Copy an array into a new shared memory block; returns (block, spec)."""
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_shared(specs):
+    """Process pool initializer: map the shared blocks of {key: spec} without copying."""
+    for key, (name, shape, dtype) in specs.items():
+        shm = SharedMemory(name=name)
+        SHARED[key] = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+
+
+def release(blocks):
+    """Close and unlink the parent's blocks once the pool is done."""
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
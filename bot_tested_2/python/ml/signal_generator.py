@@ -2,15 +2,59 @@
 Simple file-based signal generator for debugging.
 Writes signals to a file that C++ reads.
 With bidirectional connection handshaking - FIXED VERSION.
+
+The trained ensemble (fast-start artifact directory or ensemble_model.pkl)
+is served by predictor.EnsemblePredictor on features from
+online_features.OnlineFeatureEngine, which replays trades merged with the
+prevailing quote exactly like training. A model whose features the engine
+cannot produce fails at startup.
+
+Startup imports only NumPy: pandas is imported when market data is read,
+joblib only for pickled models.
+
+Signals go through signal_writer.SignalWriter, which keeps the signal file
+open and writes in batches; durability is 'none', 'flush' (default) or
+'fsync' (group commit every fsync_interval_ms). With transport='shm' they
+go instead to the shared-memory ring of signal_ring.py, with no disk
+involved.
 """
 
-import pandas as pd
 import numpy as np
-import joblib
 import os
 import time
 import sys
-from collections import deque
+
+from online_features import OnlineFeatureEngine, QUOTE_INPUTS, TRADE_INPUTS
+from predictor import EnsemblePredictor
+from signal_writer import SignalWriter
+from signal_ring import SignalRingProducer
+
+
+# Up-probability above BUY_THRESHOLD -> BUY (1), below SELL_THRESHOLD -> SELL (-1)
+BUY_THRESHOLD = 0.55
+SELL_THRESHOLD = 0.45
+
+
+def load_ticks(data_path, trades_path=None):
+    """Quotes, or trades with the prevailing quote (as in training) when trades_path is set."""
+    import pandas as pd
+    quotes = pd.read_csv(data_path).sort_values('timestamp')
+    if not trades_path:
+        return quotes.reset_index(drop=True)
+    trades = pd.read_csv(trades_path).sort_values('timestamp')
+    return pd.merge_asof(trades, quotes, on='timestamp', direction='backward')
+
+
+def iter_ticks(ticks, columns):
+    """
+    Tick dicts for OnlineFeatureEngine.update, read from per-column lists of
+    Python scalars. One dict is refilled in place for every row, so it is
+    only valid until the next tick is drawn.
+    """
+    tick = {}
+    for values in zip(*[ticks[column].tolist() for column in columns]):
+        tick.update(zip(columns, values))
+        yield tick
 
 
 class ConnectionMonitor:
@@ -63,31 +107,37 @@ class ConnectionMonitor:
 
 
 class SignalGenerator:
-    def __init__(self, model_path='models/price_direction_model.pkl',
+    def __init__(self, model_path='models/ensemble_artifact',
                  data_path='data/raw/quotes.csv',
                  signal_file='ipc/ml_signals.txt',
                  cpp_status_file='ipc/cpp_status.txt',
-                 python_status_file='ipc/python_status.txt'):
+                 python_status_file='ipc/python_status.txt',
+                 trades_path='data/raw/trades.csv',
+                 durability='flush',
+                 signal_batch_size=None,
+                 fsync_interval_ms=10,
+                 transport='file',
+                 shm_name='ml_signals'):
         
         print("Initializing Signal Generator (File-Based with IPC Handshake)...")
         
-        # Load trained model
+        # Load trained model; any failure here stops startup
         print(f"Loading model from: {model_path}")
-        try:
-            model_data = joblib.load(model_path)
-            self.model = model_data['model']
-            self.feature_names = model_data['feature_names']
-            print(f"✓ Model loaded with {len(self.feature_names)} features")
-        except Exception as e:
-            print(f"⚠ Using dummy model: {e}")
-            self.model = None
-            self.feature_names = ['mid_price', 'spread', 'spread_bps', 'obi', 'weighted_mid',
-                                 'price_return_10', 'price_return_50', 'price_return_100',
-                                 'volatility_10', 'volatility_50', 'volatility_100',
-                                 'book_depth', 'microprice']
-        
-        # Data path
+        load_start = time.perf_counter()
+        self.predictor = EnsemblePredictor.load(model_path)
+        self.feature_names = self.predictor.feature_names
+        
+        # Online features in model column order; without trades only quote inputs exist
+        self.inputs = QUOTE_INPUTS + (TRADE_INPUTS if trades_path else ())
+        self.features = OnlineFeatureEngine(self.feature_names, inputs=self.inputs)
+        self.predictor.check_schema(self.features.columns)
+        print(f"✓ Model loaded with {len(self.feature_names)} features "
+              f"({len(self.features.groups)} online feature groups, "
+              f"{(time.perf_counter() - load_start) * 1000:.1f} ms)")
+        
+        # Data paths
         self.data_path = data_path
+        self.trades_path = trades_path
         self.signal_file = signal_file
         
         # Setup signal file directory
@@ -98,96 +148,68 @@ class SignalGenerator:
             os.remove(signal_file)
             print(f"✓ Cleared old signal file")
         
+        # Signal transport settings (the file / ring is opened when sending starts)
+        if transport not in ('file', 'shm'):
+            raise ValueError(f"Unknown signal transport {transport!r} (expected 'file' or 'shm')")
+        self.transport = transport
+        self.shm_name = shm_name
+        self.durability = durability
+        self.signal_batch_size = signal_batch_size
+        self.fsync_interval_ms = fsync_interval_ms
+        self.writer = None
+        
         # Connection monitoring
         self.connection = ConnectionMonitor(cpp_status_file, python_status_file)
         
-        # Rolling window
-        self.window_size = 100
-        self.price_buffer = deque(maxlen=self.window_size)
-        self.volume_buffer = deque(maxlen=self.window_size)
-        
         # Statistics
         self.signals_sent = 0
         self.signals_buy = 0
         self.signals_sell = 0
         self.signals_neutral = 0
         
-    def calculate_features_online(self, quote):
-        """Calculate features from streaming data."""
-        features = {}
-        
-        bid_price = float(quote.get('bid_price', 0))
-        ask_price = float(quote.get('ask_price', 0))
-        bid_volume = float(quote.get('bid_volume', 0))
-        ask_volume = float(quote.get('ask_volume', 0))
-        
-        features['mid_price'] = (bid_price + ask_price) / 2
-        features['spread'] = ask_price - bid_price
-        features['spread_bps'] = (features['spread'] / features['mid_price']) * 10000 if features['mid_price'] > 0 else 0
-        
-        total_volume = bid_volume + ask_volume
-        features['obi'] = (bid_volume - ask_volume) / total_volume if total_volume > 0 else 0
-        features['weighted_mid'] = (bid_price * ask_volume + ask_price * bid_volume) / total_volume if total_volume > 0 else features['mid_price']
-        
-        self.price_buffer.append(features['mid_price'])
-        self.volume_buffer.append(total_volume)
-        
-        if len(self.price_buffer) >= 10:
-            prices = np.array(list(self.price_buffer))
-            
-            features['price_return_10'] = (prices[-1] - prices[-10]) / prices[-10] if len(prices) >= 10 else 0
-            features['price_return_50'] = (prices[-1] - prices[-50]) / prices[-50] if len(prices) >= 50 else 0
-            features['price_return_100'] = (prices[-1] - prices[-100]) / prices[-100] if len(prices) >= 100 else 0
-            
-            features['volatility_10'] = np.std(prices[-10:]) if len(prices) >= 10 else 0
-            features['volatility_50'] = np.std(prices[-50:]) if len(prices) >= 50 else 0
-            features['volatility_100'] = np.std(prices) if len(prices) >= 100 else 0
-        else:
-            for window in [10, 50, 100]:
-                features[f'price_return_{window}'] = 0
-                features[f'volatility_{window}'] = 0
-        
-        features['book_depth'] = total_volume
-        features['microprice'] = features['weighted_mid']
-        
-        return features
+    def calculate_features_online(self, tick):
+        """Update streaming features with one tick; returns the model-order feature vector."""
+        return self.features.update(tick)
     
-    def predict_signal(self, features_dict):
-        """Generate prediction from features."""
-        if self.model is None:
-            rand = np.random.random()
-            signal = 1 if rand > 0.55 else (-1 if rand < 0.45 else 0)
-            return signal, rand
-        
-        feature_vector = [features_dict.get(feat_name, 0) for feat_name in self.feature_names]
-        X = np.array(feature_vector).reshape(1, -1)
-        
-        try:
-            if hasattr(self.model, 'predict_proba'):
-                pred_proba_array = self.model.predict_proba(X)[0]
-                pred_proba = pred_proba_array[1] if len(pred_proba_array) == 2 else np.max(pred_proba_array)
-            else:
-                prediction = self.model.predict(X)[0]
-                pred_proba = 0.7 if prediction == 1 else 0.3
-        except:
-            pred_proba = 0.5
+    def predict_signal(self, features):
+        """Generate prediction from the feature vector."""
+        pred_proba = self.predictor.predict(features)
         
-        if pred_proba > 0.55:
+        if pred_proba > BUY_THRESHOLD:
             signal = 1
-        elif pred_proba < 0.45:
+        elif pred_proba < SELL_THRESHOLD:
             signal = -1
         else:
             signal = 0
         
         return signal, pred_proba
     
-    def send_signal(self, signal, confidence):
-        """Append signal to file."""
+    def warm_up(self):
+        """Fault in the model's mapped arrays and prime the prediction path."""
+        elapsed = self.predictor.warm_up()
+        print(f"✓ Model warm-up: {elapsed * 1000:.1f} ms")
+    
+    def open_writer(self):
+        if self.transport == 'shm':
+            self.writer = SignalRingProducer(self.shm_name)
+            print(f"✓ Signal ring: shared memory {self.shm_name!r}, {self.writer.capacity} slots")
+            return
+        self.writer = SignalWriter(self.signal_file, durability=self.durability,
+                                   batch_size=self.signal_batch_size,
+                                   fsync_interval_ms=self.fsync_interval_ms)
+        print(f"✓ Signal writer: durability={self.durability}, batch={self.writer.batch_size}"
+              + (f", max delay {self.writer.max_delay * 1000:g}ms" if self.writer.max_delay is not None else "")
+              + (f", fsync every {self.fsync_interval_ms}ms" if self.durability == 'fsync' else ""))
+    
+    def send_signal(self, signal, confidence, tick_ns=0):
+        """Queue signal for the (batched) signal file, or publish it on the ring."""
         try:
-            with open(self.signal_file, 'a') as f:
-                f.write(f"{signal},{confidence:.4f}\n")
-                f.flush()
-                os.fsync(f.fileno())
+            if self.transport == 'shm':
+                # Ring records carry the tick timestamp; line N of the file is tick N
+                if not self.writer.write(signal, confidence, tick_ns):
+                    return False
+            else:
+                self.writer.write(signal, confidence)
             
             self.signals_sent += 1
             if signal > 0:
@@ -207,7 +229,8 @@ class SignalGenerator:
         print("\n" + "=" * 70)
         print("Signal Generator Running (File-Based with IPC Handshake)")
         print("=" * 70)
-        print(f"Signals will be written to: {self.signal_file}")
+        print(f"Signals will be written to: "
+              f"{self.signal_file if self.transport == 'file' else 'shared memory ' + repr(self.shm_name)}")
         print(f"Delay between signals: {delay_ms}ms\n")
         
         # Wait for C++ to be ready FIRST (before announcing Python)
@@ -240,22 +263,27 @@ class SignalGenerator:
             print("    ./main")
             return
         
+        # Warm up before announcing, so the first signal runs at steady-state speed
+        self.warm_up()
+        
         # NOW announce Python is ready (after confirming C++ is ready)
         self.connection.announce_python_ready()
         
         # Small delay to ensure C++ picks up the status
         time.sleep(0.5)
         
-        print(f"\nLoading market data from: {self.data_path}")
+        print(f"\nLoading market data from: {self.data_path}"
+              + (f" + {self.trades_path}" if self.trades_path else ""))
         try:
-            quotes = pd.read_csv(self.data_path)
-            print(f"✓ Loaded {len(quotes)} quotes\n")
+            ticks = load_ticks(self.data_path, self.trades_path)
+            print(f"✓ Loaded {len(ticks)} ticks\n")
         except Exception as e:
             print(f"✗ Error loading data: {e}")
             self.connection.announce_python_shutdown()
             raise
         
         # Announce Python is sending signals
+        self.open_writer()
         self.connection.announce_python_sending()
         
         print("=" * 70)
@@ -266,11 +294,11 @@ class SignalGenerator:
         last_status_time = start_time
         
         try:
-            for idx, row in quotes.iterrows():
+            for idx, tick in enumerate(iter_ticks(ticks, self.inputs)):
                 try:
-                    features = self.calculate_features_online(row.to_dict())
+                    features = self.calculate_features_online(tick)
                     signal, confidence = self.predict_signal(features)
-                    self.send_signal(signal, confidence)
+                    self.send_signal(signal, confidence, tick['timestamp'])
                     
                     current_time = time.time()
                     if idx % 200 == 0 or (current_time - last_status_time) > 5:
@@ -282,7 +310,7 @@ class SignalGenerator:
                         cpp_status = self.connection.read_status_file(self.connection.cpp_status_file)
                         cpp_indicator = "✓" if cpp_status == "CPP_PROCESSING" else "○"
                         
-                        print(f"[{cpp_indicator}] [{idx:6d}] Mid: ${features['mid_price']:8.2f} | "
+                        print(f"[{cpp_indicator}] [{idx:6d}] Mid: ${(tick['bid_price'] + tick['ask_price']) / 2:8.2f} | "
                               f"Signal: {signal_str:7s} | Conf: {confidence:.4f} | "
                               f"Rate: {rate:.1f} sig/s | Total: {self.signals_sent} | "
                               f"C++: {cpp_status}")
@@ -290,6 +318,8 @@ class SignalGenerator:
                         last_status_time = current_time
                     
                     if delay_ms > 0:
+                        # Paced replay: don't hold signals back while idle
+                        self.writer.flush()
                         time.sleep(delay_ms / 1000.0)
                 
                 except Exception as e:
@@ -304,6 +334,10 @@ class SignalGenerator:
             traceback.print_exc()
         
         finally:
+            try:
+                self.writer.close()
+            except Exception as e:
+                print(f"Error closing signal file: {e}", file=sys.stderr)
             elapsed = time.time() - start_time
             print("\n" + "=" * 70)
             print("Statistics")
@@ -316,6 +350,10 @@ class SignalGenerator:
             print(f"Runtime: {elapsed:.2f}s")
             if elapsed > 0:
                 print(f"Rate: {self.signals_sent/elapsed:.1f} sig/s")
+            if self.transport == 'shm':
+                print(f"Signal ring: {self.writer.dropped} dropped (ring full)")
+            else:
+                print(f"Signal file: {self.writer.writes} writes, {self.writer.fsyncs} fsyncs")
             print("=" * 70)
             
             self.connection.announce_python_shutdown()
@@ -327,7 +365,9 @@ def main():
         data_path='data/raw/quotes.csv',
         signal_file='ipc/ml_signals.txt',
         cpp_status_file='ipc/cpp_status.txt',
-        python_status_file='ipc/python_status.txt'
+        python_status_file='ipc/python_status.txt',
+        trades_path='data/raw/trades.csv',
+        durability='flush'
     )
     generator.run(delay_ms=0)
 
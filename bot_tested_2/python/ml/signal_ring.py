@@ -0,0 +1,318 @@
+"""
+Shared-memory signal transport: a single-producer single-consumer ring.
+
+The signal generator (producer) and the trading engine (consumer) map the
+same multiprocessing.shared_memory segment; a signal is one fixed-width
+binary record, so delivery is a memcpy plus one counter store, with no
+file, no parsing and no polling interval.
+
+Segment layout, little-endian:
+
+  offset 0     magic 8s b'MLSIGRNG', version u32, record_size u32, capacity u64,
+               producer pid u64
+  offset 64    head   u64  next sequence number the producer writes
+  offset 72    closed u64  set to 1 when the producer shuts down
+  offset 128   tail   u64  next sequence number the consumer reads
+  offset 192   capacity records (a power of two), slot = seq & (capacity - 1):
+                 seq u64, tick_ns i64, timestamp_ns i64, confidence f32, signal i8,
+                 3 pad bytes
+
+i.e. `struct { uint64_t seq; int64_t tick_ns; int64_t timestamp_ns; float confidence;
+int8_t signal; uint8_t pad[3]; }`. tick_ns is the timestamp of the market
+data tick the signal was computed from (the key shared with precomputed
+replay signals, see precompute_signals.py); timestamp_ns is when the
+signal was published.
+head and tail sit on their own cache lines and each has one writer. Records
+[tail, head) are readable; the producer writes a record before publishing
+the new head, and the consumer bumps tail after copying a record out. That
+order is all x86 needs; a C++ consumer should load head with acquire and
+store tail with release (std::atomic_ref<uint64_t>). The producer never
+blocks: when the ring is full the signal is dropped and counted.
+
+The producer owns the segment and unlinks it on close. A segment left
+behind by a producer that died is replaced at the next start; one whose
+producer is still alive, or that is not a signal ring, is never touched.
+
+SignalRingConsumer is the reference consumer (and a test stand-in for the
+C++ side); wait_for_ring() attaches one as soon as the producer's header is
+written, and main() runs it and prints delivery latency.
+"""
+
+import multiprocessing
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+RING_MAGIC = b'MLSIGRNG'
+RING_VERSION = 2
+
+_META = struct.Struct('<8sIIQQ')
+_U64 = struct.Struct('<Q')
+_RECORD = struct.Struct('<Qqqfb3x')
+
+HEAD_OFFSET = 64
+CLOSED_OFFSET = 72
+TAIL_OFFSET = 128
+HEADER_SIZE = 192
+RECORD_SIZE = _RECORD.size
+
+
+def ring_size(capacity):
+    return HEADER_SIZE + capacity * RECORD_SIZE
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _attach(name):
+    """(segment, tracked): map an existing segment, untracked where Python allows it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False), False
+    except TypeError:
+        # Before Python 3.13 every attach registers the segment with this
+        # process's resource tracker, which unlinks it when the process exits
+        return shared_memory.SharedMemory(name=name), True
+
+
+def _release_tracking(shm, producer_pid):
+    """
+    Undo an attach's tracker registration, unless this process shares the
+    producer's tracker (it is the producer, or multiprocessing started it
+    from the producer): there the registration is the producer's own.
+    """
+    parent = multiprocessing.parent_process()
+    if producer_pid in (os.getpid(), parent.pid if parent is not None else None):
+        return
+    if os.name == 'posix':
+        # POSIX segments are tracked under their leading-slash name
+        resource_tracker.unregister('/' + shm.name, 'shared_memory')
+
+
+class SignalRingProducer:
+    """Creates the segment and publishes signals; one producer per ring."""
+
+    def __init__(self, name='ml_signals', capacity=4096):
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError(f"Ring capacity must be a power of two, got {capacity}")
+        self.name = name
+        self.capacity = capacity
+        self.mask = capacity - 1
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=ring_size(capacity))
+        except FileExistsError:
+            self._remove_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=ring_size(capacity))
+        self.buf = self.shm.buf
+        self.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        # Magic last: a consumer that sees it sees zeroed counters
+        _META.pack_into(self.buf, 0, RING_MAGIC, RING_VERSION, RECORD_SIZE, capacity, os.getpid())
+
+        self.head = 0
+        self._tail = 0
+
+        # Statistics
+        self.signals_written = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _remove_stale(name):
+        """Unlink a ring whose producer has died; raise if the segment is live or not a ring."""
+        shm, tracked = _attach(name)
+        try:
+            magic, _, _, _, producer_pid = _META.unpack_from(shm.buf, 0)
+        except struct.error:
+            magic, producer_pid = b'', 0
+        if magic != RING_MAGIC or _pid_alive(producer_pid):
+            if tracked:
+                _release_tracking(shm, producer_pid)
+            shm.close()
+            if magic != RING_MAGIC:
+                raise FileExistsError(f"Shared memory {name!r} exists and is not a signal ring")
+            raise FileExistsError(f"Signal ring {name!r} is in use by producer pid {producer_pid}")
+        print(f"⚠ Removing stale signal ring {name!r} left by pid {producer_pid}")
+        shm.close()
+        shm.unlink()
+
+    def write(self, signal, confidence, tick_ns=0, timestamp_ns=None):
+        """Publish one signal (publish time defaults to now); False if the ring is full."""
+        head = self.head
+        if head - self._tail >= self.capacity:
+            # Cached tail says full; re-read the consumer's counter before giving up
+            self._tail = _U64.unpack_from(self.buf, TAIL_OFFSET)[0]
+            if head - self._tail >= self.capacity:
+                self.dropped += 1
+                return False
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        _RECORD.pack_into(self.buf, HEADER_SIZE + (head & self.mask) * RECORD_SIZE,
+                          head, tick_ns, timestamp_ns, confidence, signal)
+        self.head = head + 1
+        _U64.pack_into(self.buf, HEAD_OFFSET, self.head)
+        self.signals_written += 1
+        return True
+
+    def flush(self):
+        """Nothing to do: a record is visible as soon as write() returns."""
+
+    def close(self, unlink=True):
+        if self.shm is None:
+            return
+        _U64.pack_into(self.buf, CLOSED_OFFSET, 1)
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SignalRingConsumer:
+    """Attaches to a producer's ring and reads records in sequence order."""
+
+    def __init__(self, name='ml_signals'):
+        self.name = name
+        self.shm, tracked = _attach(name)
+        self.buf = self.shm.buf
+        magic, version, record_size, capacity, producer_pid = _META.unpack_from(self.buf, 0)
+        if tracked:
+            # The producer owns the segment; keep this process's tracker from unlinking it at exit
+            _release_tracking(self.shm, producer_pid)
+        if magic != RING_MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory {name!r} is not a signal ring")
+        if version != RING_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Signal ring {name!r}: unsupported version {version} / "
+                             f"record size {record_size}")
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.tail = _U64.unpack_from(self.buf, TAIL_OFFSET)[0]
+
+    @property
+    def producer_closed(self):
+        return _U64.unpack_from(self.buf, CLOSED_OFFSET)[0] == 1
+
+    def poll(self, max_records=None):
+        """All records published since the last call, as (seq, tick_ns, timestamp_ns, signal, confidence)."""
+        head = _U64.unpack_from(self.buf, HEAD_OFFSET)[0]
+        tail = self.tail
+        if max_records is not None:
+            head = min(head, tail + max_records)
+        records = []
+        for seq in range(tail, head):
+            record_seq, tick_ns, timestamp_ns, confidence, signal = _RECORD.unpack_from(
+                self.buf, HEADER_SIZE + (seq & self.mask) * RECORD_SIZE)
+            if record_seq != seq:
+                raise RuntimeError(f"Signal ring {self.name!r}: slot holds seq {record_seq}, expected {seq}")
+            records.append((seq, tick_ns, timestamp_ns, signal, confidence))
+        if head != tail:
+            self.tail = head
+            _U64.pack_into(self.buf, TAIL_OFFSET, head)
+        return records
+
+    def read(self, timeout=None):
+        """Spin until the next record arrives; None on timeout or once the producer has closed."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # closed is set after the last head store, so read it before polling
+            closed = self.producer_closed
+            records = self.poll(max_records=1)
+            if records:
+                return records[0]
+            if closed:
+                return None
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.buf = None
+        self.shm.close()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def wait_for_ring(name='ml_signals', header_timeout=5.0, poll_interval=0.1):
+    """
+    Consumer for `name` once the producer has created the segment and
+    written its header. The producer creates the segment first, so a
+    consumer attaching in between sees no magic (ValueError); that is
+    retried for header_timeout seconds before the segment is taken to be
+    something else.
+    """
+    header_deadline = None
+    while True:
+        try:
+            return SignalRingConsumer(name)
+        except FileNotFoundError:
+            header_deadline = None
+        except ValueError:
+            if header_deadline is None:
+                header_deadline = time.monotonic() + header_timeout
+            elif time.monotonic() > header_deadline:
+                raise
+        time.sleep(poll_interval)
+
+
+def main():
+    print("=" * 80)
+    print("SIGNAL RING REFERENCE CONSUMER")
+    print("=" * 80)
+
+    name = 'ml_signals'
+    consumer = wait_for_ring(name)
+    print(f"✓ Attached to ring {name!r} ({consumer.capacity} slots), reading from seq {consumer.tail}")
+
+    latencies_us = []
+    counts = {1: 0, 0: 0, -1: 0}
+    try:
+        while True:
+            record = consumer.read(timeout=1.0)
+            if record is None:
+                if consumer.producer_closed:
+                    break
+                continue
+            seq, tick_ns, timestamp_ns, signal, confidence = record
+            latencies_us.append((time.time_ns() - timestamp_ns) / 1000)
+            counts[signal] += 1
+            if seq % 1000 == 0:
+                print(f"[{seq:8d}] Signal: {signal:2d} | Conf: {confidence:.4f} | "
+                      f"Latency: {latencies_us[-1]:.1f} µs")
+    except KeyboardInterrupt:
+        print("\nConsumer stopped by user.")
+    finally:
+        consumer.close()
+
+    print("\n" + "=" * 80)
+    print(f"Received {len(latencies_us)} signals "
+          f"(BUY: {counts[1]}, SELL: {counts[-1]}, NEUTRAL: {counts[0]})")
+    if latencies_us:
+        latencies_us.sort()
+        n = len(latencies_us)
+        print(f"Latency µs: p50 {latencies_us[n // 2]:.1f} | p99 {latencies_us[min(n - 1, n * 99 // 100)]:.1f} | "
+              f"max {latencies_us[-1]:.1f}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Buffered, group-committed writer for the signal file the C++ engine tails.
+
+The file stays open for the whole run and signals are appended as
+"signal,confidence" lines in batches, one os.write() per batch, so every
+write ends on a complete line. Durability modes:
+
+  'none'   batches of 65536 lines, never fsynced: maximum throughput
+  'flush'  every batch is handed to the OS right away (visible to the
+           reader), no fsync; a batch also goes out once its oldest line
+           is max_delay_ms old, so a slow signal rate never holds a
+           signal back for a full batch
+  'fsync'  as 'flush', plus group commit: one fsync covers every batch
+           written since the previous one, at most every fsync_interval_ms
+
+Both time bounds are checked on every write(); a producer about to go
+idle calls flush().
+
+close() (or leaving a with-block) writes what is left and, except in
+'none' mode, fsyncs it.
+"""
+
+import os
+import time
+
+
+DURABILITY_MODES = ('none', 'flush', 'fsync')
+DEFAULT_BATCH_SIZE = {'none': 65536, 'flush': 64, 'fsync': 64}
+
+
+class SignalWriter:
+    def __init__(self, path, durability='flush', batch_size=None, fsync_interval_ms=10, max_delay_ms=1,
+                 truncate=False):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability {durability!r} (expected one of {DURABILITY_MODES})")
+        self.path = path
+        self.durability = durability
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE[durability]
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.max_delay = None if durability == 'none' else max_delay_ms / 1000.0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (os.O_TRUNC if truncate else 0)
+        self.fd = os.open(path, flags, 0o644)
+
+        self._lines = []
+        self._oldest = 0.0
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+
+        # Statistics
+        self.signals_written = 0
+        self.writes = 0
+        self.fsyncs = 0
+
+    def write(self, signal, confidence):
+        """Queue one signal; the batch goes out at batch_size lines or once its oldest line is max_delay old."""
+        lines = self._lines
+        lines.append(f"{signal},{confidence:.4f}\n")
+        if len(lines) >= self.batch_size:
+            self.flush()
+            return
+        if self.max_delay is None:
+            return
+        now = time.monotonic()
+        if len(lines) == 1:
+            self._oldest = now
+        if now - self._oldest >= self.max_delay:
+            self.flush()
+        elif self._unsynced and self.durability == 'fsync' and now - self._last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def flush(self):
+        """Hand pending lines to the OS; in 'fsync' mode, commit if the interval is up."""
+        if self._lines:
+            data = ''.join(self._lines).encode()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self.fd, view):]
+            self.signals_written += len(self._lines)
+            self.writes += 1
+            self._lines.clear()
+            self._unsynced = True
+        if self.durability == 'fsync' and self._unsynced:
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self.sync()
+
+    def sync(self):
+        """fsync everything written so far (one fsync for all batches since the last)."""
+        os.fsync(self.fd)
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+        self.fsyncs += 1
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            self.flush()
+            if self.durability != 'none' and self._unsynced:
+                self.sync()
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,175 @@
+"""
+FFT-based feature stage: fractional differencing and trade-flow / quote-mid
+lead-lag cross-correlation.
+
+Fractional differencing convolves the series with a long, slowly decaying
+weight vector; overlap-add FFT convolution makes that O(n log n) instead of
+O(n * k). The full-sample lead-lag profile (every lag at once) is one FFT
+cross-correlation. Per-row lagged correlations for a handful of lags use
+cumulative sums. Streaming classes reproduce the per-row values tick by tick.
+
+scipy is imported by the batch functions only, so the streaming classes
+load with NumPy alone in the live process.
+"""
+
+import numpy as np
+
+
+# ==================== FRACTIONAL DIFFERENCING ====================
+
+def frac_diff_weights(d, threshold=1e-4, max_width=10_000):
+    """Weights w_k of (1 - B)^d, truncated once |w_k| drops below threshold."""
+    weights = [1.0]
+    k = 1
+    while k < max_width:
+        w = -weights[-1] * (d - k + 1) / k
+        if abs(w) < threshold:
+            break
+        weights.append(w)
+        k += 1
+    return np.array(weights)
+
+
+def frac_diff(values, d, threshold=1e-4, max_width=10_000):
+    """
+    Fixed-width fractionally differenced series: sum_k w_k * x[t - k].
+
+    Leading NaNs are skipped; the first len(weights) - 1 valid rows lack a
+    full history and are NaN too. With threshold=1e-4 the weights for d =
+    0.3 / 0.45 / 0.6 are 388 / 238 / 140 long, i.e. a warm-up of up to 387
+    rows against 100 for the longest rolling window; max_width=100 caps it
+    there, dropping weights of up to 6e-4 in magnitude.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    weights = frac_diff_weights(d, threshold, max_width)
+    width = len(weights)
+    out = np.full(len(x), np.nan)
+    finite = np.isfinite(x)
+    if not finite.any():
+        return out
+    start = int(np.argmax(finite))
+    if not finite[start:].all():
+        raise ValueError("frac_diff() does not support NaN/inf after the first valid value")
+    tail = x[start:]
+    if len(tail) >= width:
+        from scipy.signal import oaconvolve
+        out[start + width - 1:] = oaconvolve(tail, weights, mode='full')[width - 1:len(tail)]
+    return out
+
+
+class StreamingFracDiff:
+    """Causal per-tick fractional differencing with a truncated weight buffer."""
+
+    def __init__(self, d, threshold=1e-4, max_width=10_000):
+        self.weights = frac_diff_weights(d, threshold, max_width)
+        self.width = len(self.weights)
+        # Oldest-first weights; history is mirrored so the window is contiguous
+        self._reversed = self.weights[::-1].copy()
+        self._history = np.zeros(2 * self.width)
+        self._pos = 0
+        self.count = 0
+
+    def update(self, x):
+        w = self.width
+        self._history[self._pos] = x
+        self._history[self._pos + w] = x
+        self._pos = (self._pos + 1) % w
+        self.count += 1
+        if self.count < w:
+            return np.nan
+        window = self._history[self._pos:self._pos + w]
+        return float(window @ self._reversed)
+
+
+# ==================== LEAD-LAG CROSS-CORRELATION ====================
+
+def cross_correlation(x, y, max_lag):
+    """
+    Full-sample correlation of x[t - lag] with y[t] for lag in
+    [-max_lag, max_lag], all lags from one FFT. Positive lags mean x leads y.
+    Returns (lags, correlations).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    x = x - x.mean()
+    y = y - y.mean()
+    scale = np.sqrt((x @ x) * (y @ y))
+    lags = np.arange(-max_lag, max_lag + 1)
+    if scale == 0:
+        return lags, np.zeros(len(lags))
+    from scipy.signal import fftconvolve
+    full = fftconvolve(y, x[::-1], mode='full')
+    return lags, full[n - 1 + lags] / scale
+
+
+def _rolling_sum(x, window):
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    return c[window:] - c[:-window]
+
+
+def rolling_lagged_corr(x, y, lag, window):
+    """Per-row correlation of x[t - lag] with y[t] over the trailing window."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    out = np.full(n, np.nan)
+    start = lag + window - 1
+    if n <= start:
+        return out
+
+    xs = x[:n - lag] if lag else x
+    ys = y[lag:]
+    sx, sy = _rolling_sum(xs, window), _rolling_sum(ys, window)
+    sxx, syy = _rolling_sum(xs * xs, window), _rolling_sum(ys * ys, window)
+    sxy = _rolling_sum(xs * ys, window)
+
+    cov = window * sxy - sx * sy
+    den = np.maximum(window * sxx - sx * sx, 0.0) * np.maximum(window * syy - sy * sy, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.where(den > 0, cov / np.sqrt(den), 0.0)
+    out[start:] = np.clip(corr, -1.0, 1.0)
+    return out
+
+
+class StreamingLaggedCorrelation:
+    """O(1) per-tick equivalent of rolling_lagged_corr()."""
+
+    # Re-sum from the window this often to stop rounding drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, lag, window):
+        self.lag = lag
+        self.window = window
+        self._x_history = np.zeros(lag + 1)
+        self._pairs = np.zeros((window, 2))
+        self._seen = 0
+        self._pos = 0
+        self._sums = np.zeros(5)  # sx, sy, sxx, syy, sxy
+
+    def update(self, x, y):
+        self._x_history[self._seen % (self.lag + 1)] = x
+        self._seen += 1
+        if self._seen <= self.lag:
+            return np.nan
+        x_lagged = self._x_history[self._seen % (self.lag + 1)]
+
+        n_pairs = self._seen - self.lag
+        if n_pairs > self.window:
+            ox, oy = self._pairs[self._pos]
+            self._sums -= (ox, oy, ox * ox, oy * oy, ox * oy)
+        self._pairs[self._pos] = (x_lagged, y)
+        self._pos = (self._pos + 1) % self.window
+        self._sums += (x_lagged, y, x_lagged * x_lagged, y * y, x_lagged * y)
+        if n_pairs % self.RESYNC_EVERY == 0:
+            px, py = self._pairs[:min(n_pairs, self.window)].T
+            self._sums[:] = (px.sum(), py.sum(), px @ px, py @ py, px @ py)
+        if n_pairs < self.window:
+            return np.nan
+
+        sx, sy, sxx, syy, sxy = self._sums
+        w = self.window
+        den = max(w * sxx - sx * sx, 0.0) * max(w * syy - sy * sy, 0.0)
+        if den <= 0:
+            return 0.0
+        return float(np.clip((w * sxy - sx * sy) / np.sqrt(den), -1.0, 1.0))
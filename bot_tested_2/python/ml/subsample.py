@@ -0,0 +1,162 @@
+"""
+Time-aware stratified reservoir subsampler for training sets.
+
+Consecutive tick rows are near-duplicates in feature space, so training on
+all of them mostly burns CPU. The sampler makes one pass over the feature
+store (in chunks) and keeps a bounded reservoir per (time bucket, label)
+stratum, so every period and both classes stay represented no matter how
+long the history is. Training cost then follows the row budget instead of
+the data size.
+
+Reservoirs use priority sampling: each row gets priority w / u with
+u ~ U(0, 1] and the k highest priorities are kept. With w = 1 this is a
+plain uniform reservoir; with w = volatility it favours turbulent periods.
+Each kept row records the Horvitz-Thompson weight max(w, tau) / w, where
+tau is the highest priority ever dropped from its stratum, so weighted
+metrics on the sample are unbiased estimates of the full-data metrics.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+NS_PER_HOUR = 3_600_000_000_000
+
+
+class _Stratum:
+    """Kept rows of one (bucket, label) stratum, with priorities and weights."""
+
+    def __init__(self):
+        self.rows = None
+        self.priority = np.empty(0)
+        self.weight = np.empty(0)
+        self.position = np.empty(0, dtype=np.int64)
+        self.seen = 0
+        self.tau = 0.0
+
+    def add(self, rows, priority, weight, position, capacity):
+        self.seen += len(rows)
+        self.rows = rows if self.rows is None else pd.concat([self.rows, rows])
+        self.priority = np.concatenate([self.priority, priority])
+        self.weight = np.concatenate([self.weight, weight])
+        self.position = np.concatenate([self.position, position])
+        if len(self.priority) > capacity:
+            self.shrink(capacity)
+
+    def shrink(self, capacity):
+        """Keep the `capacity` highest priorities; tau tracks the best one dropped."""
+        order = np.argsort(-self.priority, kind='stable')
+        self.tau = max(self.tau, float(self.priority[order[capacity]]))
+        keep = np.sort(order[:capacity])
+        self.rows = self.rows.iloc[keep]
+        self.priority = self.priority[keep]
+        self.weight = self.weight[keep]
+        self.position = self.position[keep]
+
+    def sample_weight(self):
+        return np.maximum(self.weight, self.tau) / self.weight
+
+
+class StratifiedReservoirSampler:
+    """
+    One-pass reservoir per (time bucket, label).
+
+    rows_per_stratum bounds the memory of each reservoir; budget (if set)
+    caps the final sample by shrinking the largest reservoirs to a common
+    size. weight_col (e.g. 'volatility_20') makes the reservoirs favour rows
+    where it is high, raised to weight_power.
+    """
+
+    def __init__(self, rows_per_stratum=5_000, budget=None, bucket_ns=NS_PER_HOUR,
+                 time_col='timestamp', label_col='target', weight_col=None,
+                 weight_power=1.0, min_weight=1e-12, random_state=42):
+        if rows_per_stratum < 1:
+            raise ValueError(f"rows_per_stratum must be positive, got {rows_per_stratum}")
+        self.rows_per_stratum = rows_per_stratum
+        self.budget = budget
+        self.bucket_ns = bucket_ns
+        self.time_col = time_col
+        self.label_col = label_col
+        self.weight_col = weight_col
+        self.weight_power = weight_power
+        self.min_weight = min_weight
+        self.random_state = random_state
+        self.reset()
+
+    def reset(self):
+        self.strata = {}
+        self.n_seen = 0
+        self._rng = np.random.default_rng(self.random_state)
+
+    def _weights(self, chunk):
+        if self.weight_col is None:
+            return np.ones(len(chunk))
+        w = np.nan_to_num(chunk[self.weight_col].to_numpy(dtype=np.float64), nan=0.0,
+                          posinf=0.0, neginf=0.0)
+        return np.maximum(np.maximum(w, 0.0) ** self.weight_power, self.min_weight)
+
+    def update(self, chunk):
+        """Offer the rows of one time-ordered chunk to the reservoirs."""
+        n = len(chunk)
+        if n == 0:
+            return self
+        bucket = chunk[self.time_col].to_numpy(dtype=np.int64) // self.bucket_ns
+        label = chunk[self.label_col].to_numpy(dtype=np.int64)
+        weight = self._weights(chunk)
+        priority = weight / (1.0 - self._rng.random(n))
+        position = np.arange(self.n_seen, self.n_seen + n)
+
+        keys = np.stack([bucket, label], axis=1)
+        strata, inverse = np.unique(keys, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse.ravel(), minlength=len(strata)))]
+        for s, (b, lab) in enumerate(strata):
+            idx = order[bounds[s]:bounds[s + 1]]
+            key = (int(b), int(lab))
+            if key not in self.strata:
+                self.strata[key] = _Stratum()
+            self.strata[key].add(chunk.iloc[idx], priority[idx], weight[idx], position[idx],
+                                 self.rows_per_stratum)
+        self.n_seen += n
+        return self
+
+    def _budget_capacity(self):
+        """Largest common reservoir size that keeps the total within budget."""
+        sizes = np.array([len(s.priority) for s in self.strata.values()])
+        if self.budget is None or sizes.sum() <= self.budget:
+            return None
+        lo, hi = 1, int(sizes.max())
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if np.minimum(sizes, mid).sum() <= self.budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def sample(self):
+        """Kept rows in stream order, with a 'sample_weight' column."""
+        if not self.strata:
+            raise ValueError("No rows were offered to the sampler")
+        capacity = self._budget_capacity()
+        frames, positions = [], []
+        for stratum in self.strata.values():
+            if capacity is not None and len(stratum.priority) > capacity:
+                stratum.shrink(capacity)
+            frame = stratum.rows.copy()
+            frame['sample_weight'] = stratum.sample_weight()
+            frames.append(frame)
+            positions.append(stratum.position)
+        order = np.argsort(np.concatenate(positions), kind='stable')
+        df = pd.concat(frames).iloc[order].reset_index(drop=True)
+
+        print(f"Subsampled {len(df)} of {self.n_seen} rows from {len(self.strata)} "
+              f"(bucket, label) strata (represents {df['sample_weight'].sum():.0f} rows)")
+        return df
+
+    def sample_csv(self, path, chunksize=200_000, **read_csv_kwargs):
+        """Stream a features CSV through the sampler and return the sample."""
+        self.reset()
+        for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+            self.update(chunk)
+        return self.sample()
@@ -12,94 +12,302 @@ from sklearn.model_selection import TimeSeriesSplit, cross_val_score
 from sklearn.metrics import (accuracy_score, f1_score, roc_auc_score, 
                              precision_score, recall_score, classification_report)
 import joblib
+import hashlib
+import json
 import os
+import sys
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bars import BAR_COLUMNS
+from binning import QuantileBinner, BinnedMatrix
+from out_of_core import PartitionedFeatures, PartitionSource, ScaledTransform
+from artifact import export_artifact
+from feature_cost import FeatureCostProfiler
+from flat_ensemble import FlatEnsemble
+from pruning import LatencyPruner
+from shared_arrays import SHARED, share_array, attach_shared, release
+from warm_start import refit_scaler, scaler_affine, remap_lgb_booster, remap_xgb_booster, remap_binner
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow  # noqa: F401  (optional, multi-threaded CSV parsing)
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Identifiers, raw inputs, bar aggregates and label columns that are never model features
+EXCLUDE_COLUMNS = ['timestamp', 'datetime_trade', 'datetime_quote', 'side',
+                   'target', 'future_mid', 'future_return', 'price', 'bid_price',
+                   'ask_price', 'quantity', 'sample_weight'] + BAR_COLUMNS
+
+ENSEMBLE_MEMBERS = ('lightgbm', 'xgboost', 'random_forest')
+
+# Per-signal inference budget for the pruned deployment variant
+LATENCY_BUDGET_US = 100
+
+# Default member hyperparameters (boosting rounds / tree counts included)
+MEMBER_PARAMS = {
+    'lightgbm': {
+        'objective': 'binary',
+        'metric': 'auc',
+        'num_leaves': 31,
+        'learning_rate': 0.05,
+        'feature_fraction': 0.8,
+        'bagging_fraction': 0.8,
+        'min_data_in_leaf': 50,
+        'verbose': -1,
+        'num_boost_round': 200,
+    },
+    'xgboost': {
+        'max_depth': 5,
+        'learning_rate': 0.05,
+        'n_estimators': 200,
+        'subsample': 0.8,
+        'colsample_bytree': 0.8,
+        'random_state': 42,
+        'eval_metric': 'auc',
+    },
+    'random_forest': {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'min_samples_leaf': 50,
+        'random_state': 42,
+    },
+}
+
+# XGBClassifier parameter names that the native xgb.train API spells differently
+XGB_NATIVE_NAMES = {'learning_rate': 'eta', 'random_state': 'seed', 'n_estimators': 'num_boost_round'}
+
+
+def xgb_native_params(params, n_jobs=-1):
+    """(xgb.train params, num_boost_round) equivalent to XGBClassifier(**params)."""
+    native = {'objective': 'binary:logistic', 'tree_method': 'hist', 'nthread': n_jobs, 'verbosity': 0}
+    native.update({XGB_NATIVE_NAMES.get(key, key): value for key, value in params.items()})
+    return native, native.pop('num_boost_round')
+
+
+def _fold_member_task(fold, member, train_stop, test_start, test_stop, n_threads, binned=False,
+                      params=None):
+    """Train one ensemble member on one walk-forward fold and score its test slice."""
+    X = SHARED['X'][1]
+    y = SHARED['y'][1]
+    binned_matrix = None
+    if binned:
+        # Built once per worker, then reused by every fold it trains
+        if 'binned' not in SHARED:
+            SHARED['binned'] = (None, BinnedMatrix(X, y))
+        binned_matrix = SHARED['binned'][1]
+    model = OptimizedModelTrainer._train_member(member, X[:train_stop], y[:train_stop],
+                                                n_jobs=n_threads, source=binned_matrix, params=params)
+    return fold, member, OptimizedModelTrainer._predict_member(model, X[test_start:test_stop])
+
 
 class OptimizedModelTrainer:
-    def __init__(self, features_path='data/processed/features_comprehensive.csv'):
+    def __init__(self, features_path='data/processed/features_comprehensive.csv', compact=False,
+                 selection_cache_dir='models/feature_selection_cache', mi_sample_size=50_000,
+                 target_config=None, prebin=False, subsampler=None, tick_budget_us=None):
         self.features_path = features_path
+        # Per-tick CPU budget (µs) for live feature updates; when set, features
+        # are selected by importance per µs of update cost (see feature_cost.py)
+        self.tick_budget_us = tick_budget_us
+        self.feature_costs = None
+        # Optional subsample.StratifiedReservoirSampler applied while loading;
+        # its sample weights are used for every evaluation metric
+        self.subsampler = subsampler
+        self.sample_weight = None
+        # Prebin mode: quantize the scaled matrix once into uint8 bins shared by
+        # every ensemble member and fold (prepare_data then returns the codes)
+        self.prebin = prebin
+        self.binner = None
+        self.binned = None
+        # Compact mode: read feature columns as float32 with a typed CSV parse
+        self.compact = compact
+        # Feature selection results are cached per (feature store version, target config);
+        # set selection_cache_dir=None to always recompute
+        self.selection_cache_dir = selection_cache_dir
+        self.mi_sample_size = mi_sample_size
+        self.target_config = target_config or {}
         self.models = {}
+        # Per-member overrides of MEMBER_PARAMS (e.g. from hyperparameter_search)
+        self.member_params = {}
         self.feature_names = None
         self.scaler = StandardScaler()
+        self.fill_values = None
         self.selected_features = None
         
     def load_features(self):
         """Load engineered features."""
         print("Loading features...")
-        df = pd.read_csv(self.features_path)
-        print(f"Loaded {len(df)} samples with {len(df.columns)} columns")
+        if self.compact:
+            columns = pd.read_csv(self.features_path, nrows=0).columns
+            dtypes = {col: np.float32 for col in columns if col not in EXCLUDE_COLUMNS}
+            dtypes.update({'timestamp': np.int64, 'side': 'category', 'target': np.int8})
+            dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+        else:
+            dtypes = None
+        if self.subsampler is not None:
+            df = self.subsampler.sample_csv(self.features_path, dtype=dtypes)
+        elif self.compact:
+            df = pd.read_csv(self.features_path, dtype=dtypes, engine=CSV_ENGINE)
+        else:
+            df = pd.read_csv(self.features_path)
+        print(f"Loaded {len(df)} samples with {len(df.columns)} columns "
+              f"({df.memory_usage(deep=True, index=False).sum() / max(len(df), 1):.1f} bytes/row)")
         return df
     
+    def feature_store_version(self, columns):
+        """Identify the feature file by size, mtime and column layout."""
+        try:
+            stat = os.stat(self.features_path)
+            stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            stamp = "in-memory"
+        digest = hashlib.sha1(f"{stamp}|{'|'.join(columns)}".encode()).hexdigest()
+        return digest[:16]
+
+    def _selection_cache_path(self, X, y, n_features):
+        key = json.dumps({
+            'feature_store': self.feature_store_version(list(X.columns)),
+            'target': self.target_config,
+            'target_hash': hashlib.sha1(np.ascontiguousarray(y).tobytes()).hexdigest()[:16],
+            'n_features': n_features,
+            'mi_sample_size': self.mi_sample_size,
+        }, sort_keys=True)
+        name = hashlib.sha1(key.encode()).hexdigest()[:20]
+        return os.path.join(self.selection_cache_dir, f"selection_{name}.json")
+
     def select_features(self, X, y, n_features=100):
         """Select top features using multiple methods."""
         print(f"\nSelecting top {n_features} features...")
         
-        # Method 1: Correlation with target
-        correlations = []
-        for i, col in enumerate(X.columns):
-            try:
-                corr = np.corrcoef(X.iloc[:, i].fillna(0), y)[0, 1]
-                correlations.append((col, abs(corr)))
-            except:
-                pass
-        
-        top_corr = sorted(correlations, key=lambda x: x[1], reverse=True)[:n_features//3]
-        top_corr_features = [x[0] for x in top_corr]
+        cache_path = None
+        if self.selection_cache_dir is not None:
+            cache_path = self._selection_cache_path(X, y, n_features)
+            if os.path.exists(cache_path):
+                with open(cache_path) as fh:
+                    cached = json.load(fh)
+                self.selected_features = cached['selected_features']
+                print(f"✓ Loaded {len(self.selected_features)} selected features from cache: {cache_path}")
+                return self.selected_features
+        
+        X_filled = X.fillna(0)
+        per_method = n_features // 3
+        
+        # Method 1: Correlation with target (all columns in one matrix pass)
+        Xv = X_filled.to_numpy(dtype=np.float64)
+        Xc = Xv - Xv.mean(axis=0)
+        yc = y - y.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = (Xc.T @ yc) / (np.sqrt((Xc * Xc).sum(axis=0)) * np.sqrt(yc @ yc))
+        corr = np.nan_to_num(np.abs(corr), nan=0.0)
+        top_corr_features = self._rank(X.columns, corr)[:per_method]
         
         print(f"  Top correlated features: {len(top_corr_features)}")
         
-        # Method 2: Mutual information
+        # Method 2: Mutual information on a stratified subsample
         from sklearn.feature_selection import mutual_info_classif
-        mi_scores = mutual_info_classif(X.fillna(0), y, random_state=42)
-        mi_ranking = sorted(zip(X.columns, mi_scores), key=lambda x: x[1], reverse=True)
-        top_mi_features = [x[0] for x in mi_ranking[:n_features//3]]
-        
-        print(f"  Top MI features: {len(top_mi_features)}")
+        if len(y) > self.mi_sample_size:
+            from sklearn.model_selection import train_test_split
+            sample_idx, _ = train_test_split(np.arange(len(y)), train_size=self.mi_sample_size,
+                                             stratify=y, random_state=42)
+            sample_idx = np.sort(sample_idx)
+        else:
+            sample_idx = np.arange(len(y))
+        mi_scores = mutual_info_classif(Xv[sample_idx], y[sample_idx], random_state=42)
+        top_mi_features = self._rank(X.columns, mi_scores)[:per_method]
+        
+        print(f"  Top MI features: {len(top_mi_features)} (on {len(sample_idx)} rows)")
         
         # Method 3: LightGBM feature importance
-        train_data = lgb.Dataset(X.fillna(0), label=y)
+        train_data = lgb.Dataset(X_filled, label=y)
         lgb_model = lgb.train(
-            {'objective': 'binary', 'verbose': -1},
+            {'objective': 'binary', 'verbose': -1, 'seed': 42, 'deterministic': True},
             train_data,
             num_boost_round=100
         )
         lgb_importance = lgb_model.feature_importance()
-        lgb_ranking = sorted(zip(X.columns, lgb_importance), key=lambda x: x[1], reverse=True)
-        top_lgb_features = [x[0] for x in lgb_ranking[:n_features//3]]
+        top_lgb_features = self._rank(X.columns, lgb_importance)[:per_method]
         
         print(f"  Top LightGBM features: {len(top_lgb_features)}")
         
-        # Combine: take union of top features from all methods
-        combined_features = list(set(top_corr_features + top_mi_features + top_lgb_features))
+        # Combine: ordered union, deduplicated in method order for reproducibility
+        combined_features = list(dict.fromkeys(top_corr_features + top_mi_features + top_lgb_features))
         self.selected_features = combined_features[:n_features]
         
+        if cache_path is not None:
+            os.makedirs(self.selection_cache_dir, exist_ok=True)
+            with open(cache_path, 'w') as fh:
+                json.dump({'selected_features': self.selected_features,
+                           'features_path': self.features_path,
+                           'target_config': self.target_config}, fh, indent=2)
+        
         print(f"\n✓ Selected {len(self.selected_features)} features")
         return self.selected_features
+
+    def select_features_cost_aware(self, df, X, y, tick_budget_us, n_features=100, profiler=None):
+        """
+        Select features by LightGBM gain importance per µs of live update cost
+        while the per-tick cost of the set fits tick_budget_us. Costs are
+        profiled on the raw trade / quote columns of df.
+        """
+        print(f"\nSelecting up to {n_features} features within {tick_budget_us:.1f} µs/tick...")
+        profiler = profiler or FeatureCostProfiler()
+        if profiler.costs is None:
+            profiler.profile(df)
+        
+        lgb_model = lgb.train(
+            {'objective': 'binary', 'verbose': -1, 'seed': 42, 'deterministic': True},
+            lgb.Dataset(X.fillna(0), label=y),
+            num_boost_round=100
+        )
+        importance = pd.Series(lgb_model.feature_importance(importance_type='gain'), index=X.columns)
+        importance = importance / max(importance.sum(), 1e-12)
+        
+        self.selected_features = profiler.select(importance, tick_budget_us, n_features)
+        table = profiler.print_breakdown(self.selected_features, tick_budget_us)
+        all_cost = profiler.tick_cost(list(X.columns))
+        print(f"\n✓ Selected {len(self.selected_features)} features: "
+              f"{importance[self.selected_features].sum():.1%} of importance at "
+              f"{table['tick_us'].sum():.1f} µs/tick (all {X.shape[1]}: {all_cost:.1f} µs/tick)")
+        
+        self.feature_costs = {
+            'tick_budget_us': tick_budget_us,
+            'groups': table.to_dict('index'),
+            'features': profiler.feature_costs().reindex(self.selected_features).to_dict('index'),
+        }
+        return self.selected_features
+
+    @staticmethod
+    def _rank(columns, scores):
+        """Columns by descending score; ties keep column order."""
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+        return [columns[i] for i in order]
     
     def prepare_data(self, df):
         """Prepare features and target."""
         print("\nPreparing data...")
         
-        exclude_cols = ['timestamp', 'datetime_trade', 'datetime_quote', 'side', 
-                       'target', 'future_mid', 'future_return', 'price', 'bid_price', 
-                       'ask_price', 'quantity']
-        
-        feature_cols = [col for col in df.columns if col not in exclude_cols and col in df.columns]
+        feature_cols = [col for col in df.columns if col not in EXCLUDE_COLUMNS]
         
         # Select features if not already done
         if self.selected_features is None:
             X = df[feature_cols].copy()
             y = df['target'].values
-            self.select_features(X, y, n_features=100)
+            if self.tick_budget_us is not None:
+                self.select_features_cost_aware(df, X, y, self.tick_budget_us, n_features=100)
+            else:
+                self.select_features(X, y, n_features=100)
         
         X = df[self.selected_features].copy()
         y = df['target'].values
+        self.sample_weight = df['sample_weight'].to_numpy() if 'sample_weight' in df.columns else None
         
         # Handle NaN and inf
         X = X.replace([np.inf, -np.inf], np.nan)
-        X = X.fillna(X.median())
+        medians = X.median()
+        X = X.fillna(medians)
+        self.fill_values = medians.to_numpy(dtype=np.float64)
         
         self.feature_names = list(X.columns)
         
@@ -109,47 +317,50 @@ class OptimizedModelTrainer:
         print(f"Feature matrix: {X_scaled.shape}")
         print(f"Target distribution: {np.bincount(y)}")
         
+        if self.prebin:
+            self.binner = QuantileBinner()
+            codes = self.binner.fit_transform(X_scaled)
+            self.binned = BinnedMatrix(codes, y)
+            print(f"Prebinned into uint8 codes: {X_scaled.nbytes / 1e6:.1f} MB -> {codes.nbytes / 1e6:.1f} MB")
+            return codes, y
+        
         return X_scaled, y
     
-    def walk_forward_validation(self, X, y, n_splits=5):
-        """Time-series cross-validation."""
+    def walk_forward_validation(self, X, y, n_splits=5, n_workers=1):
+        """
+        Time-series cross-validation.
+        
+        With n_workers > 1, every (fold, member) pair is trained in a process
+        pool reading X / y from shared memory, each task limited to
+        cpu_count // n_workers threads; fold metrics print as folds complete.
+        """
         print("\n" + "=" * 80)
         print("WALK-FORWARD VALIDATION")
         print("=" * 80)
         
         tscv = TimeSeriesSplit(n_splits=n_splits)
-        results = []
-        
-        for fold, (train_idx, test_idx) in enumerate(tscv.split(X)):
-            print(f"\nFold {fold + 1}/{n_splits}")
-            
-            X_train, X_test = X[train_idx], X[test_idx]
-            y_train, y_test = y[train_idx], y[test_idx]
-            
-            print(f"  Train: {len(train_idx)}, Test: {len(test_idx)}")
-            
-            # Train ensemble
-            models = self._train_ensemble(X_train, y_train)
-            
-            # Predict with ensemble
-            y_pred_proba = np.mean([
-                model.predict_proba(X_test)[:, 1] if hasattr(model, 'predict_proba') 
-                else model.predict(X_test) 
-                for model in models
-            ], axis=0)
-            
-            y_pred = (y_pred_proba > 0.5).astype(int)
-            
-            acc = accuracy_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred)
-            try:
-                auc = roc_auc_score(y_test, y_pred_proba)
-            except:
-                auc = 0.5
-            
-            results.append({'acc': acc, 'f1': f1, 'auc': auc})
-            
-            print(f"  Accuracy: {acc:.4f} | F1: {f1:.4f} | AUC: {auc:.4f}")
+        splits = list(tscv.split(X))
+        
+        if n_workers > 1:
+            fold_metrics = self._parallel_walk_forward(X, y, splits, n_workers)
+            results = [fold_metrics[fold] for fold in range(len(splits))]
+        else:
+            results = []
+            for fold, (train_idx, test_idx) in enumerate(splits):
+                print(f"\nFold {fold + 1}/{n_splits}")
+                
+                X_train, X_test = X[train_idx], X[test_idx]
+                y_train, y_test = y[train_idx], y[test_idx]
+                
+                print(f"  Train: {len(train_idx)}, Test: {len(test_idx)}")
+                
+                # Train ensemble
+                models = self._train_ensemble(X_train, y_train)
+                
+                # Predict with ensemble
+                y_pred_proba = np.mean([self._predict_member(model, X_test) for model in models], axis=0)
+                
+                results.append(self._fold_metrics(y_test, y_pred_proba, self._weights(test_idx)))
         
         mean_acc = np.mean([r['acc'] for r in results])
         std_acc = np.std([r['acc'] for r in results])
@@ -164,56 +375,141 @@ class OptimizedModelTrainer:
         
         return mean_acc, std_acc, mean_f1
     
-    def _train_ensemble(self, X_train, y_train):
-        """Train ensemble of models."""
-        models = []
+    def _parallel_walk_forward(self, X, y, splits, n_workers):
+        """Run fold x member tasks in a process pool over shared-memory X / y."""
+        for train_idx, test_idx in splits:
+            if train_idx[0] != 0 or np.any(np.diff(train_idx) != 1) or np.any(np.diff(test_idx) != 1):
+                raise ValueError("Parallel walk-forward needs contiguous expanding-window splits")
+        
+        n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+        print(f"Running {len(splits) * len(ENSEMBLE_MEMBERS)} fold x member tasks on "
+              f"{n_workers} workers ({n_threads} threads each)")
+        
+        X_shm, X_spec = share_array(np.ascontiguousarray(X))
+        y_shm, y_spec = share_array(np.ascontiguousarray(y))
+        member_probas = {fold: {} for fold in range(len(splits))}
+        fold_metrics = {}
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=attach_shared,
+                                     initargs=({'X': X_spec, 'y': y_spec},)) as pool:
+                futures = [
+                    pool.submit(_fold_member_task, fold, member, len(train_idx),
+                                test_idx[0], test_idx[-1] + 1, n_threads, self.binned is not None,
+                                self.member_params.get(member))
+                    for fold, (train_idx, test_idx) in enumerate(splits)
+                    for member in ENSEMBLE_MEMBERS
+                ]
+                for future in as_completed(futures):
+                    fold, member, proba = future.result()
+                    member_probas[fold][member] = proba
+                    if len(member_probas[fold]) < len(ENSEMBLE_MEMBERS):
+                        continue
+                    
+                    train_idx, test_idx = splits[fold]
+                    print(f"\nFold {fold + 1}/{len(splits)} complete "
+                          f"(Train: {len(train_idx)}, Test: {len(test_idx)})")
+                    y_pred_proba = np.mean([member_probas[fold][m] for m in ENSEMBLE_MEMBERS], axis=0)
+                    fold_metrics[fold] = self._fold_metrics(y[test_idx], y_pred_proba, self._weights(test_idx))
+        finally:
+            release([X_shm, y_shm])
+        
+        return fold_metrics
+    
+    def _weights(self, idx):
+        """Sample weights of rows idx, or None for an unweighted training set."""
+        return None if self.sample_weight is None else self.sample_weight[idx]
+    
+    @staticmethod
+    def _fold_metrics(y_test, y_pred_proba, sample_weight=None):
+        y_pred = (y_pred_proba > 0.5).astype(int)
         
-        # LightGBM
-        train_data = lgb.Dataset(X_train, label=y_train)
-        lgb_model = lgb.train(
-            {
-                'objective': 'binary',
-                'metric': 'auc',
-                'num_leaves': 31,
-                'learning_rate': 0.05,
-                'feature_fraction': 0.8,
-                'bagging_fraction': 0.8,
-                'min_data_in_leaf': 50,
-                'verbose': -1,
-            },
-            train_data,
-            num_boost_round=200
-        )
-        models.append(lgb_model)
-        
-        # XGBoost
-        xgb_model = xgb.XGBClassifier(
-            max_depth=5,
-            learning_rate=0.05,
-            n_estimators=200,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            verbose=0,
-            n_jobs=-1,
-            use_label_encoder=False,
-            eval_metric='auc'
-        )
-        xgb_model.fit(X_train, y_train)
-        models.append(xgb_model)
-        
-        # Random Forest
-        rf_model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_leaf=50,
-            n_jobs=-1,
-            random_state=42
-        )
-        rf_model.fit(X_train, y_train)
-        models.append(rf_model)
+        acc = accuracy_score(y_test, y_pred, sample_weight=sample_weight)
+        f1 = f1_score(y_test, y_pred, sample_weight=sample_weight)
+        try:
+            auc = roc_auc_score(y_test, y_pred_proba, sample_weight=sample_weight)
+        except ValueError:
+            auc = 0.5
         
-        return models
+        print(f"  Accuracy: {acc:.4f} | F1: {f1:.4f} | AUC: {auc:.4f}")
+        return {'acc': acc, 'f1': f1, 'auc': auc}
+    
+    def _train_ensemble(self, X_train, y_train, n_jobs=-1):
+        """Train ensemble of models."""
+        return [self._train_member(name, X_train, y_train, n_jobs=n_jobs, source=self.binned,
+                                   params=self.member_params.get(name))
+                for name in ENSEMBLE_MEMBERS]
+    
+    @staticmethod
+    def _train_member(name, X_train, y_train, n_jobs=-1, source=None, params=None, init_model=None):
+        """
+        Train one ensemble member; n_jobs=-1 uses every core.
+        
+        params overrides MEMBER_PARAMS[name]; init_model continues boosting
+        from a previous LightGBM / XGBoost model (params' rounds are added).
+        With a training source (binning.BinnedMatrix or out_of_core.PartitionSource),
+        y_train must be its first rows and the member trains from the source's
+        datasets instead of X_train (which may then be None). A source may
+        return no RandomForest set, in which case None is returned.
+        """
+        params = dict(MEMBER_PARAMS[name], **(params or {}))
+        stop = len(y_train)
+        if name == 'lightgbm':
+            if source is not None:
+                train_data = source.lgb_train_set(stop)
+            else:
+                train_data = lgb.Dataset(X_train, label=y_train)
+            num_boost_round = params.pop('num_boost_round')
+            params['num_threads'] = max(n_jobs, 0)
+            return lgb.train(params, train_data, num_boost_round=num_boost_round, init_model=init_model)
+        
+        if name == 'xgboost':
+            if isinstance(init_model, xgb.XGBModel):
+                init_model = init_model.get_booster()
+            if source is not None:
+                # Native API on the source's QuantileDMatrix, same parameters as XGBClassifier
+                native, num_boost_round = xgb_native_params(params, n_jobs)
+                return xgb.train(native, source.xgb_train_matrix(stop),
+                                 num_boost_round=num_boost_round, xgb_model=init_model)
+            xgb_model = xgb.XGBClassifier(
+                **params,
+                verbose=0,
+                n_jobs=n_jobs,
+                use_label_encoder=False
+            )
+            xgb_model.fit(X_train, y_train, xgb_model=init_model)
+            return xgb_model
+        
+        if name == 'random_forest':
+            if source is not None:
+                rf_set = source.rf_train_set(stop)
+                if rf_set is None:
+                    return None
+                X_train, y_train = rf_set
+            rf_model = RandomForestClassifier(**params, n_jobs=n_jobs)
+            rf_model.fit(X_train, y_train)
+            return rf_model
+        
+        raise ValueError(f"Unknown ensemble member: {name!r}")
+    
+    @staticmethod
+    def _predict_member(model, X):
+        """Up-probability from any ensemble member (LightGBM boosters predict it directly)."""
+        if hasattr(model, 'predict_proba'):
+            return model.predict_proba(X)[:, 1]
+        if isinstance(model, xgb.Booster):
+            return model.predict(xgb.DMatrix(X))
+        return model.predict(X)
+    
+    @staticmethod
+    def _member_name(model):
+        """ENSEMBLE_MEMBERS name of a trained member."""
+        if isinstance(model, lgb.Booster):
+            return 'lightgbm'
+        if isinstance(model, (xgb.Booster, xgb.XGBModel)):
+            return 'xgboost'
+        if isinstance(model, RandomForestClassifier):
+            return 'random_forest'
+        raise ValueError(f"Unknown ensemble member type: {type(model).__name__}")
     
     def train_final_model(self, X, y):
         """Train final ensemble model."""
@@ -227,40 +523,237 @@ class OptimizedModelTrainer:
         self.models = models
         
         # Evaluate
-        y_pred_proba = np.mean([
-            m.predict_proba(X_test)[:, 1] if hasattr(m, 'predict_proba') 
-            else m.predict(X_test) 
-            for m in models
-        ], axis=0)
+        y_pred_proba = np.mean([self._predict_member(m, X_test) for m in models], axis=0)
         
         y_pred = (y_pred_proba > 0.5).astype(int)
+        w = self._weights(slice(split_idx, None))
         
         print("\n" + "=" * 80)
         print("FINAL MODEL EVALUATION")
         print("=" * 80)
-        print(f"Accuracy: {accuracy_score(y_test, y_pred):.4f}")
-        print(f"F1-Score: {f1_score(y_test, y_pred):.4f}")
-        print(f"Precision: {precision_score(y_test, y_pred):.4f}")
-        print(f"Recall: {recall_score(y_test, y_pred):.4f}")
-        print(f"AUC: {roc_auc_score(y_test, y_pred_proba):.4f}")
+        print(f"Accuracy: {accuracy_score(y_test, y_pred, sample_weight=w):.4f}")
+        print(f"F1-Score: {f1_score(y_test, y_pred, sample_weight=w):.4f}")
+        print(f"Precision: {precision_score(y_test, y_pred, sample_weight=w):.4f}")
+        print(f"Recall: {recall_score(y_test, y_pred, sample_weight=w):.4f}")
+        print(f"AUC: {roc_auc_score(y_test, y_pred_proba, sample_weight=w):.4f}")
         print("\nClassification Report:")
-        print(classification_report(y_test, y_pred, target_names=['Down', 'Up']))
+        print(classification_report(y_test, y_pred, target_names=['Down', 'Up'], sample_weight=w))
         
-        return accuracy_score(y_test, y_pred)
+        return accuracy_score(y_test, y_pred, sample_weight=w)
     
-    def save_model(self, output_dir='models/'):
-        """Save trained models."""
-        os.makedirs(output_dir, exist_ok=True)
+    def train_out_of_core(self, spill_dir='data/processed/spill', chunksize=200_000,
+                          reservoir_size=200_000, test_fraction=0.2, rf_sample=True):
+        """
+        Train the final ensemble without loading the features file into RAM.
+        
+        One streaming pass spills the CSV to float32 partitions under spill_dir
+        and collects scaler moments plus a row reservoir. Features are selected
+        on the reservoir, fill medians come from it, and RandomForest trains on
+        its rows inside the training range (rf_sample=False skips RandomForest).
+        LightGBM and XGBoost read the partitions batch by batch. Returns the
+        holdout AUC on the last test_fraction of rows.
+        """
+        print("\n" + "=" * 80)
+        print("OUT-OF-CORE TRAINING")
+        print("=" * 80)
         
-        model_data = {
-            'models': self.models,
+        store = PartitionedFeatures(self.features_path, spill_dir, EXCLUDE_COLUMNS,
+                                    chunksize=chunksize, reservoir_size=reservoir_size).scan()
+        if self.selected_features is None:
+            X_sample, y_sample = store.sample_frame()
+            self.select_features(X_sample, y_sample, n_features=100)
+        
+        self.feature_names = list(self.selected_features)
+        columns = [store.feature_names.index(col) for col in self.feature_names]
+        self.scaler, self.fill_values = store.fit_scaler(self.feature_names)
+        transform = ScaledTransform(self.fill_values, self.scaler)
+        source = PartitionSource(store, columns, transform, rf_sample=rf_sample)
+        
+        split_idx = int(len(store) * (1 - test_fraction))
+        y_train = store.labels(0, split_idx)
+        print(f"Train: {split_idx}, Test: {len(store) - split_idx}")
+        
+        models = [self._train_member(name, None, y_train, source=source,
+                                     params=self.member_params.get(name))
+                  for name in ENSEMBLE_MEMBERS]
+        self.models = [model for model in models if model is not None]
+        
+        # Score the holdout partition by partition
+        probas, labels = [], []
+        for X_batch, y_batch, _ in store.batches(columns, transform, split_idx):
+            probas.append(np.mean([self._predict_member(m, X_batch) for m in self.models],
+                                  axis=0).astype(np.float32))
+            labels.append(y_batch)
+        y_test, y_pred_proba = np.concatenate(labels), np.concatenate(probas)
+        self._fold_metrics(y_test, y_pred_proba)
+        return roc_auc_score(y_test, y_pred_proba)
+    
+    def incremental_retrain(self, df, model_path='models/ensemble_model.pkl', window=None,
+                            holdout_fraction=0.2, n_rounds=50, require_improvement=True):
+        """
+        Warm-start the saved ensemble on the newest rows of df.
+        
+        The scaler is updated with partial_fit on the new training rows, the
+        saved boosters' thresholds (or the binner's edges) are remapped to the
+        updated scaling, LightGBM / XGBoost continue boosting for n_rounds and
+        RandomForest is retrained on the window. Both old and updated models
+        are scored on the last holdout_fraction of the window; with
+        require_improvement the old model is kept unless the update beats it.
+        Returns {'old_auc', 'new_auc', 'improved'}.
+        """
+        print("\n" + "=" * 80)
+        print("INCREMENTAL RETRAIN")
+        print("=" * 80)
+        
+        model_data = joblib.load(model_path)
+        old_models = model_data['models']
+        old_scaler = model_data['scaler']
+        old_binner = model_data.get('binner')
+        self.feature_names = model_data['feature_names']
+        self.selected_features = model_data['selected_features']
+        self.member_params = model_data.get('member_params', {})
+        self.feature_costs = model_data.get('feature_costs')
+        
+        if window is not None:
+            df = df.iloc[-window:]
+        X = df[self.feature_names].replace([np.inf, -np.inf], np.nan)
+        fill_values = model_data.get('fill_values')
+        if fill_values is None:
+            fill_values = X.median().to_numpy(dtype=np.float64)
+        X = X.fillna(pd.Series(fill_values, index=self.feature_names)).to_numpy(dtype=np.float64)
+        y = df['target'].values
+        self.sample_weight = df['sample_weight'].to_numpy() if 'sample_weight' in df.columns else None
+        
+        split_idx = int(len(X) * (1 - holdout_fraction))
+        X_train, X_test = X[:split_idx], X[split_idx:]
+        y_train, y_test = y[:split_idx], y[split_idx:]
+        w = self._weights(slice(split_idx, None))
+        print(f"Window: {len(X)} rows (Train: {split_idx}, Holdout: {len(X) - split_idx})")
+        
+        def model_inputs(scaler, binner, rows):
+            scaled = scaler.transform(rows)
+            return binner.transform(scaled) if binner is not None else scaled
+        
+        old_proba = np.mean([self._predict_member(m, model_inputs(old_scaler, old_binner, X_test))
+                             for m in old_models], axis=0)
+        
+        new_scaler = refit_scaler(old_scaler, X_train)
+        a, b = scaler_affine(old_scaler, new_scaler)
+        new_binner = remap_binner(old_binner, a, b) if old_binner is not None else None
+        train_inputs = model_inputs(new_scaler, new_binner, X_train)
+        source = BinnedMatrix(train_inputs, y_train) if new_binner is not None else None
+        
+        rounds = {'lightgbm': {'num_boost_round': n_rounds}, 'xgboost': {'n_estimators': n_rounds}}
+        new_models = []
+        for model in old_models:
+            name = self._member_name(model)
+            init_model = None
+            if name == 'lightgbm':
+                init_model = model if new_binner is not None else remap_lgb_booster(model, a, b)
+            elif name == 'xgboost':
+                booster = model.get_booster() if isinstance(model, xgb.XGBModel) else model
+                init_model = booster if new_binner is not None else remap_xgb_booster(booster, a, b)
+            params = dict(self.member_params.get(name, {}), **rounds.get(name, {}))
+            new_models.append(self._train_member(name, train_inputs, y_train, source=source,
+                                                 params=params, init_model=init_model))
+        
+        new_proba = np.mean([self._predict_member(m, model_inputs(new_scaler, new_binner, X_test))
+                             for m in new_models], axis=0)
+        old_auc = roc_auc_score(y_test, old_proba, sample_weight=w)
+        new_auc = roc_auc_score(y_test, new_proba, sample_weight=w)
+        improved = new_auc > old_auc
+        print(f"Holdout AUC: previous {old_auc:.4f} -> updated {new_auc:.4f}")
+        
+        if improved or not require_improvement:
+            print("✓ Using updated model")
+            self.models, self.scaler, self.binner = new_models, new_scaler, new_binner
+        else:
+            print("✗ Updated model is not better, keeping previous model")
+            self.models, self.scaler, self.binner = old_models, old_scaler, old_binner
+        self.fill_values = fill_values
+        return {'old_auc': old_auc, 'new_auc': new_auc, 'improved': improved}
+    
+    def _model_data(self, models):
+        return {
+            'models': models,
             'scaler': self.scaler,
+            'fill_values': self.fill_values,
+            'binner': self.binner,
+            'member_params': self.member_params,
             'feature_names': self.feature_names,
-            'selected_features': self.selected_features
+            'selected_features': self.selected_features,
+            'feature_costs': self.feature_costs
         }
+    
+    def save_model(self, output_dir='models/'):
+        """Save trained models."""
+        os.makedirs(output_dir, exist_ok=True)
+        
+        model_data = self._model_data(self.models)
         
         joblib.dump(model_data, f'{output_dir}/ensemble_model.pkl')
         print(f"\n✓ Model saved to: {output_dir}/ensemble_model.pkl")
+    
+    def prune_for_latency(self, X, y, latency_budget_us=LATENCY_BUDGET_US, output_dir='models/'):
+        """
+        Search the best variant (member subset and tree counts) whose flat
+        single-row latency fits latency_budget_us on the first half of the
+        final test slice, report it and the per-member latency / AUC table on
+        the second half, and save it as ensemble_model_pruned.pkl plus
+        ensemble_flat_pruned.npz. Returns (report rows, variant or None).
+        """
+        print("\n" + "=" * 80)
+        print(f"LATENCY-AWARE PRUNING (budget {latency_budget_us} µs/row)")
+        print("=" * 80)
+        
+        split_idx = int(len(X) * 0.8)
+        val_idx = split_idx + (len(X) - split_idx) // 2
+        X_val, y_val = X[split_idx:val_idx], y[split_idx:val_idx]
+        X_holdout, y_holdout = X[val_idx:], y[val_idx:]
+        w_val = self._weights(slice(split_idx, val_idx))
+        w_holdout = self._weights(slice(val_idx, None))
+        print(f"Validation: {len(X_val)} rows (variant search) | Holdout: {len(X_holdout)} rows (reported)")
+        pruner = LatencyPruner(self.models, [self._member_name(m) for m in self.models],
+                               len(self.feature_names))
+        report = pruner.report(X_holdout, y_holdout, sample_weight=w_holdout)
+        result = pruner.search(X_val, y_val, X_holdout, y_holdout, latency_budget_us,
+                               val_weight=w_val, holdout_weight=w_holdout)
+        if result is None:
+            return report, None
+        
+        variant, val_auc, holdout_auc, latency = result
+        models = pruner.pruned_models(variant)
+        model_data = self._model_data(models)
+        model_data.update({'validation_auc': val_auc, 'holdout_auc': holdout_auc, 'latency_us': latency,
+                           'latency_budget_us': latency_budget_us})
+        os.makedirs(output_dir, exist_ok=True)
+        joblib.dump(model_data, f'{output_dir}/ensemble_model_pruned.pkl')
+        FlatEnsemble.from_models(models, len(self.feature_names), self.binner).save(
+            f'{output_dir}/ensemble_flat_pruned.npz')
+        print(f"✓ Pruned model saved to: {output_dir}/ensemble_model_pruned.pkl "
+              f"(+ ensemble_flat_pruned.npz)")
+        return report, variant
+    
+    def export_flat(self, output_dir='models/'):
+        """Export the trained ensemble as flat node arrays (see flat_ensemble.py)."""
+        flat = FlatEnsemble.from_models(self.models, len(self.feature_names), self.binner)
+        flat.save(f'{output_dir}/ensemble_flat.npz')
+        print(f"✓ Flat ensemble ({len(flat.roots)} trees, {len(flat.feature)} nodes) "
+              f"saved to: {output_dir}/ensemble_flat.npz")
+        return flat
+    
+    def export_artifact(self, output_dir='models/ensemble_artifact'):
+        """Export the fast-start deployment artifact (see artifact.py)."""
+        flat = FlatEnsemble.from_models(self.models, len(self.feature_names), self.binner)
+        manifest = export_artifact(
+            output_dir, flat, self.feature_names, self.scaler.mean_, self.scaler.scale_,
+            self.fill_values,
+            metadata={'members': [self._member_name(m) for m in self.models],
+                      'member_params': self.member_params,
+                      'prebinned': self.binner is not None})
+        print(f"✓ Deployment artifact ({manifest['n_trees']} trees, {manifest['n_features']} features) "
+              f"saved to: {output_dir}")
+        return manifest
 
 
 def main():
@@ -273,11 +766,16 @@ def main():
     X, y = trainer.prepare_data(df)
     
     # Cross-validation
-    mean_acc, std_acc, mean_f1 = trainer.walk_forward_validation(X, y, n_splits=5)
+    n_splits = 5
+    n_workers = min(os.cpu_count() or 1, n_splits * len(ENSEMBLE_MEMBERS))
+    mean_acc, std_acc, mean_f1 = trainer.walk_forward_validation(X, y, n_splits=n_splits, n_workers=n_workers)
     
     # Final model
     final_acc = trainer.train_final_model(X, y)
     trainer.save_model()
+    trainer.export_flat()
+    trainer.export_artifact()
+    trainer.prune_for_latency(X, y)
     
     print("\n" + "=" * 80)
     print("SUMMARY")
@@ -288,5 +786,30 @@ def main():
     print("=" * 80)
 
 
+def incremental_main(features_path='data/processed/features_comprehensive.csv', model_dir='models/',
+                     window=None):
+    """Warm-start the saved ensemble on the feature file; re-save and re-export only if it improved."""
+    print("=" * 80)
+    print("INCREMENTAL TRAINING PIPELINE")
+    print("=" * 80)
+    
+    trainer = OptimizedModelTrainer(features_path=features_path)
+    df = trainer.load_features()
+    result = trainer.incremental_retrain(df, model_path=os.path.join(model_dir, 'ensemble_model.pkl'),
+                                         window=window)
+    
+    if result['improved']:
+        trainer.save_model(model_dir)
+        trainer.export_flat(model_dir)
+        trainer.export_artifact(os.path.join(model_dir, 'ensemble_artifact'))
+    else:
+        print(f"Saved model in {model_dir} left unchanged")
+    return result
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python train_model.py --incremental: update the saved model instead of training from scratch
+    if '--incremental' in sys.argv[1:]:
+        incremental_main()
+    else:
+        main()
\ No newline at end of file
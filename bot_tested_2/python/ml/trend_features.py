@@ -0,0 +1,296 @@
+"""
+Rolling trend and regime features: OLS slope / R², variance ratio / Hurst
+exponent and sign entropy of returns.
+
+Batch versions are built from cumulative sums, so every window width costs
+O(n). The sums are taken over blocks of a few thousand rows, each shifted
+by its first value, which keeps the cumulative sums small enough that
+differencing them does not lose precision on long price series. Streaming
+versions give the same values one tick at a time in O(1).
+"""
+
+import numpy as np
+
+
+BLOCK_SIZE = 4096
+
+# Log-return variances below this are rounding noise (flat prices)
+MIN_RETURN_VAR = 1e-16
+
+
+# ==================== BATCH KERNELS ====================
+
+def _window_sums(x, window, with_index=False, block=BLOCK_SIZE):
+    """
+    Sums over every full window of x (windows ending at window-1 .. n-1).
+
+    Returns (S, SS) or (S, SS, SKX), where SKX = sum of k * x over each
+    window with k = 0..window-1. Each block is shifted by its first value,
+    so only shift-invariant combinations of the sums are meaningful.
+    """
+    n_out = len(x) - window + 1
+    block = max(block, 4 * window)
+    n_blocks = -(-n_out // block)
+    length = block + window - 1
+    padded = np.empty(n_blocks * block + window - 1)
+    padded[:len(x)] = x
+    padded[len(x):] = x[-1]
+
+    rows = np.lib.stride_tricks.sliding_window_view(padded, length)[::block]
+    rows = rows - rows[:, :1]
+
+    def sliding(m):
+        c = np.zeros((m.shape[0], m.shape[1] + 1))
+        np.cumsum(m, axis=1, out=c[:, 1:])
+        return (c[:, window:] - c[:, :-window]).ravel()[:n_out]
+
+    sums = [sliding(rows), sliding(rows * rows)]
+    if with_index:
+        j = np.arange(length)
+        start = np.tile(np.arange(block), n_blocks)[:n_out]
+        sums.append(sliding(rows * j) - start * sums[0])
+    return sums
+
+
+def _place(values, n, offset):
+    out = np.full(n, np.nan)
+    out[offset:offset + len(values)] = values
+    return out
+
+
+def rolling_ols(y, window):
+    """Slope and R² of y regressed on 0..window-1 over each trailing window."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n < window or window < 2:
+        return np.full(n, np.nan), np.full(n, np.nan)
+
+    sy, syy, sxy = _window_sums(y, window, with_index=True)
+    sx = window * (window - 1) / 2.0
+    sxx = (window - 1) * window * (2 * window - 1) / 6.0
+    num = window * sxy - sx * sy
+    den_x = window * sxx - sx * sx
+    den_y = np.maximum(window * syy - sy * sy, 0.0)
+
+    slope = num / den_x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(den_y > 0, num * num / (den_x * den_y), 0.0)
+    return _place(slope, n, window - 1), _place(np.minimum(r2, 1.0), n, window - 1)
+
+
+def _rolling_var(x, window):
+    s, ss = _window_sums(x, window)
+    return np.maximum(ss / window - (s / window) ** 2, 0.0)
+
+
+def variance_ratio(price, window, q=5):
+    """
+    Lo-MacKinlay variance ratio of q-tick vs 1-tick log returns over each
+    trailing window, and the implied Hurst exponent H = 0.5 * (1 + log VR / log q).
+    A flat window gives VR = 1 and H = 0.5.
+    """
+    log_p = np.log(np.asarray(price, dtype=np.float64))
+    n = len(log_p)
+    start = q + window - 1
+    if n <= start:
+        return np.full(n, np.nan), np.full(n, np.nan)
+
+    r1 = np.diff(log_p)[q - 1:]
+    rq = log_p[q:] - log_p[:-q]
+    var1 = _rolling_var(r1, window)
+    varq = _rolling_var(rq, window)
+
+    ok = (var1 > MIN_RETURN_VAR) & (varq > MIN_RETURN_VAR)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vr = np.where(ok, varq / (q * var1), 1.0)
+    hurst = 0.5 * (1.0 + np.log(vr) / np.log(q))
+    return _place(vr, n, start), _place(hurst, n, start)
+
+
+def _binary_entropy(p):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    return np.nan_to_num(h, nan=0.0)
+
+
+def sign_entropy(price, window):
+    """
+    Binary entropy (bits) of up vs down moves among the last `window` price
+    changes; zero changes are ignored, an all-flat window scores 0.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    n = len(price)
+    if n <= window:
+        return np.full(n, np.nan)
+    diff = np.diff(price)
+    up = np.concatenate([[0], np.cumsum(diff > 0)])
+    down = np.concatenate([[0], np.cumsum(diff < 0)])
+    ups = up[window:] - up[:-window]
+    downs = down[window:] - down[:-window]
+    moves = ups + downs
+    p = np.divide(ups, moves, out=np.zeros(len(moves)), where=moves > 0)
+    return _place(_binary_entropy(p), n, window)
+
+
+# ==================== STREAMING KERNELS ====================
+
+class _Window:
+    """Fixed-size ring buffer with running sum / sum of squares."""
+
+    # Re-sum from the buffer this often to stop rounding drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, size):
+        self.size = size
+        self.buffer = np.zeros(size)
+        self.pos = 0
+        self.count = 0
+        self.shift = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self._updates = 0
+
+    @property
+    def full(self):
+        return self.count >= self.size
+
+    def push(self, x):
+        """Add x, returning the (shifted) value that fell out or None."""
+        if self.shift is None:
+            self.shift = x
+        x -= self.shift
+        old = None
+        if self.full:
+            old = self.buffer[self.pos]
+            self.sum -= old
+            self.sumsq -= old * old
+        else:
+            self.count += 1
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+        self.sum += x
+        self.sumsq += x * x
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self.resync()
+        return old
+
+    def resync(self):
+        values = self.buffer[:self.count]
+        self.sum = float(values.sum())
+        self.sumsq = float(values @ values)
+
+    def ordered(self):
+        """Shifted values, oldest first."""
+        if not self.full:
+            return self.buffer[:self.count]
+        return np.roll(self.buffer, -self.pos)
+
+    def var(self):
+        mean = self.sum / self.count
+        return max(self.sumsq / self.count - mean * mean, 0.0)
+
+
+class StreamingOLS:
+    """O(1) rolling OLS slope / R², matching rolling_ols()."""
+
+    def __init__(self, window):
+        self.window = window
+        self._w = _Window(window)
+        self._sxy = 0.0
+        w = window
+        self._sx = w * (w - 1) / 2.0
+        self._den_x = w * ((w - 1) * w * (2 * w - 1) / 6.0) - self._sx ** 2
+
+    def update(self, y):
+        win = self._w
+        sum_before = win.sum
+        old = win.push(y)
+        y = win.buffer[(win.pos - 1) % win.size]
+        if old is None:
+            self._sxy += (win.count - 1) * y
+        else:
+            # Every remaining point moves one step left, the new one lands last
+            self._sxy += -(sum_before - old) + (self.window - 1) * y
+        if win._updates % _Window.RESYNC_EVERY == 0:
+            self._sxy = float(np.arange(win.count) @ win.ordered())
+        return self.value
+
+    @property
+    def value(self):
+        win = self._w
+        if not win.full:
+            return np.nan, np.nan
+        w = self.window
+        num = w * self._sxy - self._sx * win.sum
+        den_y = max(w * win.sumsq - win.sum * win.sum, 0.0)
+        slope = num / self._den_x
+        r2 = min(num * num / (self._den_x * den_y), 1.0) if den_y > 0 else 0.0
+        return slope, r2
+
+
+class StreamingVarianceRatio:
+    """O(1) rolling variance ratio / Hurst exponent, matching variance_ratio()."""
+
+    def __init__(self, window, q=5):
+        self.q = q
+        self._log_prices = _Window(q + 1)
+        self._r1 = _Window(window)
+        self._rq = _Window(window)
+
+    def update(self, price):
+        lp = self._log_prices
+        lp.push(np.log(price))
+        if lp.full:
+            values = lp.ordered()
+            self._r1.push(values[-1] - values[-2])
+            self._rq.push(values[-1] - values[0])
+        return self.value
+
+    @property
+    def value(self):
+        if not self._rq.full:
+            return np.nan, np.nan
+        var1, varq = self._r1.var(), self._rq.var()
+        vr = varq / (self.q * var1) if var1 > MIN_RETURN_VAR and varq > MIN_RETURN_VAR else 1.0
+        return vr, 0.5 * (1.0 + np.log(vr) / np.log(self.q))
+
+
+class StreamingSignEntropy:
+    """O(1) rolling sign entropy of price changes, matching sign_entropy()."""
+
+    def __init__(self, window):
+        self.window = window
+        self._signs = np.zeros(window, dtype=np.int8)
+        self._pos = 0
+        self._count = 0
+        self._ups = 0
+        self._downs = 0
+        self._prev = None
+
+    def update(self, price):
+        if self._prev is not None:
+            diff = price - self._prev
+            sign = 1 if diff > 0 else (-1 if diff < 0 else 0)
+            if self._count >= self.window:
+                old = self._signs[self._pos]
+                self._ups -= old == 1
+                self._downs -= old == -1
+            else:
+                self._count += 1
+            self._signs[self._pos] = sign
+            self._pos = (self._pos + 1) % self.window
+            self._ups += sign == 1
+            self._downs += sign == -1
+        self._prev = price
+        return self.value
+
+    @property
+    def value(self):
+        if self._count < self.window:
+            return np.nan
+        moves = self._ups + self._downs
+        if moves == 0:
+            return 0.0
+        return float(_binary_entropy(np.float64(self._ups / moves)))
@@ -0,0 +1,99 @@
+"""
+Helpers for warm-start retraining of a saved ensemble.
+
+Trees split on scaled features. When the scaler is refreshed with new
+data, scaled inputs shift by a per-feature affine map, so old split
+thresholds (and quantile bin edges) are remapped into the new scaled
+space before boosting continues. The remapped model makes the same
+decisions on raw inputs as the old model did with the old scaler
+(XGBoost's float32 conditions are rounded so that this holds exactly).
+"""
+
+import copy
+import json
+
+import numpy as np
+import lightgbm as lgb
+import xgboost as xgb
+
+
+def refit_scaler(scaler, X):
+    """Copy of a fitted StandardScaler updated with more rows via partial_fit."""
+    updated = copy.deepcopy(scaler)
+    updated.partial_fit(X)
+    return updated
+
+
+def scaler_affine(old_scaler, new_scaler):
+    """
+    Per-feature (a, b) with old_scaled = a * new_scaled + b.
+    a > 0, so split order is preserved and x_old <= t <=> x_new <= (t - b) / a.
+    """
+    a = new_scaler.scale_ / old_scaler.scale_
+    b = (new_scaler.mean_ - old_scaler.mean_) / old_scaler.scale_
+    return a, b
+
+
+def remap_lgb_booster(booster, a, b):
+    """New LightGBM Booster with every numerical split threshold remapped."""
+    # tree_sizes holds byte offsets that no longer hold once thresholds are
+    # rewritten; without it LightGBM parses the trees sequentially
+    lines = [line for line in booster.model_to_string().split('\n')
+             if not line.startswith('tree_sizes=')]
+    features = None
+    for i, line in enumerate(lines):
+        if line.startswith('split_feature='):
+            features = np.array(line.split('=', 1)[1].split(), dtype=np.int64)
+        elif line.startswith('threshold=') and features is not None:
+            t = np.array(line.split('=', 1)[1].split(), dtype=np.float64)
+            t = (t - b[features]) / a[features]
+            lines[i] = 'threshold=' + ' '.join(repr(float(v)) for v in t)
+            features = None
+    return lgb.Booster(model_str='\n'.join(lines))
+
+
+def remap_float32_thresholds(t, a, b):
+    """
+    float32 thresholds t_new with float32(x_new) < t_new <=> float32(x_old) < t,
+    for x_old = a * x_new + b. float32(x) < t holds exactly when x is below
+    the rounding boundary halfway between t and the float32 just under it;
+    that boundary is mapped, and t_new is the float32 whose own lower
+    boundary is the largest one not above the mapped value. Only inputs
+    within float64 rounding of a boundary can still flip.
+    """
+    t = np.asarray(t, dtype=np.float32)
+    below = np.nextafter(t, np.float32(-np.inf))
+    boundary = (t.astype(np.float64) + below.astype(np.float64)) / 2
+    mapped = (boundary - b) / a
+    t_new = mapped.astype(np.float32)
+    # Round-to-nearest puts t_new's lower boundary at or below `mapped`;
+    # on an exact tie with the next boundary up, step up to it
+    above = np.nextafter(t_new, np.float32(np.inf))
+    tie = (t_new.astype(np.float64) + above.astype(np.float64)) / 2 <= mapped
+    return np.where(tie, above, t_new)
+
+
+def remap_xgb_booster(booster, a, b):
+    """
+    New XGBoost Booster with every split condition remapped (leaf values
+    untouched). XGBoost compares float32 inputs with float32 conditions,
+    so conditions go through remap_float32_thresholds() and rows sitting
+    exactly on a cut point stay on their side.
+    """
+    model = json.loads(booster.save_raw('json'))
+    for tree in model['learner']['gradient_booster']['model']['trees']:
+        split = np.array(tree['split_indices'], dtype=np.int64)
+        cond = np.array(tree['split_conditions'], dtype=np.float32)
+        inner = np.array(tree['left_children']) != -1
+        cond[inner] = remap_float32_thresholds(cond[inner], a[split[inner]], b[split[inner]])
+        tree['split_conditions'] = [float(v) for v in cond]
+    remapped = xgb.Booster()
+    remapped.load_model(bytearray(json.dumps(model).encode()))
+    return remapped
+
+
+def remap_binner(binner, a, b):
+    """Copy of a fitted QuantileBinner whose edges live in the new scaled space."""
+    remapped = copy.deepcopy(binner)
+    remapped.edges = (binner.edges - b[:, None]) / a[:, None]
+    return remapped
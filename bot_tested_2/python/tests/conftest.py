@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ML_DIR = os.path.join(os.path.dirname(__file__), '..', 'ml')
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'raw')
+sys.path.insert(0, os.path.abspath(ML_DIR))
+
+TRADES_PATH = os.path.join(DATA_DIR, 'trades.csv')
+QUOTES_PATH = os.path.join(DATA_DIR, 'quotes.csv')
+
+
+@pytest.fixture(scope='session')
+def trades():
+    return pd.read_csv(TRADES_PATH).sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture(scope='session')
+def quotes():
+    return pd.read_csv(QUOTES_PATH).sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture(scope='session')
+def prices(trades):
+    return trades['price'].to_numpy(dtype='float64')
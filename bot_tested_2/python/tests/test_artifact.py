@@ -0,0 +1,101 @@
+"""Exported artifact: load -> predict_one must reproduce the in-memory ensemble on raw feature vectors."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifact import load_artifact, MANIFEST_FILE
+from predictor import EnsemblePredictor
+from train_model import OptimizedModelTrainer
+
+SMALL_PARAMS = {
+    'lightgbm': {'num_boost_round': 30},
+    'xgboost': {'n_estimators': 30, 'max_depth': 4},
+    'random_forest': {'n_estimators': 20, 'max_depth': 6},
+}
+N_ROWS = 1500
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['scaled', 'prebinned'])
+def trained(request, tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('artifact')
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame(rng.normal(loc=[5.0, -2.0, 100.0, 0.0], scale=[1.0, 3.0, 20.0, 0.1],
+                                  size=(N_ROWS, 4)), columns=['a', 'b', 'c', 'd'])
+    # Integer-valued column puts many rows exactly on split points
+    raw['e'] = rng.integers(0, 5, N_ROWS).astype(np.float64)
+    target = ((raw['a'] - 5) + 0.5 * raw['e'] + rng.normal(scale=1.0, size=N_ROWS) > 1).astype(np.int64)
+    raw[rng.random(raw.shape) < 0.03] = np.nan
+    df = raw.assign(target=target)
+    features_path = tmp_path / 'features.csv'
+    df.to_csv(features_path, index=False)
+
+    trainer = OptimizedModelTrainer(features_path=str(features_path), selection_cache_dir=None,
+                                    prebin=request.param)
+    trainer.member_params = SMALL_PARAMS
+    trainer.train_final_model(*trainer.prepare_data(df))
+    trainer.save_model(str(tmp_path))
+    trainer.export_artifact(str(tmp_path / 'artifact'))
+
+    rows = raw.to_numpy()[:400].copy()
+    rows[0, 1] = np.inf
+    rows[1, :] = np.nan
+    return trainer, tmp_path, rows
+
+
+def in_memory_proba(trainer, rows):
+    X = pd.DataFrame(rows, columns=trainer.feature_names).replace([np.inf, -np.inf], np.nan)
+    X = trainer.scaler.transform(X.fillna(pd.Series(trainer.fill_values, index=trainer.feature_names)))
+    if trainer.binner is not None:
+        X = trainer.binner.transform(X)
+    return np.mean([trainer._predict_member(m, X) for m in trainer.models], axis=0)
+
+
+def test_artifact_predict_one_matches_the_trained_ensemble(trained):
+    trainer, tmp_path, rows = trained
+    artifact = load_artifact(str(tmp_path / 'artifact'))
+    assert artifact.feature_names == trainer.feature_names
+    assert artifact.manifest['metadata']['prebinned'] == (trainer.binner is not None)
+    artifact.warm_up()
+
+    expected = in_memory_proba(trainer, rows)
+    got = np.array([artifact.predict_one(row) for row in rows])
+    np.testing.assert_allclose(got, expected, rtol=0, atol=5e-8)
+    np.testing.assert_allclose(artifact.predictor.predict_batch(rows), got, rtol=0, atol=1e-12)
+
+
+def test_pickle_and_artifact_predictors_agree(trained):
+    trainer, tmp_path, rows = trained
+    from_pickle = EnsemblePredictor.load(str(tmp_path / 'ensemble_model.pkl'))
+    from_artifact = EnsemblePredictor.load(str(tmp_path / 'artifact'))
+    assert from_artifact.artifact is not None and from_pickle.models is not None
+    for row in rows[:100]:
+        assert from_pickle.predict(row) == from_artifact.predict(row)
+    np.testing.assert_allclose(from_pickle.predict_batch(rows), in_memory_proba(trainer, rows),
+                               rtol=0, atol=1e-12)
+
+
+def test_manifest_mismatches_raise(trained, tmp_path):
+    _, model_dir, _ = trained
+    source = model_dir / 'artifact'
+    with open(source / MANIFEST_FILE) as fh:
+        manifest = json.load(fh)
+    for name in os.listdir(source):
+        if name.endswith('.npy'):
+            os.symlink(source / name, tmp_path / name)
+
+    def write(changed):
+        with open(tmp_path / MANIFEST_FILE, 'w') as fh:
+            json.dump(changed, fh)
+
+    write(dict(manifest, format_version=manifest['format_version'] - 1))
+    with pytest.raises(ValueError, match='Unsupported artifact version'):
+        load_artifact(str(tmp_path))
+
+    arrays = dict(manifest['arrays'], scaler_mean=dict(manifest['arrays']['scaler_mean'], shape=[99]))
+    write(dict(manifest, arrays=arrays))
+    with pytest.raises(ValueError, match="'scaler_mean'"):
+        load_artifact(str(tmp_path))
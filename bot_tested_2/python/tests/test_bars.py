@@ -0,0 +1,51 @@
+"""Bar sampling: flow features on bars must add up the raw ticks they contain."""
+
+import numpy as np
+import pandas as pd
+
+from bars import BarSampler
+from feature_engineering import ComprehensiveFeatureEngineer
+from online_features import OnlineFeatureEngine
+from conftest import TRADES_PATH, QUOTES_PATH
+
+
+def test_bar_flow_is_raw_tick_flow_summed_per_bar(trades, quotes):
+    trades = trades.iloc[:3000]
+    sampler = BarSampler('volume', threshold=2000.0)
+    ids = sampler.bar_ids(trades)
+    bars = sampler.sample_trades(trades)
+    merged = pd.merge_asof(bars, quotes, on='timestamp', direction='backward')
+    features = ComprehensiveFeatureEngineer(TRADES_PATH, QUOTES_PATH).calculate_comprehensive_features(merged)
+
+    quantity = trades['quantity'].to_numpy(dtype=np.float64)
+    buy = trades['side'].to_numpy() == 'buy'
+    per_bar_buy = pd.Series(np.bincount(ids, np.where(buy, quantity, 0.0)))
+    per_bar_sell = pd.Series(np.bincount(ids, np.where(buy, 0.0, quantity)))
+    # Bars mix both sides, so the majority-side label alone would misstate the flow
+    assert ((per_bar_buy > 0) & (per_bar_sell > 0)).mean() > 0.5
+
+    for window in [5, 20]:
+        buy_volume = per_bar_buy.rolling(window).sum()
+        sell_volume = per_bar_sell.rolling(window).sum()
+        np.testing.assert_allclose(features[f'buy_volume_{window}'], buy_volume, equal_nan=True)
+        np.testing.assert_allclose(features[f'sell_volume_{window}'], sell_volume, equal_nan=True)
+        np.testing.assert_allclose(features[f'net_flow_{window}'], buy_volume - sell_volume, equal_nan=True)
+
+    # The live engine fed the same bar rows agrees
+    columns = ['net_flow_5', 'flow_imbalance_20', 'flow_mid_corr_lag1']
+    engine = OnlineFeatureEngine(columns)
+    streamed = np.array([engine.update(tick).copy() for tick in merged.to_dict('records')])
+    np.testing.assert_allclose(streamed, features[columns].to_numpy(np.float64), rtol=1e-8, atol=1e-10,
+                               equal_nan=True)
+
+
+def test_sample_quotes_has_one_row_per_bar(quotes):
+    sampler = BarSampler('tick', threshold=10)
+    first = quotes['timestamp'].iloc[0]
+    closes = np.array([first - 2, first - 1, quotes['timestamp'].iloc[4], quotes['timestamp'].iloc[9]])
+    snapshot = sampler.sample_quotes(quotes, closes)
+
+    assert len(snapshot) == len(closes)
+    assert snapshot.iloc[:2].drop(columns='n_quotes').isna().all().all()
+    np.testing.assert_array_equal(snapshot['n_quotes'], [0, 0, 5, 5])
+    np.testing.assert_array_equal(snapshot['bid_price'].iloc[2:], quotes['bid_price'].iloc[[4, 9]])
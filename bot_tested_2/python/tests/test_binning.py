@@ -0,0 +1,51 @@
+"""QuantileBinner: monotone edges and codes that bracket every value."""
+
+import numpy as np
+import pytest
+
+from binning import QuantileBinner
+
+
+@pytest.fixture
+def X():
+    rng = np.random.default_rng(0)
+    return np.column_stack([
+        rng.normal(size=5000),
+        rng.exponential(size=5000),
+        rng.integers(0, 3, 5000).astype(np.float64),  # three distinct values
+        np.full(5000, 1.5),                          # constant
+    ])
+
+
+def test_edges_are_monotone(X):
+    binner = QuantileBinner(max_bins=64).fit(X)
+    assert binner.edges.shape == (X.shape[1], 63)
+    for j, edges in enumerate(binner.edges):
+        finite = edges[np.isfinite(edges)]
+        assert np.all(np.diff(finite) > 0), j
+        # +inf padding only after the finite edges
+        assert np.isfinite(edges[:len(finite)]).all()
+    assert np.isfinite(binner.edges[2]).sum() <= 3
+    assert np.isfinite(binner.edges[3]).sum() == 1
+
+
+def test_codes_bracket_values(X):
+    binner = QuantileBinner(max_bins=64)
+    codes = binner.fit_transform(X)
+    assert codes.dtype == np.uint8
+    for j in range(X.shape[1]):
+        lower = np.r_[-np.inf, binner.edges[j]][codes[:, j]]
+        upper = np.r_[binner.edges[j], np.inf][codes[:, j]]
+        assert np.all((lower <= X[:, j]) & (X[:, j] < upper)), j
+        # Codes are monotone in the value, and distinct small-cardinality values stay distinct
+        order = np.argsort(X[:, j], kind='stable')
+        assert np.all(np.diff(codes[order, j].astype(int)) >= 0), j
+    assert len(np.unique(codes[:, 2])) == 3
+
+
+def test_sampled_fit_covers_unseen_values(X):
+    binner = QuantileBinner(max_bins=255, sample_size=1000).fit(X)
+    extreme = np.array([[-1e9, -1.0, -1.0, 0.0], [1e9, 1e9, 9.0, 3.0]])
+    codes = binner.transform(extreme)
+    assert list(codes[0]) == [0, 0, 0, 0]
+    np.testing.assert_array_equal(codes[1], np.isfinite(binner.edges).sum(axis=1))
@@ -0,0 +1,37 @@
+"""Compact mode: typed ingest and narrow feature dtypes, same values."""
+
+import numpy as np
+
+from feature_engineering import ComprehensiveFeatureEngineer, FLOAT64_COLUMNS, RAW_INPUTS, bytes_per_row
+from conftest import TRADES_PATH, QUOTES_PATH
+
+
+def features(compact):
+    engineer = ComprehensiveFeatureEngineer(TRADES_PATH, QUOTES_PATH, compact=compact)
+    trades, quotes = engineer.load_data()
+    merged = engineer.merge_data(trades.iloc[:3000], quotes)
+    return trades, engineer.calculate_comprehensive_features(merged)
+
+
+def test_compact_ingest_and_feature_dtypes():
+    trades, compact = features(compact=True)
+    _, full = features(compact=False)
+
+    assert trades['timestamp'].dtype == np.int64
+    assert trades['side'].dtype == 'category'
+    assert not any(col.startswith('datetime') for col in compact.columns)
+    assert bytes_per_row(compact) < 0.6 * bytes_per_row(full)
+
+    # pyarrow and the C parser may round the last digit of a price differently
+    for col in compact.columns.drop(list(RAW_INPUTS)):
+        expected = full[col].to_numpy()
+        if col in FLOAT64_COLUMNS:
+            assert compact[col].dtype == np.float64, col
+            np.testing.assert_allclose(compact[col], expected, rtol=1e-12, err_msg=col)
+        elif expected.dtype == np.float64:
+            assert compact[col].dtype == np.float32, col
+            np.testing.assert_allclose(compact[col], expected, rtol=1e-6, atol=1e-6, equal_nan=True,
+                                       err_msg=col)
+        else:
+            assert compact[col].dtype.itemsize < expected.dtype.itemsize, col
+            np.testing.assert_array_equal(compact[col], expected, err_msg=col)
@@ -0,0 +1,29 @@
+"""calculate_comprehensive_features against a stored reference of its output."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import ComprehensiveFeatureEngineer
+from conftest import TRADES_PATH, QUOTES_PATH
+
+# Output of the monolithic calculate_comprehensive_features (before the
+# per-group kernels) on the sample data: every numeric column, at rows
+# 0..147 step 3 (warm-up) and every 60th row after that
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'comprehensive_features_reference.npz')
+
+
+def test_features_match_reference(trades, quotes):
+    df = pd.merge_asof(trades, quotes, on='timestamp', direction='backward',
+                       suffixes=('_trade', '_quote'))
+    features = ComprehensiveFeatureEngineer(TRADES_PATH, QUOTES_PATH).calculate_comprehensive_features(df)
+    reference = np.load(REFERENCE_PATH)
+    columns, rows = list(reference['columns']), reference['rows']
+
+    assert len(features) == len(df)
+    assert set(features.columns) == set(columns) | {'side'}
+    actual = features[columns].to_numpy(np.float64)[rows]
+    for j, column in enumerate(columns):
+        np.testing.assert_allclose(actual[:, j], reference['values'][:, j], rtol=1e-12, atol=0,
+                                   err_msg=column)
@@ -0,0 +1,74 @@
+"""Batch kernels, stream groups and the cost profiler must agree on the feature groups."""
+
+import pandas as pd
+import pytest
+
+from feature_engineering import ComprehensiveFeatureEngineer, RAW_INPUTS, base_inputs, feature_group_kernels
+from feature_cost import FeatureCostProfiler, feature_groups
+from online_features import stream_groups
+from conftest import TRADES_PATH, QUOTES_PATH
+
+
+def merged(trades, quotes):
+    return pd.merge_asof(trades, quotes, on='timestamp', direction='backward',
+                         suffixes=('_trade', '_quote'))
+
+
+def test_kernels_produce_their_stream_group_columns(trades, quotes):
+    ctx = base_inputs(merged(trades, quotes).iloc[:2000])
+    kernels = feature_group_kernels()
+    for group in stream_groups():
+        if not group.columns:
+            assert group.name not in kernels
+            continue
+        columns = kernels[group.name](ctx)
+        # Raw inputs listed by a stream group are already columns of the merged frame
+        assert set(columns) == set(group.columns) - set(RAW_INPUTS), group.name
+
+
+def test_comprehensive_features_are_the_group_kernels(trades, quotes):
+    df = merged(trades, quotes).iloc[:2000]
+    engineer = ComprehensiveFeatureEngineer(TRADES_PATH, QUOTES_PATH)
+    features = engineer.calculate_comprehensive_features(df)
+    ctx = base_inputs(df)
+    for name, kernel in feature_group_kernels().items():
+        for column, values in kernel(ctx).items():
+            pd.testing.assert_series_equal(features[column], pd.Series(values, name=column),
+                                           check_dtype=False, obj=f'{name}/{column}')
+
+
+def test_profiler_times_every_group(trades, quotes):
+    profiler = FeatureCostProfiler(n_rows=1500, stream_ticks=500, repeats=1)
+    costs = profiler.profile(merged(trades, quotes))
+    assert list(costs.index) == [g.name for g in feature_groups()]
+    assert (costs[['batch_us_per_row', 'tick_us']] >= 0).all().all()
+
+
+@pytest.fixture
+def priced_profiler():
+    """A profiler with a hand-built cost table instead of timings."""
+    profiler = FeatureCostProfiler()
+    tick_us = dict.fromkeys(profiler.groups, 0.0)
+    tick_us.update({'trade': 1.0, 'flow_20': 4.0, 'price_windows': 3.0, 'volatility_20': 2.0, 'rsi_14': 6.0})
+    profiler.costs = pd.DataFrame({'tick_us': pd.Series(tick_us)})
+    return profiler
+
+
+IMPORTANCE = {'flow_imbalance_20': 10.0, 'volatility_20': 4.0, 'rsi_14': 3.0, 'net_flow_20': 1.0,
+              'not_profiled': 0.5, 'hour': 0.2, 'macd': 0.0}
+
+
+def test_select_respects_budget_and_counts_shared_groups_once(priced_profiler):
+    # flow_imbalance_20 pays trade + flow_20 (5 µs), which makes net_flow_20 free;
+    # volatility_20 pays price_windows + its own group (5 µs); rsi_14 no longer fits
+    selected = priced_profiler.select(IMPORTANCE, tick_budget_us=10.0)
+    assert selected == ['not_profiled', 'hour', 'flow_imbalance_20', 'net_flow_20', 'volatility_20']
+    assert priced_profiler.tick_cost(['flow_imbalance_20', 'net_flow_20']) == 5.0
+    assert priced_profiler.tick_cost(selected) == 10.0
+
+
+def test_select_takes_free_features_without_budget(priced_profiler):
+    # Unprofiled features and features of zero-cost groups; zero importance is never taken
+    assert priced_profiler.select(IMPORTANCE, tick_budget_us=0.0) == ['not_profiled', 'hour']
+    assert priced_profiler.select(IMPORTANCE, tick_budget_us=100.0, n_features=3) == \
+        ['not_profiled', 'hour', 'flow_imbalance_20']
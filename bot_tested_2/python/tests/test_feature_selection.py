@@ -0,0 +1,61 @@
+"""Cached feature selection: reused while the inputs match, recomputed when they change."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_model
+from train_model import OptimizedModelTrainer
+
+
+@pytest.fixture
+def data(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 9)), columns=[f'f{i}' for i in range(9)])
+    y = (X['f0'] + 0.5 * X['f3'] + rng.normal(scale=0.5, size=len(X)) > 0).to_numpy(np.int64)
+    path = tmp_path / 'features.csv'
+    X.assign(target=y).to_csv(path, index=False)
+    return str(path), X, y
+
+
+@pytest.fixture
+def lgb_fits(monkeypatch):
+    """Count the LightGBM fits select_features runs (one per uncached selection)."""
+    calls = []
+    train = train_model.lgb.train
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return train(*args, **kwargs)
+    monkeypatch.setattr(train_model.lgb, 'train', counted)
+    return calls
+
+
+def test_selection_cache_invalidation(data, tmp_path, lgb_fits):
+    path, X, y = data
+    cache_dir = str(tmp_path / 'cache')
+
+    def select(**config):
+        trainer = OptimizedModelTrainer(features_path=path, selection_cache_dir=cache_dir, **config)
+        return trainer.select_features(X, y, n_features=6)
+
+    first = select(target_config={'horizon': 20})
+    assert len(lgb_fits) == 1 and 'f0' in first
+    assert select(target_config={'horizon': 20}) == first
+    assert len(lgb_fits) == 1
+
+    # A rewritten feature file (new mtime) is a new feature store version
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert select(target_config={'horizon': 20}) == first
+    assert len(lgb_fits) == 2
+
+    # So is another target configuration, or other labels
+    select(target_config={'horizon': 50})
+    assert len(lgb_fits) == 3
+    OptimizedModelTrainer(features_path=path, selection_cache_dir=cache_dir,
+                          target_config={'horizon': 50}).select_features(X, 1 - y, n_features=6)
+    assert len(lgb_fits) == 4
+    assert len(os.listdir(cache_dir)) == 4
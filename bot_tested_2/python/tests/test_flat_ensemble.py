@@ -0,0 +1,114 @@
+"""Flat node arrays must reproduce every member's own probabilities, split edges and NaNs included."""
+
+import json
+
+import numpy as np
+import pytest
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+
+from binning import QuantileBinner
+from flat_ensemble import FlatEnsemble
+
+N_ROWS = 1500
+N_FEATURES = 5
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, N_FEATURES))
+    y = (X[:, 0] + 0.5 * X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=N_ROWS) > 0).astype(int)
+    return X, y
+
+
+def train_members(X, y):
+    lgb_model = lgb.train({'objective': 'binary', 'num_leaves': 15, 'verbose': -1, 'num_threads': 1},
+                          lgb.Dataset(X, label=y), num_boost_round=30)
+    xgb_model = xgb.XGBClassifier(n_estimators=30, max_depth=4, tree_method='hist', n_jobs=1)
+    xgb_model.fit(X, y)
+    rf_model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0, n_jobs=1)
+    rf_model.fit(X, y)
+    return [lgb_model, xgb_model, rf_model]
+
+
+def split_thresholds(models):
+    """Every split value of every member, as (feature, value) pairs."""
+    lgb_model, xgb_model, rf_model = models
+    splits = []
+    stack = [info['tree_structure'] for info in lgb_model.dump_model()['tree_info']]
+    while stack:
+        node = stack.pop()
+        if 'split_feature' in node:
+            splits.append((node['split_feature'], node['threshold']))
+            stack.extend((node['left_child'], node['right_child']))
+    for tree in json.loads(xgb_model.get_booster().save_raw('json'))['learner']['gradient_booster']['model']['trees']:
+        for f, c, left in zip(tree['split_indices'], tree['split_conditions'], tree['left_children']):
+            if left >= 0:
+                splits.append((f, float(np.float32(c))))
+    for estimator in rf_model.estimators_:
+        t = estimator.tree_
+        splits.extend((f, thr) for f, thr in zip(t.feature, t.threshold) if f >= 0)
+    return splits
+
+
+def edge_rows(X, models, rng):
+    """Rows holding split values exactly (and one float32 ulp either side), plus rows with NaNs."""
+    rows = []
+    for f, value in split_thresholds(models):
+        if not np.isfinite(value):
+            continue
+        for v in (value, np.nextafter(np.float32(value), np.float32(-np.inf)),
+                  np.nextafter(np.float32(value), np.float32(np.inf))):
+            row = X[rng.integers(len(X))].copy()
+            row[f] = v
+            rows.append(row)
+    nan_rows = X[rng.integers(len(X), size=50)].copy()
+    nan_rows[rng.random(nan_rows.shape) < 0.3] = np.nan
+    return np.vstack(rows + [nan_rows])
+
+
+def member_probas(models, X):
+    lgb_model, xgb_model, rf_model = models
+    return np.column_stack([lgb_model.predict(X), xgb_model.predict_proba(X)[:, 1],
+                            rf_model.predict_proba(X)[:, 1]])
+
+
+def check(flat, models, X, inputs):
+    expected = member_probas(models, inputs)
+    got = flat.member_proba(X)
+    # LightGBM and RandomForest sum leaves in float64; XGBoost sums its margin in float32
+    np.testing.assert_allclose(got[:, [0, 2]], expected[:, [0, 2]], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(got[:, 1], expected[:, 1], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(flat.predict_proba(X), expected.mean(axis=1), rtol=0, atol=5e-7)
+    single = np.array([flat.predict_one(row) for row in X])
+    np.testing.assert_allclose(single, flat.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_matches_members_on_split_values_and_nans(data):
+    X, y = data
+    X = X.copy()
+    X[np.random.default_rng(1).random(X.shape) < 0.05] = np.nan
+    models = train_members(X, y)
+    flat = FlatEnsemble.from_models(models, N_FEATURES)
+    rows = np.vstack([X[:300], edge_rows(X, models, np.random.default_rng(2))])
+    check(flat, models, rows, rows)
+
+
+def test_matches_members_on_binned_codes(data):
+    X, y = data
+    binner = QuantileBinner(max_bins=32)
+    codes = binner.fit_transform(X)
+    models = train_members(codes, y)
+    flat = FlatEnsemble.from_models(models, N_FEATURES, binner)
+    # Flat ensemble bins the scaled features itself, members get the codes
+    check(flat, models, X[:500], binner.transform(X[:500]))
+
+
+def test_save_load_roundtrip(data, tmp_path):
+    X, y = data
+    flat = FlatEnsemble.from_models(train_members(X, y), N_FEATURES)
+    flat.save(tmp_path / 'flat.npz')
+    loaded = FlatEnsemble.load(tmp_path / 'flat.npz')
+    np.testing.assert_array_equal(loaded.predict_proba(X[:200]), flat.predict_proba(X[:200]))
@@ -0,0 +1,74 @@
+"""Hyperband search: promotion by AUC and the wall-clock budget, on a simulated clock."""
+
+import numpy as np
+import pytest
+
+import hyperparameter_search
+from hyperparameter_search import HyperbandSearch
+
+N_ROWS = 2000
+SECONDS_PER_ROW = 1e-3
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Tasks take time proportional to their rows and score a fixed AUC per config."""
+    clock = FakeClock()
+
+    def task(config_id, config, train_start, train_stop, test_stop, *args):
+        clock.now += (test_stop - train_start) * SECONDS_PER_ROW
+        return config_id, 0.5 + (config_id * 37 % 101) / 1000, {'lightgbm': 40 + config_id, 'xgboost': 25}
+    monkeypatch.setattr(hyperparameter_search.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(hyperparameter_search, '_config_fold_task', task)
+    return clock
+
+
+def run(time_budget):
+    search = HyperbandSearch(time_budget=time_budget, n_workers=1)
+    params = search.run(np.zeros((N_ROWS, 3)), np.zeros(N_ROWS))
+    return search, params
+
+
+def test_unlimited_budget_promotes_the_top_third(clock):
+    search, params = run(time_budget=1e9)
+    rungs = {}
+    for entry in search.history:
+        rungs.setdefault(entry['rung'], []).append(entry)
+    # Brackets start 27 / 9 / 3 / 1 configs at rungs 0 / 1 / 2 / 3, cut to a third per rung
+    assert [len(rungs[r]) for r in range(4)] == [27, 9 + 9, 3 + 3 + 3, 1 + 1 + 1 + 1]
+
+    first_bracket = [e for e in search.history if e['config_id'] < 27]
+    for rung in range(3):
+        ranked = sorted((e for e in first_bracket if e['rung'] == rung), key=lambda e: -e['auc'])
+        promoted = {e['config_id'] for e in first_bracket if e['rung'] == rung + 1}
+        assert promoted == {e['config_id'] for e in ranked[:len(promoted)]}
+
+    final = max((e for e in search.history if e['rung'] == 3), key=lambda e: e['auc'])
+    assert search.best['config_id'] == final['config_id']
+    assert params['lightgbm']['num_boost_round'] == 40 + final['config_id']
+    assert params['xgboost']['n_estimators'] == 25
+
+
+@pytest.mark.parametrize('share', [0.05, 0.3, 0.7])
+def test_search_stays_within_the_budget(clock, share):
+    run(time_budget=1e9)
+    total = clock.now
+    longest_task = N_ROWS * SECONDS_PER_ROW
+
+    clock.now = 0.0
+    search, params = run(time_budget=share * total)
+    # At most the task running when the deadline passed overruns it
+    assert clock.now <= share * total + longest_task
+    completed = [e for e in search.history if e['rung'] == 3]
+    if completed:
+        assert search.best['auc'] == max(e['auc'] for e in completed)
+    else:
+        assert search.best is None and params == {}
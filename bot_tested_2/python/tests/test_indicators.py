@@ -0,0 +1,24 @@
+"""Native indicator kernels against the `ta` package they replace."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+
+ta = pytest.importorskip('ta')
+
+
+@pytest.mark.parametrize('window', [5, 14])
+def test_rsi_matches_ta(prices, window):
+    expected = ta.momentum.RSIIndicator(pd.Series(prices), window=window).rsi().to_numpy()
+    np.testing.assert_allclose(indicators.rsi(prices, window=window), expected,
+                               rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_macd_matches_ta(prices):
+    expected = ta.trend.MACD(pd.Series(prices))
+    line, signal, diff = indicators.macd(prices)
+    for actual, reference in [(line, expected.macd()), (signal, expected.macd_signal()),
+                              (diff, expected.macd_diff())]:
+        np.testing.assert_allclose(actual, reference.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
@@ -0,0 +1,67 @@
+"""Label builders on small hand-computed price paths."""
+
+import numpy as np
+import pandas as pd
+
+from labels import LABEL_MISSING, build_labels, triple_barrier_labels
+
+M = LABEL_MISSING
+
+
+def test_build_labels_by_hand():
+    mid = [100.0, 101.0, 100.0, 99.0, 99.0, 102.0]
+    # 1-tick returns:  .01, -.0099, -.01, 0, .0303, -    (median 0)
+    # 2-tick returns:  0, -.0198, -.01, .0303, -, -      (median -.005)
+    schemes = {'dir': ('fixed', 0.005), 'up': ('percentile', 0.5)}
+    index = pd.RangeIndex(10, 16)
+    labels = build_labels(mid, horizons=(1, 2), schemes=schemes, index=index)
+
+    assert list(labels.columns) == ['dir_1', 'dir_2', 'up_1', 'up_2']
+    assert (labels.dtypes == np.int8).all()
+    assert labels.index.equals(index)
+    np.testing.assert_array_equal(labels['dir_1'], [1, -1, -1, 0, 1, M])
+    np.testing.assert_array_equal(labels['dir_2'], [0, -1, -1, 1, M, M])
+    np.testing.assert_array_equal(labels['up_1'], [1, 0, 0, 0, 1, M])
+    np.testing.assert_array_equal(labels['up_2'], [1, 0, 0, 1, M, M])
+
+
+def test_build_labels_std_scheme_and_gaps():
+    mid = np.array([100.0, 100.0, np.nan, 100.0, 101.0, 99.0])
+    labels = build_labels(mid, horizons=(1,), schemes={'dir3': ('std', 0.5)})
+    # Returns 0, nan, nan, .01, -.0198 -> threshold 0.5 * std = .0076
+    np.testing.assert_array_equal(labels['dir3_1'], [0, M, M, 1, -1, M])
+
+
+def test_triple_barrier_upper_hit_and_timeout():
+    mid = [100.0, 100.5, 101.5, 100.0, 100.0]
+    # Row 0 reaches +1.5% at offset 2; row 1 stays within 1% (+0.995%, -0.5%) for 3 ticks
+    labels, offset, ret = triple_barrier_labels(mid, horizon=3, profit_take=0.01, stop_loss=0.01)
+    np.testing.assert_array_equal(labels, [1, 0, M, M, M])
+    np.testing.assert_array_equal(offset, [2, 3, -1, -1, -1])
+    np.testing.assert_allclose(ret, [0.015, 100.0 / 100.5 - 1.0, np.nan, np.nan, np.nan], equal_nan=True)
+
+    labels, _, _ = triple_barrier_labels(mid, horizon=3, profit_take=0.01, stop_loss=0.01,
+                                         timeout_label='sign')
+    np.testing.assert_array_equal(labels, [1, -1, M, M, M])
+
+
+def test_triple_barrier_lower_hit_first():
+    # -1.1% at offset 2 comes before the +2% at offset 3
+    mid = [100.0, 99.5, 98.9, 102.0]
+    labels, offset, ret = triple_barrier_labels(mid, horizon=3, profit_take=0.01, stop_loss=0.01)
+    np.testing.assert_array_equal(labels, [-1, M, M, M])
+    np.testing.assert_array_equal(offset, [2, -1, -1, -1])
+    np.testing.assert_allclose(ret[0], -0.011)
+
+
+def test_triple_barrier_missing_tail_and_nan_mid():
+    labels, offset, ret = triple_barrier_labels([100.0, 100.0], horizon=3, profit_take=0.01, stop_loss=0.01)
+    np.testing.assert_array_equal(labels, [M, M])
+    np.testing.assert_array_equal(offset, [-1, -1])
+    assert np.isnan(ret).all()
+
+    # No barrier touched and no mid at the vertical barrier: no sign to take
+    mid = [100.0, 100.2, 100.1, np.nan]
+    labels, _, _ = triple_barrier_labels(mid, horizon=3, profit_take=0.01, stop_loss=0.01,
+                                         timeout_label='sign')
+    assert labels[0] == M
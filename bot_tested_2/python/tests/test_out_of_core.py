@@ -0,0 +1,74 @@
+"""Out-of-core partitions must train the same models as the in-memory matrix."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+import xgboost as xgb
+
+from out_of_core import PartitionedFeatures, PartitionSource, ScaledTransform
+
+N_ROWS = 2000
+FEATURES = ['a', 'b', 'c', 'd']
+
+
+@pytest.fixture
+def store(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, len(FEATURES))).astype(np.float32)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    y = (np.nan_to_num(X[:, 0]) + 0.5 * np.nan_to_num(X[:, 2]) + rng.normal(scale=0.7, size=N_ROWS) > 0)
+    df = pd.DataFrame(X, columns=FEATURES)
+    df.insert(0, 'timestamp', np.arange(N_ROWS))
+    df['target'] = y.astype(np.int8)
+    path = tmp_path / 'features.csv'
+    df.to_csv(path, index=False)
+    # Reservoir larger than the data: medians are exact
+    store = PartitionedFeatures(str(path), str(tmp_path / 'spill'), ['timestamp', 'target'],
+                                chunksize=600, reservoir_size=N_ROWS).scan()
+    return store, pd.read_csv(path, dtype={col: np.float32 for col in FEATURES})
+
+
+def in_memory(df):
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    medians = np.nanmedian(X, axis=0)
+    X = np.where(np.isnan(X), medians, X)
+    return (X - X.mean(axis=0)) / X.std(axis=0), df['target'].to_numpy(), medians
+
+
+def test_partitions_and_statistics(store):
+    store, df = store
+    assert len(store.partitions) == 4 and len(store) == N_ROWS
+    columns = [1, 3]
+    np.testing.assert_array_equal(store.rows(500, 1300, columns),
+                                  df[['b', 'd']].to_numpy(np.float32)[500:1300])
+    np.testing.assert_array_equal(store.labels(500, 1300), df['target'].to_numpy()[500:1300])
+
+    X, _, medians = in_memory(df)
+    scaler, fill = store.fit_scaler(FEATURES)
+    np.testing.assert_allclose(fill, medians, rtol=1e-12)
+    transform = ScaledTransform(fill, scaler)
+    np.testing.assert_allclose(transform(store.rows(0, N_ROWS, [0, 1, 2, 3])), X, rtol=1e-9, atol=1e-9)
+
+
+def test_models_match_in_memory_training(store):
+    store, df = store
+    X, y, _ = in_memory(df)
+    scaler, fill = store.fit_scaler(FEATURES)
+    source = PartitionSource(store, [0, 1, 2, 3], ScaledTransform(fill, scaler))
+    stop = 1500
+
+    params = {'objective': 'binary', 'num_leaves': 15, 'verbose': -1, 'num_threads': 1}
+    streamed = lgb.train(params, source.lgb_train_set(stop), num_boost_round=20)
+    direct = lgb.train(params, lgb.Dataset(X[:stop], label=y[:stop]), num_boost_round=20)
+    np.testing.assert_allclose(streamed.predict(X), direct.predict(X), rtol=1e-9, atol=1e-12)
+
+    params = {'objective': 'binary:logistic', 'tree_method': 'hist', 'max_depth': 4, 'nthread': 1}
+    streamed = xgb.train(params, source.xgb_train_matrix(stop), num_boost_round=20)
+    direct = xgb.train(params, xgb.QuantileDMatrix(X[:stop], label=y[:stop], max_bin=256), num_boost_round=20)
+    np.testing.assert_allclose(streamed.predict(xgb.DMatrix(X)), direct.predict(xgb.DMatrix(X)),
+                               rtol=1e-6, atol=1e-7)
+
+    rf_X, rf_y = source.rf_train_set(stop)
+    np.testing.assert_allclose(rf_X, X[:stop], rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(rf_y, y[:stop])
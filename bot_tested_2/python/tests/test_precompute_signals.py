@@ -0,0 +1,58 @@
+"""Precomputed replay signals must line up one-to-one with the live generator's per-tick signals."""
+
+import joblib
+import numpy as np
+import pytest
+import lightgbm as lgb
+from sklearn.preprocessing import StandardScaler
+
+from feature_engineering import ComprehensiveFeatureEngineer
+from online_features import OnlineFeatureEngine
+from precompute_signals import precompute_signals, signals_from_proba, RECORD_DTYPE
+from predictor import EnsemblePredictor
+from signal_generator import load_ticks, BUY_THRESHOLD, SELL_THRESHOLD
+from conftest import TRADES_PATH, QUOTES_PATH
+
+FEATURES = ['spread', 'obi', 'flow_imbalance_10', 'volatility_20', 'price_zscore_10',
+            'rsi_14', 'macd_diff', 'ols_slope_50']
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    ticks = load_ticks(QUOTES_PATH, TRADES_PATH)
+    features = ComprehensiveFeatureEngineer(TRADES_PATH, QUOTES_PATH).calculate_comprehensive_features(ticks)
+    X = features[FEATURES].to_numpy(dtype=np.float64)
+    y = (features['price'].shift(-20) > features['price']).to_numpy(np.int64)
+    fill_values = np.nanmedian(X, axis=0)
+    X = np.where(np.isfinite(X), X, fill_values)
+    scaler = StandardScaler().fit(X)
+    booster = lgb.train({'objective': 'binary', 'num_leaves': 15, 'learning_rate': 0.1, 'verbose': -1},
+                        lgb.Dataset(scaler.transform(X), label=y), num_boost_round=30)
+    path = tmp_path_factory.mktemp('model') / 'ensemble_model.pkl'
+    joblib.dump({'models': [booster], 'scaler': scaler, 'feature_names': FEATURES,
+                 'fill_values': fill_values}, path)
+    return str(path)
+
+
+def test_replay_records_match_live_ticks(model_path, tmp_path):
+    records = precompute_signals(model_path, QUOTES_PATH, TRADES_PATH,
+                                 output_path=str(tmp_path / 'ml_signals.bin'))
+    assert records.dtype == RECORD_DTYPE
+
+    # The live path: one signal per tick of the same replay, in order
+    ticks = load_ticks(QUOTES_PATH, TRADES_PATH)
+    predictor = EnsemblePredictor.load(model_path)
+    engine = OnlineFeatureEngine(predictor.feature_names)
+    live = np.array([predictor.predict(engine.update(tick))
+                     for tick in ticks.to_dict('records')])
+
+    assert len(records) == len(ticks)
+    np.testing.assert_array_equal(records['timestamp'], ticks['timestamp'].to_numpy(np.int64))
+    np.testing.assert_allclose(records['confidence'], live, atol=1e-6)
+    clear = (np.abs(live - BUY_THRESHOLD) > 1e-6) & (np.abs(live - SELL_THRESHOLD) > 1e-6)
+    np.testing.assert_array_equal(records['signal'][clear], signals_from_proba(live)[clear])
+
+
+def test_precompute_requires_trades(model_path, tmp_path):
+    with pytest.raises(ValueError, match='trades_path'):
+        precompute_signals(model_path, QUOTES_PATH, None, output_path=str(tmp_path / 'ml_signals.bin'))
@@ -0,0 +1,96 @@
+"""Latency pruning: prefix-sum AUCs must equal truncated framework models, and the search must respect the budget."""
+
+import itertools
+
+import numpy as np
+import pytest
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+from pruning import LatencyPruner, truncate_model, TREE_FRACTIONS
+from train_model import OptimizedModelTrainer
+
+N_ROWS = 1600
+N_FEATURES = 4
+TREES = 20
+US_PER_TREE = 1.0
+
+
+@pytest.fixture(scope='module')
+def setup():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, N_FEATURES))
+    y = (X[:, 0] - 0.7 * X[:, 1] * X[:, 3] + rng.normal(scale=0.8, size=N_ROWS) > 0).astype(int)
+    train, val, hold = slice(0, 1000), slice(1000, 1300), slice(1300, None)
+    models = [
+        lgb.train({'objective': 'binary', 'num_leaves': 7, 'verbose': -1, 'num_threads': 1},
+                  lgb.Dataset(X[train], label=y[train]), num_boost_round=TREES),
+        xgb.XGBClassifier(n_estimators=TREES, max_depth=3, tree_method='hist', n_jobs=1).fit(X[train], y[train]),
+        RandomForestClassifier(n_estimators=TREES, max_depth=5, random_state=0, n_jobs=1).fit(X[train], y[train]),
+    ]
+    pruner = LatencyPruner(models, ['lightgbm', 'xgboost', 'random_forest'], N_FEATURES)
+    return pruner, (X[val], y[val]), (X[hold], y[hold])
+
+
+def variants():
+    counts = sorted({max(1, int(round(TREES * f))) for f in TREE_FRACTIONS})
+    for choice in itertools.product([0] + counts, repeat=3):
+        variant = {m: k for m, k in enumerate(choice) if k > 0}
+        if variant:
+            yield variant
+
+
+def truncated_proba(pruner, variant, X):
+    return np.mean([OptimizedModelTrainer._predict_member(model, X)
+                    for model in pruner.pruned_models(variant)], axis=0)
+
+
+@pytest.fixture(scope='module')
+def val_aucs(setup):
+    """Validation AUC of every searched variant, from truncated framework models."""
+    pruner, (X, y), _ = setup
+    return [(variant, roc_auc_score(y, truncated_proba(pruner, variant, X))) for variant in variants()]
+
+
+def test_prefix_auc_matches_truncated_models(setup, val_aucs):
+    pruner, (X, y), _ = setup
+    prefix = pruner._prefix_proba(X)
+    for variant in variants():
+        expected = truncated_proba(pruner, variant, X)
+        # XGBoost predicts in float32
+        np.testing.assert_allclose(pruner._variant_proba(prefix, variant), expected, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(pruner.flat_variant(variant).predict_proba(X), expected, rtol=0, atol=1e-6)
+    for variant, auc in val_aucs:
+        assert abs(roc_auc_score(y, pruner._variant_proba(prefix, variant)) - auc) < 1e-4, variant
+
+
+def test_truncate_model_keeps_the_leading_trees(setup):
+    pruner, (X, _), _ = setup
+    lgb_model, xgb_model, rf_model = pruner.models
+    np.testing.assert_allclose(truncate_model(lgb_model, 5).predict(X), lgb_model.predict(X, num_iteration=5))
+    np.testing.assert_allclose(truncate_model(xgb_model, 5).predict(xgb.DMatrix(X)),
+                               xgb_model.get_booster().predict(xgb.DMatrix(X), iteration_range=(0, 5)))
+    forest = truncate_model(rf_model, 5)
+    assert forest.estimators_ == rf_model.estimators_[:5] and len(rf_model.estimators_) == TREES
+
+
+@pytest.mark.parametrize('budget', [8, 25, 1e9])
+def test_search_returns_the_best_variant_inside_the_budget(setup, val_aucs, monkeypatch, budget):
+    pruner, (X_val, y_val), (X_hold, y_hold) = setup
+    # Deterministic latency: proportional to the number of trees kept
+    monkeypatch.setattr(pruner, '_flat_latency', lambda variant, x: US_PER_TREE * sum(variant.values()))
+    variant, val_auc, holdout_auc, latency = pruner.search(X_val, y_val, X_hold, y_hold, budget)
+
+    assert latency == US_PER_TREE * sum(variant.values()) <= budget
+    assert abs(val_auc - roc_auc_score(y_val, truncated_proba(pruner, variant, X_val))) < 1e-4
+    assert abs(holdout_auc - roc_auc_score(y_hold, truncated_proba(pruner, variant, X_hold))) < 1e-4
+    best = max(auc for v, auc in val_aucs if US_PER_TREE * sum(v.values()) <= budget)
+    assert val_auc >= best - 1e-4
+
+
+def test_search_without_a_fitting_variant(setup, monkeypatch):
+    pruner, (X_val, y_val), (X_hold, y_hold) = setup
+    monkeypatch.setattr(pruner, '_flat_latency', lambda variant, x: US_PER_TREE * sum(variant.values()))
+    assert pruner.search(X_val, y_val, X_hold, y_hold, latency_budget_us=US_PER_TREE / 2) is None
@@ -0,0 +1,36 @@
+"""RollingQuantile (live) and rolling_quantile() (batch) must agree, NaNs included."""
+
+import numpy as np
+import pytest
+
+from rolling_quantile import RollingQuantile, rolling_quantile
+
+
+def streamed(values, q, window, min_periods=1):
+    engine = RollingQuantile(q, window=window, min_periods=min_periods)
+    return np.array([engine.update(x) for x in values])
+
+
+@pytest.mark.parametrize('q', [0.0, 0.25, 0.5, 0.9, 1.0])
+@pytest.mark.parametrize('window', [None, 1, 7, 100])
+def test_stream_matches_batch_with_gaps(q, window):
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(size=2000), 1)  # rounding forces ties
+    values[:5] = np.nan                         # trades before the first quote
+    values[rng.random(len(values)) < 0.05] = np.nan
+    values[50] = np.inf
+    batch = rolling_quantile(values, q, window=window)
+    np.testing.assert_allclose(streamed(values, q, window), batch, rtol=0, atol=1e-12, equal_nan=True)
+    assert np.isnan(batch[~np.isfinite(values)]).all()
+
+
+def test_min_periods():
+    values = np.arange(10, dtype=np.float64)
+    np.testing.assert_array_equal(streamed(values, 0.5, 5, min_periods=3),
+                                  rolling_quantile(values, 0.5, window=5, min_periods=3))
+
+
+def test_book_depth(quotes):
+    depth = (quotes['bid_volume'] + quotes['ask_volume']).to_numpy()
+    np.testing.assert_allclose(streamed(depth, 0.25, 1000), rolling_quantile(depth, 0.25, window=1000),
+                               rtol=0, atol=1e-9)
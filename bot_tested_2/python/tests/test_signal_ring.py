@@ -0,0 +1,107 @@
+"""Signal ring round trip and segment ownership."""
+
+import os
+import subprocess
+import sys
+import threading
+from multiprocessing import shared_memory
+
+import pytest
+
+from signal_ring import (SignalRingProducer, SignalRingConsumer, wait_for_ring, ring_size,
+                         RING_MAGIC, RING_VERSION, RECORD_SIZE, _META)
+from conftest import ML_DIR
+
+
+@pytest.fixture
+def ring_name(request):
+    return f'test_ring_{os.getpid()}_{request.node.name}'[:30]
+
+
+def test_round_trip_and_drop_when_full(ring_name):
+    with SignalRingProducer(ring_name, capacity=4) as producer:
+        with SignalRingConsumer(ring_name) as consumer:
+            for i in range(6):
+                producer.write(1 if i % 2 else -1, 0.25 * (i % 4), tick_ns=1000 + i, timestamp_ns=i)
+            assert producer.dropped == 2
+            records = consumer.poll()
+            assert [r[:3] for r in records] == [(i, 1000 + i, i) for i in range(4)]
+            assert [r[3] for r in records] == [-1, 1, -1, 1]
+            assert producer.write(0, 0.5, tick_ns=2000)
+            assert consumer.read(timeout=0.1)[:2] == (4, 2000)
+
+
+def test_existing_ring_of_a_live_producer_is_not_replaced(ring_name):
+    with SignalRingProducer(ring_name, capacity=4) as producer:
+        with pytest.raises(FileExistsError, match='in use'):
+            SignalRingProducer(ring_name, capacity=4)
+        producer.write(1, 0.9, tick_ns=7)
+        with SignalRingConsumer(ring_name) as consumer:
+            assert consumer.poll()[0][1] == 7
+
+
+def test_foreign_segment_is_not_replaced(ring_name):
+    other = shared_memory.SharedMemory(name=ring_name, create=True, size=4096)
+    try:
+        with pytest.raises(FileExistsError, match='not a signal ring'):
+            SignalRingProducer(ring_name, capacity=4)
+    finally:
+        other.close()
+        other.unlink()
+
+
+def test_ring_left_by_a_dead_producer_is_replaced(ring_name):
+    # A producer that dies without cleanup (its resource tracker gone too)
+    script = (f"import os, sys; sys.path.insert(0, {os.path.abspath(ML_DIR)!r})\n"
+              f"from multiprocessing import resource_tracker\n"
+              f"from signal_ring import SignalRingProducer\n"
+              f"SignalRingProducer({ring_name!r}, capacity=4)\n"
+              f"resource_tracker.unregister('/' + {ring_name!r}, 'shared_memory')\n"
+              f"os._exit(0)\n")
+    subprocess.run([sys.executable, '-c', script], check=True)
+    with SignalRingProducer(ring_name, capacity=4) as producer:
+        with SignalRingConsumer(ring_name) as consumer:
+            producer.write(1, 0.6, tick_ns=3)
+            assert consumer.poll()[0][1] == 3
+
+
+def test_consumer_in_another_process_leaves_the_segment(ring_name):
+    script = (f"import sys; sys.path.insert(0, {os.path.abspath(ML_DIR)!r})\n"
+              f"from signal_ring import SignalRingConsumer\n"
+              f"consumer = SignalRingConsumer({ring_name!r})\n"
+              f"print(consumer.poll()[0][1])\n"
+              f"consumer.close()\n")
+    with SignalRingProducer(ring_name, capacity=4) as producer:
+        producer.write(-1, 0.1, tick_ns=42)
+        result = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True)
+        assert result.stdout.strip() == '42'
+        assert 'resource_tracker' not in result.stderr
+        with SignalRingConsumer(ring_name) as consumer:
+            assert consumer.tail == 1
+
+
+def test_wait_for_ring_retries_until_the_header_is_written(ring_name):
+    # A producer caught between creating the segment and writing its header
+    segment = shared_memory.SharedMemory(name=ring_name, create=True, size=ring_size(4))
+    try:
+        with pytest.raises(ValueError, match='not a signal ring'):
+            SignalRingConsumer(ring_name)
+        header = threading.Timer(0.05, _META.pack_into,
+                                 (segment.buf, 0, RING_MAGIC, RING_VERSION, RECORD_SIZE, 4, os.getpid()))
+        header.start()
+        with wait_for_ring(ring_name, poll_interval=0.01) as consumer:
+            assert consumer.capacity == 4 and consumer.poll() == []
+        header.join()
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def test_wait_for_ring_gives_up_on_a_foreign_segment(ring_name):
+    other = shared_memory.SharedMemory(name=ring_name, create=True, size=4096)
+    try:
+        with pytest.raises(ValueError, match='not a signal ring'):
+            wait_for_ring(ring_name, header_timeout=0.05, poll_interval=0.01)
+    finally:
+        other.close()
+        other.unlink()
@@ -0,0 +1,65 @@
+"""SignalWriter must bound how long a queued signal waits, not only how many wait."""
+
+import pytest
+
+import signal_writer
+from signal_writer import SignalWriter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(signal_writer.time, 'monotonic', fake)
+    return fake
+
+
+def read_lines(path):
+    with open(path) as fh:
+        return fh.read().splitlines()
+
+
+def test_flush_mode_writes_a_batch_once_its_oldest_line_is_max_delay_old(tmp_path, clock):
+    path = str(tmp_path / 'signals.txt')
+    with SignalWriter(path, durability='flush', batch_size=64, max_delay_ms=2) as writer:
+        writer.write(1, 0.6)
+        clock.now += 0.001
+        writer.write(0, 0.5)
+        assert read_lines(path) == []
+        clock.now += 0.001
+        writer.write(-1, 0.4)
+        assert read_lines(path) == ['1,0.6000', '0,0.5000', '-1,0.4000']
+        assert writer.writes == 1
+
+
+def test_fsync_mode_commits_on_write_once_the_interval_is_up(tmp_path, clock, monkeypatch):
+    synced = []
+    monkeypatch.setattr(signal_writer.os, 'fsync', synced.append)
+    path = str(tmp_path / 'signals.txt')
+    writer = SignalWriter(path, durability='fsync', batch_size=2, fsync_interval_ms=10, max_delay_ms=1000)
+    writer.write(1, 0.6)
+    writer.write(1, 0.7)
+    assert writer.writes == 1 and writer.fsyncs == 0
+    clock.now += 0.01
+    writer.write(0, 0.5)
+    assert writer.fsyncs == 1 and len(synced) == 1
+    writer.close()
+    assert read_lines(path) == ['1,0.6000', '1,0.7000', '0,0.5000']
+
+
+def test_none_mode_only_writes_full_batches(tmp_path, clock):
+    path = str(tmp_path / 'signals.txt')
+    with SignalWriter(path, durability='none', batch_size=3) as writer:
+        writer.write(1, 0.6)
+        clock.now += 10.0
+        writer.write(0, 0.5)
+        assert read_lines(path) == []
+        writer.write(-1, 0.4)
+        assert len(read_lines(path)) == 3
@@ -0,0 +1,115 @@
+"""Streaming kernels must reproduce their batch counterparts on the sample data."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import (ema, rsi, macd, bollinger,
+                        StreamingEMA, StreamingRSI, StreamingMACD, StreamingBollinger)
+from trend_features import (rolling_ols, variance_ratio, sign_entropy,
+                            StreamingOLS, StreamingVarianceRatio, StreamingSignEntropy)
+from spectral_features import frac_diff, rolling_lagged_corr, StreamingFracDiff, StreamingLaggedCorrelation
+from events import EventStream, iter_trades_with_quotes
+from conftest import TRADES_PATH, QUOTES_PATH
+
+RTOL = 1e-8
+ATOL = 1e-10
+
+
+def stream(kernel, *columns):
+    """Run kernel.update over the columns; returns one array per output."""
+    out = [kernel.update(*row) for row in zip(*columns)]
+    return np.array(out, dtype=np.float64).reshape(len(out), -1).T
+
+
+def assert_parity(streamed, batch):
+    np.testing.assert_allclose(streamed, np.asarray(batch, dtype=np.float64),
+                               rtol=RTOL, atol=ATOL, equal_nan=True)
+
+
+# ==================== INDICATORS ====================
+
+@pytest.mark.parametrize('span', [5, 12, 26])
+def test_ema(prices, span):
+    (streamed,) = stream(StreamingEMA(span=span), prices)
+    assert_parity(streamed, ema(prices, span=span))
+
+
+def test_rsi(prices):
+    (streamed,) = stream(StreamingRSI(14), prices)
+    assert_parity(streamed, rsi(prices, 14))
+
+
+def test_macd(prices):
+    streamed = stream(StreamingMACD(), prices)
+    for s, b in zip(streamed, macd(prices)):
+        assert_parity(s, b)
+
+
+def test_bollinger(prices):
+    streamed = stream(StreamingBollinger(20, 2), prices)
+    for s, b in zip(streamed, bollinger(prices, 20, 2)):
+        assert_parity(s, b)
+
+
+# ==================== TREND FEATURES ====================
+
+@pytest.mark.parametrize('window', [20, 50, 100])
+def test_ols(prices, window):
+    streamed = stream(StreamingOLS(window), prices)
+    for s, b in zip(streamed, rolling_ols(prices, window)):
+        assert_parity(s, b)
+
+
+@pytest.mark.parametrize('window', [20, 50, 100])
+def test_variance_ratio(prices, window):
+    streamed = stream(StreamingVarianceRatio(window), prices)
+    for s, b in zip(streamed, variance_ratio(prices, window)):
+        assert_parity(s, b)
+
+
+@pytest.mark.parametrize('window', [20, 50, 100])
+def test_sign_entropy(prices, window):
+    (streamed,) = stream(StreamingSignEntropy(window), prices)
+    assert_parity(streamed, sign_entropy(prices, window))
+
+
+# ==================== SPECTRAL FEATURES ====================
+
+@pytest.mark.parametrize('d', [0.3, 0.45, 0.6])
+def test_frac_diff(prices, d):
+    log_prices = np.log(prices)
+    (streamed,) = stream(StreamingFracDiff(d), log_prices)
+    assert_parity(streamed, frac_diff(log_prices, d))
+
+
+def test_frac_diff_max_width(prices):
+    log_prices = np.log(prices)
+    batch = frac_diff(log_prices, 0.3, max_width=100)
+    assert np.isnan(batch[:99]).all() and np.isfinite(batch[99:]).all()
+    (streamed,) = stream(StreamingFracDiff(0.3, max_width=100), log_prices)
+    assert_parity(streamed, batch)
+
+
+@pytest.mark.parametrize('lag', [1, 5, 20])
+def test_lagged_corr(trades, lag):
+    flow = np.where(trades['side'] == 'buy', 1.0, -1.0) * trades['quantity'].to_numpy(dtype=np.float64)
+    returns = np.diff(np.log(trades['price'].to_numpy(dtype=np.float64)), prepend=np.nan)
+    returns[0] = 0.0
+    (streamed,) = stream(StreamingLaggedCorrelation(lag, 100), flow, returns)
+    assert_parity(streamed, rolling_lagged_corr(flow, returns, lag, window=100))
+
+
+# ==================== EVENTS ====================
+
+def test_trades_with_quotes_matches_merge_asof(trades, quotes):
+    merged = pd.merge_asof(trades, quotes, on='timestamp', direction='backward')
+    stream_rows = list(iter_trades_with_quotes(
+        EventStream.from_paths(trades=TRADES_PATH, quotes=QUOTES_PATH, chunksize=4096)))
+    assert len(stream_rows) == len(merged)
+
+    ts = np.array([t.timestamp for t, _ in stream_rows])
+    np.testing.assert_array_equal(ts, merged['timestamp'].to_numpy())
+    np.testing.assert_array_equal([t.price for t, _ in stream_rows], merged['price'].to_numpy())
+    bids = np.array([np.nan if q is None else q.bid_price for _, q in stream_rows])
+    np.testing.assert_array_equal(bids, merged['bid_price'].to_numpy())
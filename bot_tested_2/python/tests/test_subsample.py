@@ -0,0 +1,47 @@
+"""Reservoir subsampler: Horvitz-Thompson weights give unbiased full-data totals."""
+
+import numpy as np
+import pandas as pd
+
+from subsample import StratifiedReservoirSampler, NS_PER_HOUR
+
+N_ROWS = 3000
+
+
+def population():
+    rng = np.random.default_rng(7)
+    vol = rng.lognormal(sigma=1.0, size=N_ROWS)
+    return pd.DataFrame({
+        'timestamp': np.sort(rng.integers(0, 3 * NS_PER_HOUR, N_ROWS)),
+        'target': (rng.random(N_ROWS) < 0.4).astype(np.int64),
+        'vol': vol,
+        'value': vol * rng.normal(1.0, 0.5, N_ROWS) + 1.0,
+    })
+
+
+def estimate(df, seed, **kwargs):
+    sampler = StratifiedReservoirSampler(rows_per_stratum=60, weight_col='vol', random_state=seed, **kwargs)
+    for start in range(0, len(df), 700):
+        sampler.update(df.iloc[start:start + 700])
+    sample = sampler.sample()
+    w = sample['sample_weight'].to_numpy()
+    return len(sample), w.sum(), (w * sample['value']).sum(), (w * sample['target']).sum()
+
+
+def test_weighted_totals_are_unbiased():
+    df = population()
+    runs = np.array([estimate(df, seed) for seed in range(200)])
+    truth = np.array([N_ROWS, df['value'].sum(), df['target'].sum()])
+
+    # 3 hours x 2 labels, every stratum larger than its reservoir
+    assert (runs[:, 0] == 6 * 60).all()
+    mean = runs[:, 1:].mean(axis=0)
+    stderr = runs[:, 1:].std(axis=0, ddof=1) / np.sqrt(len(runs))
+    assert np.all(np.abs(mean - truth) < 4 * stderr), (mean, truth, stderr)
+    # Not trivially so: a single sample misses by several percent
+    assert np.all(runs[:, 1:].std(axis=0) > 0.02 * truth)
+
+
+def test_budget_caps_the_sample():
+    size, *_ = estimate(population(), seed=0, budget=200)
+    assert size <= 200
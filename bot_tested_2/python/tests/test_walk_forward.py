@@ -0,0 +1,26 @@
+"""Fold-parallel walk-forward validation must score exactly like the sequential loop."""
+
+import numpy as np
+
+from train_model import OptimizedModelTrainer
+
+# Small members; LightGBM told to be thread-count independent
+SMALL_PARAMS = {
+    'lightgbm': {'num_boost_round': 20, 'min_data_in_leaf': 20, 'deterministic': True,
+                 'force_row_wise': True, 'seed': 42},
+    'xgboost': {'n_estimators': 20, 'max_depth': 3},
+    'random_forest': {'n_estimators': 10, 'max_depth': 4, 'min_samples_leaf': 20},
+}
+
+
+def test_parallel_matches_sequential():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1200, 6))
+    y = (X[:, 0] - 0.5 * X[:, 2] + rng.normal(scale=0.8, size=len(X)) > 0).astype(np.int64)
+
+    trainer = OptimizedModelTrainer(selection_cache_dir=None)
+    trainer.member_params = SMALL_PARAMS
+    sequential = trainer.walk_forward_validation(X, y, n_splits=3, n_workers=1)
+    parallel = trainer.walk_forward_validation(X, y, n_splits=3, n_workers=3)
+    assert parallel == sequential
+    assert sequential[0] > 0.6
@@ -0,0 +1,103 @@
+"""A remapped booster must decide exactly as before on inputs scaled with the refreshed scaler."""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+import train_model
+from train_model import OptimizedModelTrainer, incremental_main
+from warm_start import refit_scaler, scaler_affine, remap_lgb_booster, remap_xgb_booster
+
+
+@pytest.fixture(scope='module')
+def warm_start_data(trades, quotes):
+    merged = pd.merge_asof(trades, quotes, on='timestamp', direction='backward').dropna()
+    # Integer quantities and repeated quotes put many rows exactly on split points
+    X = merged[['quantity', 'bid_volume', 'ask_volume', 'bid_price', 'ask_price', 'price']].to_numpy(np.float64)
+    y = (merged['price'].shift(-20) > merged['price']).to_numpy(np.int64)
+    half = len(X) // 2
+    old_scaler = StandardScaler().fit(X[:half])
+    new_scaler = refit_scaler(old_scaler, X[half:])
+    a, b = scaler_affine(old_scaler, new_scaler)
+    return X, y, old_scaler.transform(X), new_scaler.transform(X), a, b
+
+
+def test_xgb_remap_is_exact(warm_start_data):
+    X, y, old_scaled, new_scaled, a, b = warm_start_data
+    booster = xgb.train({'objective': 'binary:logistic', 'max_depth': 6, 'eta': 0.1,
+                         'tree_method': 'hist', 'seed': 0, 'verbosity': 0},
+                        xgb.DMatrix(old_scaled, label=y), num_boost_round=50)
+    remapped = remap_xgb_booster(booster, a, b)
+    np.testing.assert_array_equal(remapped.predict(xgb.DMatrix(new_scaled)),
+                                  booster.predict(xgb.DMatrix(old_scaled)))
+
+
+def test_lgb_remap_is_exact(warm_start_data):
+    X, y, old_scaled, new_scaled, a, b = warm_start_data
+    booster = lgb.train({'objective': 'binary', 'num_leaves': 31, 'verbose': -1, 'seed': 0},
+                        lgb.Dataset(old_scaled, label=y), num_boost_round=50)
+    remapped = remap_lgb_booster(booster, a, b)
+    np.testing.assert_array_equal(remapped.predict(new_scaled), booster.predict(old_scaled))
+
+
+# ==================== INCREMENTAL ENTRY POINT ====================
+
+SMALL_PARAMS = {
+    'lightgbm': {'num_boost_round': 20},
+    'xgboost': {'n_estimators': 20, 'max_depth': 3},
+    'random_forest': {'n_estimators': 10, 'max_depth': 4},
+}
+
+
+@pytest.fixture
+def saved_model(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1500, 5)), columns=[f'f{i}' for i in range(5)])
+    df = X.assign(target=(X['f0'] + rng.normal(scale=0.7, size=len(X)) > 0).astype(np.int64))
+    features_path = tmp_path / 'features.csv'
+    df.to_csv(features_path, index=False)
+
+    trainer = OptimizedModelTrainer(features_path=str(features_path), selection_cache_dir=None)
+    trainer.member_params = SMALL_PARAMS
+    trainer.train_final_model(*trainer.prepare_data(df.iloc[:1000]))
+    model_dir = tmp_path / 'models'
+    trainer.save_model(str(model_dir))
+    return str(features_path), str(model_dir)
+
+
+def holdout_aucs(monkeypatch, old_auc, new_auc):
+    """Make incremental_retrain see the given holdout AUCs for the saved and updated models."""
+    aucs = iter([old_auc, new_auc])
+    monkeypatch.setattr(train_model, 'roc_auc_score', lambda *args, **kwargs: next(aucs))
+
+
+def test_incremental_keeps_the_saved_model_unless_improved(saved_model, monkeypatch):
+    features_path, model_dir = saved_model
+    model_path = os.path.join(model_dir, 'ensemble_model.pkl')
+    before = os.stat(model_path).st_mtime_ns
+    saved = joblib.load(model_path)
+
+    holdout_aucs(monkeypatch, 0.7, 0.6)
+    result = incremental_main(features_path, model_dir, window=800)
+    assert not result['improved']
+    assert os.stat(model_path).st_mtime_ns == before
+    assert not os.path.exists(os.path.join(model_dir, 'ensemble_artifact'))
+    np.testing.assert_array_equal(joblib.load(model_path)['scaler'].mean_, saved['scaler'].mean_)
+
+
+def test_incremental_saves_and_exports_an_improved_model(saved_model, monkeypatch):
+    features_path, model_dir = saved_model
+    saved = joblib.load(os.path.join(model_dir, 'ensemble_model.pkl'))
+
+    holdout_aucs(monkeypatch, 0.6, 0.7)
+    assert incremental_main(features_path, model_dir, window=800)['improved']
+    updated = joblib.load(os.path.join(model_dir, 'ensemble_model.pkl'))
+    assert updated['models'][0].num_trees() == saved['models'][0].num_trees() + 50
+    assert not np.array_equal(updated['scaler'].mean_, saved['scaler'].mean_)
+    assert os.path.exists(os.path.join(model_dir, 'ensemble_artifact', 'manifest.json'))
@@ -4,9 +4,12 @@ from pathlib import Path
 import glob
 
 class FeatureEngineer:
-    def __init__(self):
+    def __init__(self, bar_sampler=None):
         self.features = None
         self.labels = None
+        # Optional event-driven bar sampler (bot_tested_2 bars.BarSampler):
+        # features are then built on the quote state at each trade bar close
+        self.bar_sampler = bar_sampler
     
     def load_data(self):
         """Load the most recent trades and quotes data"""
@@ -25,6 +28,13 @@ class FeatureEngineer:
         self.quotes['timestamp'] = pd.to_datetime(self.quotes['timestamp'])
         
         print(f"Loaded {len(self.trades)} trades and {len(self.quotes)} quotes")
+        
+        if self.bar_sampler is not None:
+            self.trades = self.trades.sort_values('timestamp').reset_index(drop=True)
+            self.quotes = self.quotes.sort_values('timestamp').reset_index(drop=True)
+            bars = self.bar_sampler.sample_trades(self.trades)
+            # One quote row per bar; bars closing before the first quote are NaN and dropped later
+            self.quotes = self.bar_sampler.sample_quotes(self.quotes, bars['timestamp'])
     
     def create_features(self):
         """Create ML features from market data"""